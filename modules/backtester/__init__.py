@@ -6,6 +6,7 @@ particularly focused on Bollinger Bands and other technical indicators.
 
 Main modules:
 - data_loader: Functions for loading and preprocessing financial data
+- bar_store: Incremental ingestion of new tick exports into minute-bar stores
 - indicators: Technical indicators calculation functions
 - backtest_engine: Core backtesting engine with optimized performance
 - visualization: Plotting and visualization utilities
@@ -38,7 +39,16 @@ from .data_loader import (
     load_tick_data,
     load_parquet_data,
     prepare_minute_data,
-    load_balance_data
+    load_balance_data,
+    to_compact_dtypes,
+    epoch_to_datetime_index,
+    decode_datetime_index
+)
+
+from .bar_store import (
+    get_last_bar_timestamp,
+    read_fingerprint,
+    ingest_tick_export
 )
 
 from .indicators import (
@@ -77,6 +87,14 @@ __all__ = [
     'load_parquet_data',
     'prepare_minute_data',
     'load_balance_data',
+    'to_compact_dtypes',
+    'epoch_to_datetime_index',
+    'decode_datetime_index',
+    
+    # Bar store
+    'get_last_bar_timestamp',
+    'read_fingerprint',
+    'ingest_tick_export',
     
     # Indicators
     'bollinger_bands',
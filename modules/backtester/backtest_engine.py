@@ -13,6 +13,8 @@ import concurrent.futures
 import os
 from tqdm import tqdm
 
+from .data_loader import decode_datetime_index
+
 
 @njit
 def backtest_core(
@@ -160,6 +162,9 @@ class Backtest:
         Parameters:
         data (pd.DataFrame): DataFrame containing financial data with required columns:
                             'bid', 'ask', 'midprice', 'upper_band', 'lower_band', 'middle_band'.
+                            Both the standard layout (float64, DatetimeIndex) and the compact
+                            layout from data_loader.to_compact_dtypes (float32, int64 epoch index)
+                            are supported.
         
         Raises:
         ValueError: If required columns are missing from the data.
@@ -224,29 +229,36 @@ class Backtest:
         # Create an array filled with zeros
         friday_close = np.zeros(len(self.data), dtype=np.int32)
         
-        # Check if the DataFrame has a datetime index
-        if not isinstance(self.data.index, pd.DatetimeIndex):
+        # Check if the DataFrame has a datetime (or compact epoch) index
+        idx = self.datetime_index()
+        if idx is None:
             return friday_close
         
         # Find all Fridays (weekday=4 in pandas)
-        fridays = self.data.index.weekday == 4
+        fridays = idx.weekday == 4
         if not np.any(fridays):
             return friday_close
         
-        # Get Friday dates and their positions
-        friday_dates = self.data.index[fridays].normalize()
         # Group by normalized date and get last 15 indices for each Friday
         # Use pandas groupby for vectorized operation
-        idx = self.data.index
         friday_df = pd.DataFrame({'idx': idx, 'date': idx.normalize(), 'is_friday': fridays})
         # Only Fridays
         friday_df = friday_df[friday_df['is_friday']]
         # Group by date and get last 15 indices for each Friday
         last_15_idx = friday_df.groupby('date')['idx'].apply(lambda x: x[-15:]).explode().values
         # Mark these indices in our array
-        friday_close[self.data.index.isin(last_15_idx)] = 1
+        friday_close[idx.isin(last_15_idx)] = 1
         return friday_close
 
+    def datetime_index(self) -> Optional[pd.DatetimeIndex]:
+        """
+        Return the data index as timestamps, decoding the compact int64 epoch index if needed.
+        
+        Returns:
+        Optional[pd.DatetimeIndex]: The timestamps of the data, or None if the index carries no time information.
+        """
+        return decode_datetime_index(self.data)
+
 
 
     def _calculate_performance_metrics(self) -> None:
@@ -321,8 +333,11 @@ class Backtest:
         # Add cumulative PnL
         trades_df["Cumulative_PnL"] = trades_df["PnL"].cumsum()
 
-        # Add timestamp information if available
+        # Add timestamp information if available (compact epoch indexes are decoded)
         if len(self.results) > 0:
+            time_index = self.datetime_index()
+            if time_index is None:
+                time_index = self.data.index
             exit_timestamps = []
             entry_timestamps = []
             for trade in self.results:
@@ -330,15 +345,15 @@ class Backtest:
                 exit_idx = trade[3]   # Exit index
                 # Entry time
                 if entry_idx < len(self.data):
-                    entry_time = self.data.index[entry_idx]
+                    entry_time = time_index[entry_idx]
                 else:
-                    entry_time = self.data.index[-1]
+                    entry_time = time_index[-1]
                 entry_timestamps.append(entry_time)
                 # Exit time
                 if exit_idx < len(self.data):
-                    exit_time = self.data.index[exit_idx]
+                    exit_time = time_index[exit_idx]
                 else:
-                    exit_time = self.data.index[-1]
+                    exit_time = time_index[-1]
                 exit_timestamps.append(exit_time)
             trades_df['Entry_Time'] = entry_timestamps
             trades_df['Exit_Time'] = exit_timestamps
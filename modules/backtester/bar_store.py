@@ -0,0 +1,408 @@
+"""
+Incremental minute-bar store for tick data.
+
+This module keeps per-symbol minute bars in a Parquet dataset directory
+(part.0.parquet, part.1.parquet, ... as written by Dask) and extends it with
+new MT5 tick exports without re-converting the whole tick history.
+"""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+import pandas as pd
+import pyarrow.parquet as pq
+from typing import Dict, Any, List, Optional
+
+from .data_loader import load_parquet_data
+
+
+# Manifest written next to the parts; the leading underscore keeps it out of Parquet dataset discovery
+FINGERPRINT_FILE = '_fingerprint.json'
+
+# Column layout of MT5 tick exports, shared with data_loader.load_tick_data
+TICK_COLUMNS: List[str] = ['date', 'time', 'bid', 'ask', 'last', 'volume', 'flags']
+
+
+def get_last_bar_timestamp(store_path: str, datetime_column: str = 'datetime') -> Optional[pd.Timestamp]:
+    """
+    Return the timestamp of the last bar stored for a symbol.
+
+    Only the Parquet footer of the last part is read: the maximum comes from the
+    row-group statistics, so the call is cheap even for years of minute bars.
+
+    Parameters:
+    store_path (str): Path to the bar store (dataset directory or single Parquet file).
+    datetime_column (str): Name of the stored timestamp column/index (default: 'datetime').
+
+    Returns:
+    Optional[pd.Timestamp]: Start time of the last stored bar, or None if the store is empty or missing.
+    """
+    parts = _list_parts(store_path)
+    if not parts:
+        return None
+    return _timestamp_statistic(parts[-1], datetime_column, 'max')
+
+
+def read_fingerprint(store_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the dataset fingerprint of a bar store.
+
+    Parameters:
+    store_path (str): Path to the bar store.
+
+    Returns:
+    Optional[Dict[str, Any]]: The fingerprint manifest, or None if the store has never been ingested into.
+    """
+    fingerprint_path = _fingerprint_path(store_path)
+    if not os.path.exists(fingerprint_path):
+        return None
+    with open(fingerprint_path, 'r') as f:
+        return json.load(f)
+
+
+def ingest_tick_export(
+    export_path: str,
+    store_path: str,
+    resample_rule: str = '1T',
+    chunk_rows: int = 1_000_000,
+    encoding: Optional[str] = None,
+    datetime_column: str = 'datetime'
+) -> Dict[str, Any]:
+    """
+    Append the bars built from the new ticks of an export to a bar store.
+
+    Algorithm approach:
+    1. Read the last stored bar timestamp from the Parquet footer.
+    2. Parse only the ticks at or after that bar start (CSV chunks that end
+       earlier are skipped after decoding a single timestamp; Parquet exports
+       use predicate pushdown).
+    3. Aggregate the ticks into bars with the same rules as prepare_minute_data
+       (first bid/ask per interval, midprice, rows with NaN dropped) and keep
+       only the bars after the last stored one. The stored last bar is final:
+       it holds the first bid/ask of its interval, which later ticks cannot change.
+    4. Write atomically: new bars go to a new part file, and a single
+       os.replace publishes it, so readers never see a half-written store.
+    5. Update the dataset fingerprint so downstream caches can tell what changed.
+
+    Parameters:
+    export_path (str): Path to the new MT5 tick export (tab-separated CSV or Parquet with 'bid'/'ask').
+    store_path (str): Path to the bar store. A directory is created if it does not exist;
+                      an existing single Parquet file is rewritten atomically instead of appended to.
+    resample_rule (str): Bar interval (default: '1T' for 1-minute bars).
+    chunk_rows (int): Number of CSV rows parsed at a time (default: 1,000,000).
+    encoding (Optional[str]): Encoding of the CSV export (default: None, pandas default).
+    datetime_column (str): Name of the stored timestamp column/index; new bars are
+                           written with the same name (default: 'datetime').
+
+    Returns:
+    Dict[str, Any]: Summary of the ingestion:
+        - new_bars: Number of bars added after the previous last bar
+        - first_new_bar / last_bar: Time range added by the ingestion
+        - written_part: Part file that was created or rewritten (None if nothing changed)
+        - fingerprint: Updated dataset fingerprint
+
+    Raises:
+    FileNotFoundError: If the export file does not exist.
+    ValueError: If the export has an unexpected format.
+    """
+    if not os.path.exists(export_path):
+        raise FileNotFoundError(f"File not found: {export_path}")
+
+    last_bar = get_last_bar_timestamp(store_path, datetime_column)
+
+    # Parse only the ticks that can affect the store
+    ticks = _read_ticks_since(export_path, last_bar, chunk_rows, encoding)
+    summary: Dict[str, Any] = {
+        'new_bars': 0,
+        'first_new_bar': None,
+        'last_bar': last_bar,
+        'written_part': None,
+        'fingerprint': read_fingerprint(store_path)
+    }
+    if ticks.empty:
+        return summary
+
+    bars = ticks.resample(resample_rule).agg({'bid': 'first', 'ask': 'first'})
+    bars['midprice'] = (bars['bid'] + bars['ask']) / 2
+    bars = bars.dropna()
+
+    # The stored last bar already holds the first ticks of its interval
+    new_bars = bars if last_bar is None else bars[bars.index > last_bar]
+    if new_bars.empty:
+        return summary
+    new_bars = new_bars.rename_axis(datetime_column)
+
+    if os.path.isfile(store_path):
+        # Single-file store: Parquet cannot be appended in place, rewrite it as a whole
+        stored = pd.read_parquet(store_path)
+        combined = pd.concat([stored, new_bars])
+        _atomic_write_parquet(combined, store_path)
+        written_part = store_path
+    else:
+        os.makedirs(store_path, exist_ok=True)
+        parts = _list_parts(store_path)
+        written_part = os.path.join(store_path, f"part.{_next_part_number(parts)}.parquet")
+        _atomic_write_parquet(new_bars, written_part)
+        # A Dask _metadata summary would hide the new part from dask.read_parquet
+        stale_metadata = os.path.join(store_path, '_metadata')
+        if os.path.exists(stale_metadata):
+            os.remove(stale_metadata)
+
+    summary.update({
+        'new_bars': len(new_bars),
+        'first_new_bar': new_bars.index[0],
+        'last_bar': new_bars.index[-1],
+        'written_part': written_part
+    })
+    summary['fingerprint'] = _update_fingerprint(store_path, summary, datetime_column)
+
+    return summary
+
+
+def _read_ticks_since(
+    export_path: str,
+    since: Optional[pd.Timestamp],
+    chunk_rows: int,
+    encoding: Optional[str]
+) -> pd.DataFrame:
+    """
+    Parse the ticks of an export with timestamp >= since.
+
+    Parameters:
+    export_path (str): Path to the tick export (CSV or Parquet).
+    since (Optional[pd.Timestamp]): Lower bound on the tick timestamps (None = all ticks).
+    chunk_rows (int): Number of CSV rows parsed at a time.
+    encoding (Optional[str]): Encoding of the CSV export.
+
+    Returns:
+    pd.DataFrame: Ticks with a datetime index and 'bid'/'ask' columns, sorted by time.
+    """
+    if export_path.endswith('.parquet'):
+        ticks = load_parquet_data(export_path, start=since, columns=['bid', 'ask'])
+        if 'datetime' in ticks.columns:
+            ticks = ticks.set_index('datetime')
+        return ticks.sort_index()
+
+    try:
+        reader = pd.read_csv(
+            export_path, sep='\t', header=0, names=TICK_COLUMNS,
+            usecols=['date', 'time', 'bid', 'ask'], chunksize=chunk_rows, encoding=encoding
+        )
+        selected = []
+        for chunk in reader:
+            if chunk.empty:
+                continue
+            # Exports are chronological: decode one timestamp to discard whole chunks of old ticks
+            if since is not None and pd.Timestamp(f"{chunk['date'].iloc[-1]} {chunk['time'].iloc[-1]}") < since:
+                continue
+            chunk.index = pd.to_datetime(chunk['date'] + ' ' + chunk['time'])
+            chunk.index.name = 'datetime'
+            chunk = chunk[['bid', 'ask']]
+            if since is not None:
+                chunk = chunk[chunk.index >= since]
+            selected.append(chunk)
+    except Exception as e:
+        raise ValueError(f"Error loading tick data: {str(e)}")
+
+    if not selected:
+        return pd.DataFrame(columns=['bid', 'ask'], index=pd.DatetimeIndex([], name='datetime'))
+    return pd.concat(selected).sort_index()
+
+
+def _list_parts(store_path: str) -> List[str]:
+    """
+    List the Parquet part files of a store in part-number order.
+
+    Parameters:
+    store_path (str): Path to the bar store (directory or single file).
+
+    Returns:
+    List[str]: Paths of the part files (a single-file store is its only part).
+    """
+    if os.path.isfile(store_path):
+        return [store_path]
+    if not os.path.isdir(store_path):
+        return []
+
+    # Names starting with '_' or '.' are metadata or in-flight temporary files
+    names = [
+        name for name in os.listdir(store_path)
+        if name.endswith('.parquet') and not name.startswith(('_', '.'))
+    ]
+    names.sort(key=lambda name: [int(tok) if tok.isdigit() else tok for tok in re.split(r'(\d+)', name)])
+    return [os.path.join(store_path, name) for name in names]
+
+
+def _next_part_number(parts: List[str]) -> int:
+    """
+    Return the number to use for the next part file.
+
+    Parameters:
+    parts (List[str]): Existing part paths.
+
+    Returns:
+    int: One more than the highest part number found (0 for an empty store).
+    """
+    numbers = [int(m.group(1)) for m in (re.search(r'(\d+)\.parquet$', p) for p in parts) if m]
+    return max(numbers) + 1 if numbers else 0
+
+
+def _timestamp_statistic(file_path: str, datetime_column: str, which: str) -> Optional[pd.Timestamp]:
+    """
+    Read the min or max of the timestamp column from the Parquet footer statistics.
+
+    Parameters:
+    file_path (str): Path to a single Parquet file.
+    datetime_column (str): Name of the stored timestamp column/index.
+    which (str): 'min' or 'max'.
+
+    Returns:
+    Optional[pd.Timestamp]: The statistic, or None if the file has no rows.
+    """
+    parquet_file = pq.ParquetFile(file_path)
+    metadata = parquet_file.metadata
+    if metadata.num_rows == 0:
+        return None
+
+    column_idx = parquet_file.schema_arrow.get_field_index(datetime_column)
+    if column_idx < 0:
+        raise ValueError(f"Timestamp column '{datetime_column}' not found in {file_path}")
+
+    values = []
+    for rg in range(metadata.num_row_groups):
+        stats = metadata.row_group(rg).column(column_idx).statistics
+        if stats is None or not stats.has_min_max:
+            # No statistics written: fall back to reading this single column
+            column = parquet_file.read(columns=[datetime_column]).column(0).to_pandas()
+            return pd.Timestamp(column.max() if which == 'max' else column.min())
+        values.append(pd.Timestamp(stats.max if which == 'max' else stats.min))
+    return max(values) if which == 'max' else min(values)
+
+
+def _atomic_write_parquet(df: pd.DataFrame, target_path: str) -> None:
+    """
+    Write a DataFrame to Parquet through a temporary file and an atomic rename.
+
+    Parameters:
+    df (pd.DataFrame): Data to write (the index is stored).
+    target_path (str): Final path of the Parquet file.
+    """
+    directory = os.path.dirname(os.path.abspath(target_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.part-', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, engine='pyarrow')
+        os.replace(tmp_path, target_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _fingerprint_path(store_path: str) -> str:
+    """
+    Return the path of the fingerprint manifest of a store.
+
+    Parameters:
+    store_path (str): Path to the bar store.
+
+    Returns:
+    str: Manifest path (inside the directory, or next to a single-file store).
+    """
+    if os.path.isfile(store_path) or (store_path.endswith('.parquet') and not os.path.isdir(store_path)):
+        return store_path + '.fingerprint.json'
+    return os.path.join(store_path, FINGERPRINT_FILE)
+
+
+def _file_sha256(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file, reading it in blocks.
+
+    Parameters:
+    file_path (str): Path to the file.
+
+    Returns:
+    str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _update_fingerprint(store_path: str, summary: Dict[str, Any],
+                        datetime_column: str = 'datetime') -> Dict[str, Any]:
+    """
+    Recompute and save the dataset fingerprint after an ingestion.
+
+    Unchanged parts (same size and mtime as in the previous manifest) reuse
+    their stored hash, so only the part that was just written is hashed.
+
+    Parameters:
+    store_path (str): Path to the bar store.
+    summary (Dict[str, Any]): Summary of the ingestion that just completed.
+    datetime_column (str): Name of the stored timestamp column/index (default: 'datetime').
+
+    Returns:
+    Dict[str, Any]: The new fingerprint manifest.
+    """
+    previous = read_fingerprint(store_path) or {}
+    previous_parts = previous.get('parts', {})
+
+    parts_info: Dict[str, Dict[str, Any]] = {}
+    total_rows = 0
+    for part in _list_parts(store_path):
+        name = os.path.basename(part)
+        stat = os.stat(part)
+        cached = previous_parts.get(name)
+        if cached and cached['bytes'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            parts_info[name] = cached
+        else:
+            parts_info[name] = {
+                'rows': pq.ParquetFile(part).metadata.num_rows,
+                'bytes': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': _file_sha256(part)
+            }
+        total_rows += parts_info[name]['rows']
+
+    # The dataset hash only depends on part names and contents
+    dataset_digest = hashlib.sha256()
+    for name in sorted(parts_info):
+        dataset_digest.update(f"{name}:{parts_info[name]['sha256']};".encode())
+
+    parts = _list_parts(store_path)
+    fingerprint = {
+        'version': previous.get('version', 0) + 1,
+        'fingerprint': dataset_digest.hexdigest(),
+        'rows': total_rows,
+        'first_bar': str(_timestamp_statistic(parts[0], datetime_column, 'min')),
+        'last_bar': str(summary['last_bar']),
+        'parts': parts_info,
+        'last_ingest': {
+            'from': str(summary['first_new_bar']),
+            'to': str(summary['last_bar']),
+            'new_bars': summary['new_bars'],
+            'written_part': os.path.basename(summary['written_part'])
+        }
+    }
+
+    # Same temporary-file + rename pattern as the parts, so readers never see a truncated manifest
+    fingerprint_path = _fingerprint_path(store_path)
+    tmp_path = fingerprint_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(fingerprint, f, indent=2)
+    os.replace(tmp_path, fingerprint_path)
+
+    return fingerprint
+
+
+# Export functions for easy import
+__all__ = [
+    'get_last_bar_timestamp',
+    'read_fingerprint',
+    'ingest_tick_export'
+]
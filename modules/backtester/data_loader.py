@@ -4,9 +4,18 @@ Data loading utilities for backtesting.
 This module provides functions to load and preprocess tick data for backtesting purposes.
 """
 
+import os
 import pandas as pd
+import pyarrow.dataset as ds
 import dask.dataframe as dd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+
+
+# Index name used by the compact representation, where timestamps are raw int64 nanoseconds since epoch
+EPOCH_INDEX_NAME = 'epoch_ns'
+
+# DataFrame.attrs key holding the time zone of a compact tz-aware index (the epochs are UTC)
+EPOCH_TZ_ATTR = 'epoch_tz'
 
 
 def load_tick_data_dask(file_path: str) -> dd.DataFrame:
@@ -114,32 +123,106 @@ def load_tick_data(file_path: str) -> pd.DataFrame:
         raise ValueError(f"Error loading tick data: {str(e)}")
 
 
-def load_parquet_data(file_path: str) -> pd.DataFrame:
+def load_parquet_data(
+    file_path: str,
+    start: Optional[Union[str, pd.Timestamp]] = None,
+    end: Optional[Union[str, pd.Timestamp]] = None,
+    columns: Optional[List[str]] = None,
+    datetime_column: str = 'datetime',
+    compact: bool = False
+) -> pd.DataFrame:
     """
-    Load tick data from a Parquet file.
+    Load tick data from a Parquet file, optionally restricted to a date range and a subset of columns.
+    
+    The date range and the column list are pushed down to pyarrow, so row groups whose
+    min/max statistics fall outside [start, end] are skipped without being decompressed,
+    and unselected columns are never read. Without any selector the whole file is loaded.
     
     Parameters:
-    file_path (str): The path to the Parquet file containing tick data.
+    file_path (str): The path to the Parquet file (or dataset directory) containing tick data.
+    start (Optional[Union[str, pd.Timestamp]]): Inclusive lower bound on the timestamps (default: None).
+    end (Optional[Union[str, pd.Timestamp]]): Inclusive upper bound on the timestamps (default: None).
+    columns (Optional[List[str]]): Columns to load, e.g. ['bid', 'ask'] (default: None, all columns).
+                                   The timestamp column is always kept.
+    datetime_column (str): Name of the timestamp column or index stored in the file (default: 'datetime').
+    compact (bool): If True, float columns are downcast to float32 right after loading (default: False).
+                    Timestamps are kept so the ticks can still be resampled.
     
     Returns:
     pd.DataFrame: A DataFrame with tick data.
     
     Raises:
     FileNotFoundError: If the specified file path does not exist.
-    ValueError: If the Parquet file has an unexpected format.
+    ValueError: If the Parquet file has an unexpected format or the timestamp column is missing.
     """
     try:
-        df = pd.read_parquet(file_path)
-        return df
+        # Fast path: nothing to push down, keep the original behaviour
+        if start is None and end is None and columns is None:
+            df = pd.read_parquet(file_path)
+            return _downcast_float_columns(df) if compact else df
+        
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(file_path)
+        
+        # Inspect the schema only (no data is read) to locate the timestamp column
+        schema = ds.dataset(file_path, format='parquet').schema
+        pandas_metadata = schema.pandas_metadata or {}
+        index_columns = [
+            col for col in pandas_metadata.get('index_columns', []) if isinstance(col, str)
+        ]
+        
+        read_columns = None
+        if columns is not None:
+            missing_columns = [col for col in columns if col not in schema.names]
+            if missing_columns:
+                raise ValueError(f"Missing required columns: {missing_columns}")
+            read_columns = list(columns)
+            # Index columns are restored from the pandas metadata, plain columns must be requested
+            if (datetime_column in schema.names and datetime_column not in index_columns
+                    and datetime_column not in read_columns):
+                read_columns.append(datetime_column)
+        
+        filters = None
+        if start is not None or end is not None:
+            if datetime_column not in schema.names:
+                raise ValueError(f"Timestamp column '{datetime_column}' not found in {file_path}")
+            # Compare against the stored timezone, otherwise pyarrow refuses the predicate
+            tz = getattr(schema.field(datetime_column).type, 'tz', None)
+            filters = []
+            if start is not None:
+                filters.append((datetime_column, '>=', _as_parquet_timestamp(start, tz)))
+            if end is not None:
+                filters.append((datetime_column, '<=', _as_parquet_timestamp(end, tz)))
+        
+        df = pd.read_parquet(file_path, engine='pyarrow', columns=read_columns, filters=filters)
+        return _downcast_float_columns(df) if compact else df
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {file_path}")
     except Exception as e:
         raise ValueError(f"Error loading parquet data: {str(e)}")
 
 
+def _as_parquet_timestamp(value: Union[str, pd.Timestamp], tz: Optional[str]) -> pd.Timestamp:
+    """
+    Convert a date bound to a Timestamp comparable with a Parquet timestamp column.
+    
+    Parameters:
+    value (Union[str, pd.Timestamp]): Date bound given by the caller.
+    tz (Optional[str]): Timezone of the stored column, None for naive timestamps.
+    
+    Returns:
+    pd.Timestamp: Timestamp with the same timezone awareness as the stored column.
+    """
+    ts = pd.Timestamp(value)
+    if tz is None:
+        return ts.tz_convert(None) if ts.tzinfo is not None else ts
+    return ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)
+
+
 def prepare_minute_data(
     tick_data: pd.DataFrame, 
-    resample_rule: str = '1T'
+    resample_rule: str = '1T',
+    compact: bool = False
 ) -> pd.DataFrame:
     """
     Resample tick data to minute intervals and calculate midprice.
@@ -147,6 +230,8 @@ def prepare_minute_data(
     Parameters:
     tick_data (pd.DataFrame): DataFrame containing tick data with 'bid' and 'ask' columns.
     resample_rule (str): Resampling rule (default: '1T' for 1-minute intervals).
+    compact (bool): If True, return the compact representation produced by
+                    to_compact_dtypes (float32 prices, int64 epoch index) (default: False).
     
     Returns:
     pd.DataFrame: Resampled DataFrame with 'bid', 'ask', and 'midprice' columns.
@@ -160,6 +245,10 @@ def prepare_minute_data(
     if missing_columns:
         raise ValueError(f"Missing required columns: {missing_columns}")
     
+    # Compact tick data carries an epoch index, resampling needs real timestamps
+    if tick_data.index.name == EPOCH_INDEX_NAME:
+        tick_data = tick_data.set_axis(decode_datetime_index(tick_data), axis=0)
+    
     # Resample tick_data to specified intervals, taking the first non-null bid and ask
     minute_sample = tick_data.resample(resample_rule).agg({'bid': 'first', 'ask': 'first'})
     
@@ -169,9 +258,110 @@ def prepare_minute_data(
     # Remove rows with NaN values
     minute_sample_clean = minute_sample.dropna()
     
+    if compact:
+        minute_sample_clean = to_compact_dtypes(minute_sample_clean)
+    
     return minute_sample_clean
 
 
+def to_compact_dtypes(
+    data: pd.DataFrame,
+    price_columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Convert market data to the compact representation used to fit more symbols in memory.
+    
+    Prices are stored as float32 (about 7 significant digits, i.e. well below 0.01 pips for
+    FX quotes) and the DatetimeIndex is replaced by raw int64 nanoseconds since epoch, named
+    EPOCH_INDEX_NAME. Indicators keep float64 accumulators internally and the backtest engine
+    converts the epoch index back to timestamps only where it needs calendar information.
+    For a tz-aware index the epochs are UTC and the time zone is kept in
+    df.attrs[EPOCH_TZ_ATTR], so decode_datetime_index restores the local clock.
+    
+    Parameters:
+    data (pd.DataFrame): DataFrame with a DatetimeIndex and price columns.
+    price_columns (Optional[List[str]]): Columns to downcast (default: None, all float64 columns).
+    
+    Returns:
+    pd.DataFrame: New DataFrame with float32 prices and an int64 epoch index.
+    
+    Raises:
+    ValueError: If a requested price column is missing or the index is not a DatetimeIndex.
+    """
+    if price_columns is not None:
+        missing_columns = [col for col in price_columns if col not in data.columns]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+    
+    compact_df = _downcast_float_columns(data, price_columns)
+    
+    # Already compact: nothing to do on the index
+    if compact_df.index.name == EPOCH_INDEX_NAME:
+        return compact_df
+    if not isinstance(compact_df.index, pd.DatetimeIndex):
+        raise ValueError("Compact representation requires a DatetimeIndex")
+    
+    # tz-aware indexes are stored in UTC, asi8 gives the int64 view without copying values
+    epoch_index = pd.Index(compact_df.index.asi8, dtype='int64', name=EPOCH_INDEX_NAME)
+    compact_df = compact_df.set_axis(epoch_index, axis=0)
+    if data.index.tz is not None:
+        compact_df.attrs[EPOCH_TZ_ATTR] = str(data.index.tz)
+    return compact_df
+
+
+def epoch_to_datetime_index(index: pd.Index, tz: Optional[str] = None) -> pd.DatetimeIndex:
+    """
+    Convert an int64 epoch index produced by to_compact_dtypes back to a DatetimeIndex.
+    
+    Parameters:
+    index (pd.Index): Index of int64 nanoseconds since epoch.
+    tz (Optional[str]): Time zone of the original index (default: None, naive timestamps).
+    
+    Returns:
+    pd.DatetimeIndex: Equivalent DatetimeIndex named 'datetime', in tz if given.
+    """
+    datetime_index = pd.DatetimeIndex(index.to_numpy(dtype='int64').view('datetime64[ns]'), name='datetime')
+    if tz is not None:
+        datetime_index = datetime_index.tz_localize('UTC').tz_convert(tz)
+    return datetime_index
+
+
+def decode_datetime_index(data: pd.DataFrame) -> Optional[pd.DatetimeIndex]:
+    """
+    Return the index of a DataFrame as timestamps, in both the standard and the compact layout.
+    
+    Parameters:
+    data (pd.DataFrame): Data with a DatetimeIndex or the int64 epoch index of to_compact_dtypes.
+    
+    Returns:
+    Optional[pd.DatetimeIndex]: The timestamps of the data, or None if the index carries no time information.
+    """
+    if isinstance(data.index, pd.DatetimeIndex):
+        return data.index
+    if data.index.name == EPOCH_INDEX_NAME:
+        return epoch_to_datetime_index(data.index, data.attrs.get(EPOCH_TZ_ATTR))
+    return None
+
+
+def _downcast_float_columns(
+    data: pd.DataFrame,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Cast float64 columns to float32.
+    
+    Parameters:
+    data (pd.DataFrame): Input DataFrame.
+    columns (Optional[List[str]]): Columns to cast (default: None, all float64 columns).
+    
+    Returns:
+    pd.DataFrame: DataFrame with the selected columns stored as float32.
+    """
+    if columns is None:
+        columns = [col for col in data.columns if data[col].dtype == 'float64']
+    return data.astype({col: 'float32' for col in columns})
+
+
 def load_balance_data(file_path: str) -> pd.DataFrame:
     """
     Load balance data from CSV file for comparison with backtest results.
@@ -24,6 +24,9 @@ def bollinger_bands(
     - Lower band: Moving average - (standard deviation * num_std_dev)
     - Middle band: Moving average
     
+    Rolling statistics are always accumulated in float64. If the price column is
+    float32 (compact mode), the bands are stored as float32 as well.
+    
     Parameters:
     data (pd.DataFrame): DataFrame containing financial data.
     price_column (str): Name of the column containing price data (default: 'midprice').
@@ -43,16 +46,21 @@ def bollinger_bands(
     # Create a copy to avoid modifying the original data
     result_df = data.copy()
     
-    # Calculate the rolling mean and standard deviation
-    rolling_mean = result_df[price_column].rolling(window=window).mean()
-    rolling_std = result_df[price_column].rolling(window=window).std()
+    # Calculate the rolling mean and standard deviation with float64 accumulators
+    prices = result_df[price_column]
+    rolling_prices = prices.astype(np.float64, copy=False).rolling(window=window)
+    rolling_mean = rolling_prices.mean()
+    rolling_std = rolling_prices.std()
+    
+    # Bands follow the storage dtype of the prices (float32 in compact mode)
+    band_dtype = np.float32 if prices.dtype == np.float32 else np.float64
     
     # Calculate the upper and lower Bollinger Bands
-    result_df['upper_band'] = rolling_mean + (rolling_std * num_std_dev)
-    result_df['lower_band'] = rolling_mean - (rolling_std * num_std_dev)
+    result_df['upper_band'] = (rolling_mean + (rolling_std * num_std_dev)).astype(band_dtype, copy=False)
+    result_df['lower_band'] = (rolling_mean - (rolling_std * num_std_dev)).astype(band_dtype, copy=False)
     
     # Calculate the middle band (moving average)
-    result_df['middle_band'] = rolling_mean
+    result_df['middle_band'] = rolling_mean.astype(band_dtype, copy=False)
     
     return result_df
 
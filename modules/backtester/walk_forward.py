@@ -8,10 +8,10 @@ to avoid lookhead bias in backtesting strategies.
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Dict, Any, List, Optional
-from datetime import timedelta
+from typing import Dict, Any
 
 from . import indicators, backtest_engine
+from .data_loader import decode_datetime_index
 
 
 def _optimize_parameters_wfo(
@@ -178,10 +178,15 @@ def walk_forward_optimization(
         'summary_stats': {}
     }
     
+    # Timestamps of the data (the compact layout stores an int64 epoch index)
+    time_index = decode_datetime_index(minute_data)
+    if time_index is None:
+        time_index = minute_data.index
+    
     print(f"=== WALK FORWARD OPTIMIZATION ===")
     print(f"Lookback period: {lookback_days} days ({lookback_minutes} minutes)")
     print(f"Optimization interval: {optimization_interval_days} days")
-    print(f"Total data period: {minute_data.index.min()} to {minute_data.index.max()}")
+    print(f"Total data period: {time_index.min()} to {time_index.max()}")
     
     # Calculate the first optimization start point
     # We need enough data for the lookback period
@@ -207,10 +212,10 @@ def walk_forward_optimization(
         opt_data = minute_data.iloc[opt_start_idx:opt_end_idx].copy()
         trade_data = minute_data.iloc[trade_start_idx:trade_end_idx].copy()
         
-        opt_start_time = opt_data.index.min()
-        opt_end_time = opt_data.index.max()
-        trade_start_time = trade_data.index.min()
-        trade_end_time = trade_data.index.max()
+        opt_start_time = time_index[opt_start_idx:opt_end_idx].min()
+        opt_end_time = time_index[opt_start_idx:opt_end_idx].max()
+        trade_start_time = time_index[trade_start_idx:trade_end_idx].min()
+        trade_end_time = time_index[trade_start_idx:trade_end_idx].max()
         
         print(f"\n--- Period {period_count} ---")
         print(f"Optimization: {opt_start_time} to {opt_end_time}")
@@ -407,7 +412,7 @@ def plot_wfo_results(wfo_results: Dict[str, Any]) -> None:
     
     # Combine legends for both y-axes
     lines = line1 + line2
-    labels = [l.get_label() for l in lines]
+    labels = [line.get_label() for line in lines]
     axes[1, 0].legend(lines, labels, loc='upper left')
     
     # Plot 4: Win rate by period
@@ -8,12 +8,17 @@ with advanced features like drawdown filtering and linearity-based optimization.
 Modules:
 --------
 - utils: Utility functions for scoring and weight calculation
-- data_loader: Functions for loading and preprocessing trading data
+- data_loader: Functions for loading and preprocessing trading data (CSV files or trade ledgers)
 - portfolio_rebalancer: Main portfolio rebalancing class
+- covariance: Incremental rolling covariance and covariance-aware allocation methods
+- correlation: Streaming rolling correlations, strategy clustering and deduplication
+- calendars: Vectorized rebalance calendars (weekly, monthly, every N bars, events)
 - performance_metrics: Performance calculation and evaluation functions
 - optimization: Grid search and optimization routines
+- walk_forward: Walk-forward selection of lookback and method (out-of-sample)
 - filters: Drawdown and other filtering mechanisms
 - linearity_analysis: Linearity-based portfolio optimization
+- subset_selection: Best K-of-N strategy subsets via beam search and branch and bound
 - visualization: Plotting and visualization utilities
 
 Usage:
@@ -36,12 +41,20 @@ __author__ = "Portfolio Optimization Team"
 
 # Import main classes and functions for easy access
 try:
-    from .data_loader import load_trading_data
+    from .data_loader import load_trading_data, trades_to_returns_matrix
     from .portfolio_rebalancer import DynamicPortfolioRebalancer
-    from .performance_metrics import calculate_performance_metrics
-    from .optimization import grid_search_optimization, optimize_single_config
-    from .filters import apply_rolling_drawdown_filter, create_filtered_rebalancer
+    from .calendars import get_rebalance_indices
+    from .covariance import RollingCovariance, calculate_covariance_weights_batch
+    from .correlation import StrategyClusterer, calculate_rolling_correlation_stats
+    from .performance_metrics import calculate_performance_metrics, calculate_performance_metrics_matrix
+    from .optimization import grid_search_optimization, optimize_single_config, get_config_result
+    from .walk_forward import walk_forward_portfolio_optimization
+    from .filters import (apply_rolling_drawdown_filter, apply_rolling_drawdown_filter_matrix,
+                          create_filtered_rebalancer, optimize_filter_parameters,
+                          apply_streak_filter_matrix, apply_autocorrelation_filter_matrix,
+                          optimize_streak_filter_parameters, optimize_autocorrelation_filter_parameters)
     from .linearity_analysis import calculate_linearity_metrics, grid_search_optimization_linearity
+    from .subset_selection import SubsetSearch, find_best_subsets, create_subset_rebalancer
     from .visualization import plot_equity_curves, plot_weight_allocation, plot_performance_comparison
     from . import utils
 except ImportError as e:
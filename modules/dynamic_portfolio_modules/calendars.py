@@ -0,0 +1,166 @@
+"""
+Rebalance Calendars Module for Dynamic Portfolio Optimization
+=============================================================
+
+This module generates rebalance index arrays from the date index of the
+returns matrix. All schedules are computed with vectorized numpy operations,
+so the rebalance frequency can be used as an additional grid dimension.
+
+Supported calendars:
+--------------------
+- 'D': every bar
+- 'W-MON' ... 'W-SUN': weekly, on the given weekday (default 'W-SUN')
+- 'MS' / 'ME': first / last bar of each month ('M' is an alias of 'ME')
+- int N: every N bars
+- list-like of dates: custom events (first bar on or after each event)
+
+Functions:
+----------
+- get_rebalance_indices: Rebalance indices for a date index and a calendar
+- calendar_cache_key: Hashable representation of a calendar (for caching)
+- describe_calendar: Short readable label of a calendar
+
+Author: Portfolio Optimization Team
+Version: 1.0.0
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Hashable
+
+
+DEFAULT_CALENDAR = 'W-SUN'
+
+# Giorni della settimana nel formato pandas (lunedì = 0)
+_WEEKDAYS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
+
+
+def get_rebalance_indices(dates: pd.DatetimeIndex, calendar: Any = DEFAULT_CALENDAR,
+                          start_idx: int = 0) -> np.ndarray:
+    """
+    Calcola gli indici dei giorni di ribilanciamento secondo il calendario richiesto.
+
+    Parameters:
+    -----------
+    dates : pd.DatetimeIndex
+        Indice delle date della matrice dei rendimenti
+    calendar : Any, default 'W-SUN'
+        Calendario di ribilanciamento:
+        - 'D': ogni barra
+        - 'W-MON' ... 'W-SUN': ogni settimana nel giorno indicato
+        - 'MS' / 'ME' (o 'M'): prima / ultima barra di ogni mese
+        - int N: ogni N barre a partire da start_idx
+        - lista di date: eventi personalizzati (prima barra alla data
+          dell'evento o successiva)
+    start_idx : int, default 0
+        Primo indice ammesso (tipicamente il lookback)
+
+    Returns:
+    --------
+    np.ndarray
+        Indici int64 ordinati e senza duplicati, tutti >= start_idx
+
+    Notes:
+    ------
+    Con indice giornaliero continuo 'W-SUN' coincide con il ribilanciamento
+    ogni domenica usato storicamente da backtest_strategy.
+    """
+    dates = pd.DatetimeIndex(dates)
+    n_days = len(dates)
+    start_idx = max(int(start_idx), 0)
+
+    if isinstance(calendar, (int, np.integer)) and not isinstance(calendar, bool):
+        if calendar <= 0:
+            raise ValueError(f"Il passo del calendario deve essere positivo, ricevuto {calendar}")
+        return np.arange(start_idx, n_days, int(calendar), dtype=np.int64)
+
+    if isinstance(calendar, str):
+        mask = _calendar_mask(dates, calendar.upper())
+    else:
+        # Eventi personalizzati: prima barra alla data dell'evento o successiva
+        events = pd.DatetimeIndex(pd.to_datetime(list(calendar)))
+        positions = np.searchsorted(dates.values, events.sort_values().values, side='left')
+        positions = np.unique(positions[positions < n_days])
+        return positions[positions >= start_idx].astype(np.int64)
+
+    indices = np.flatnonzero(mask)
+    return indices[indices >= start_idx].astype(np.int64)
+
+
+def _calendar_mask(dates: pd.DatetimeIndex, calendar: str) -> np.ndarray:
+    """
+    Maschera booleana dei giorni di ribilanciamento per i calendari testuali.
+
+    Parameters:
+    -----------
+    dates : pd.DatetimeIndex
+        Indice delle date
+    calendar : str
+        Calendario in maiuscolo ('D', 'W-XXX', 'MS', 'ME', 'M')
+
+    Returns:
+    --------
+    np.ndarray
+        Maschera booleana lunga quanto dates
+    """
+    if calendar == 'D':
+        return np.ones(len(dates), dtype=bool)
+
+    if calendar.startswith('W-') and calendar[2:] in _WEEKDAYS:
+        return np.asarray(dates.dayofweek) == _WEEKDAYS[calendar[2:]]
+
+    if calendar in ('MS', 'ME', 'M'):
+        months = np.asarray(dates.year) * 12 + np.asarray(dates.month)
+        month_change = months[1:] != months[:-1]
+        if calendar == 'MS':
+            return np.r_[True, month_change] if len(dates) > 0 else np.zeros(0, dtype=bool)
+        return np.r_[month_change, True] if len(dates) > 0 else np.zeros(0, dtype=bool)
+
+    raise ValueError(
+        f"Calendario '{calendar}' non supportato. Usa: 'D', 'W-MON'...'W-SUN', 'MS', 'ME', "
+        f"un intero o una lista di date"
+    )
+
+
+def calendar_cache_key(calendar: Any) -> Hashable:
+    """
+    Restituisce una rappresentazione hashable del calendario, usata nelle chiavi di cache.
+
+    Parameters:
+    -----------
+    calendar : Any
+        Calendario nel formato accettato da get_rebalance_indices
+
+    Returns:
+    --------
+    Hashable
+        Stringa o intero per i calendari standard, tupla di timestamp (ns) per
+        gli eventi personalizzati
+    """
+    if isinstance(calendar, str):
+        return calendar.upper()
+    if isinstance(calendar, (int, np.integer)) and not isinstance(calendar, bool):
+        return int(calendar)
+    events = pd.DatetimeIndex(pd.to_datetime(list(calendar))).sort_values()
+    return ('events',) + tuple(events.asi8.tolist())
+
+
+def describe_calendar(calendar: Any) -> str:
+    """
+    Restituisce un'etichetta leggibile del calendario.
+
+    Parameters:
+    -----------
+    calendar : Any
+        Calendario nel formato accettato da get_rebalance_indices
+
+    Returns:
+    --------
+    str
+        Es. 'W-SUN', 'every_5', 'events(12)'
+    """
+    if isinstance(calendar, str):
+        return calendar.upper()
+    if isinstance(calendar, (int, np.integer)) and not isinstance(calendar, bool):
+        return f"every_{int(calendar)}"
+    return f"events({len(list(calendar))})"
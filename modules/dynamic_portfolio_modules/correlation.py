@@ -0,0 +1,347 @@
+"""
+Correlation Module for Dynamic Portfolio Optimization
+=====================================================
+
+This module contains the strategy collinearity tools of the collinearity
+notebook (notebooks/risk management/collinearita_strategie.ipynb) as reusable
+functions: streaming rolling correlation matrices, hierarchical clustering of
+strategies with a cached linkage, and a deduplication filter that the
+rebalancer applies before computing the weights.
+
+Rolling correlations reuse the incremental window sums of the covariance
+module, so only one N x N matrix is alive at a time (O(N^2) per day of
+window movement, independent of the window length).
+
+Functions:
+----------
+- covariance_to_correlation: Correlation matrix from a covariance matrix
+- iter_rolling_correlations: Streams (day, correlation matrix) pairs
+- calculate_rolling_correlation_stats: Rolling average correlation (overall and per strategy)
+- StrategyClusterer: Hierarchical clustering of strategies with a linkage LRU cache
+- deduplicate_strategies: Keeps the best strategy of each correlation cluster
+
+Author: Portfolio Optimization Team
+Version: 1.0.0
+"""
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from numba import jit
+from typing import Dict, Iterator, Optional, Tuple, Union
+from .covariance import RollingCovariance, _advance_window_sums, _window_covariance
+
+
+# Soglia di correlazione oltre la quale due strategie sono considerate
+# duplicate (come nel notebook di collinearità)
+DEFAULT_CORRELATION_THRESHOLD = 0.8
+
+
+@jit(nopython=True)
+def covariance_to_correlation(cov):
+    """
+    Converte una matrice di covarianza in matrice di correlazione.
+
+    Parameters:
+    -----------
+    cov : np.ndarray
+        Matrice di covarianza [strategie, strategie]
+
+    Returns:
+    --------
+    np.ndarray
+        Matrice di correlazione con diagonale 1; le strategie con varianza
+        nulla hanno correlazione 0 con tutte le altre
+    """
+    n_assets = cov.shape[0]
+    corr = np.zeros((n_assets, n_assets))
+    std = np.empty(n_assets)
+    for i in range(n_assets):
+        std[i] = np.sqrt(cov[i, i]) if cov[i, i] > 0 else 0.0
+    for i in range(n_assets):
+        corr[i, i] = 1.0
+        for j in range(i + 1, n_assets):
+            if std[i] > 0 and std[j] > 0:
+                value = cov[i, j] / (std[i] * std[j])
+                value = min(1.0, max(-1.0, value))
+                corr[i, j] = value
+                corr[j, i] = value
+    return corr
+
+
+def iter_rolling_correlations(returns_matrix: Union[np.ndarray, pd.DataFrame], window: int,
+                              days: Optional[np.ndarray] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Genera le matrici di correlazione mobili una alla volta.
+
+    Parameters:
+    -----------
+    returns_matrix : Union[np.ndarray, pd.DataFrame]
+        Matrice dei rendimenti [giorni, strategie]
+    window : int
+        Lunghezza della finestra in giorni (finestra [day - window, day))
+    days : Optional[np.ndarray], default None
+        Giorni (crescenti) per cui calcolare la correlazione.
+        Se None, tutti i giorni da window a fine serie
+
+    Yields:
+    -------
+    Tuple[int, np.ndarray]
+        (day, matrice di correlazione [strategie, strategie])
+
+    Notes:
+    ------
+    La covarianza della finestra è aggiornata in modo incrementale: la memoria
+    resta O(N^2) anche con migliaia di giorni e centinaia di strategie.
+    """
+    values = np.asarray(returns_matrix, dtype=np.float64)
+    if days is None:
+        days = np.arange(window, len(values) + 1)
+    rolling_cov = RollingCovariance(values, window, shrinkage=0.0)
+    for day in days:
+        yield int(day), covariance_to_correlation(rolling_cov.covariance_at(int(day)))
+
+
+@jit(nopython=True)
+def _rolling_correlation_stats_kernel(returns_matrix, window):
+    """
+    Correlazione media (tra tutte le coppie e per strategia) di ogni finestra,
+    facendo scorrere le somme di un giorno alla volta.
+    """
+    n_days, n_assets = returns_matrix.shape
+    n_windows = max(n_days - window + 1, 0)
+    mean_corr = np.full(n_windows, np.nan)
+    strategy_corr = np.full((n_windows, n_assets), np.nan)
+    sum_vec = np.zeros(n_assets)
+    cross_sum = np.zeros((n_assets, n_assets))
+    start = 0
+    end = 0
+
+    for w in range(n_windows):
+        start, end = _advance_window_sums(returns_matrix, sum_vec, cross_sum, start, end, w, w + window)
+        corr = covariance_to_correlation(_window_covariance(sum_vec, cross_sum, window, 0.0))
+        if n_assets < 2:
+            continue
+        total = 0.0
+        for i in range(n_assets):
+            row_sum = 0.0
+            for j in range(n_assets):
+                if i != j:
+                    row_sum += corr[i, j]
+            strategy_corr[w, i] = row_sum / (n_assets - 1)
+            total += row_sum
+        mean_corr[w] = total / (n_assets * (n_assets - 1))
+
+    return mean_corr, strategy_corr
+
+
+def calculate_rolling_correlation_stats(returns_df: pd.DataFrame, window: int = 60) -> Dict[str, Union[pd.Series, pd.DataFrame]]:
+    """
+    Calcola la correlazione media mobile tra le strategie senza materializzare
+    le matrici di correlazione di ogni finestra.
+
+    Parameters:
+    -----------
+    returns_df : pd.DataFrame
+        DataFrame dei rendimenti [giorni, strategie]
+    window : int, default 60
+        Lunghezza della finestra in giorni
+
+    Returns:
+    --------
+    Dict[str, Union[pd.Series, pd.DataFrame]]
+        - 'mean_correlation': Series della correlazione media tra tutte le coppie
+        - 'strategy_correlation': DataFrame della correlazione media di ogni
+          strategia con le altre
+        Entrambi indicizzati sull'ultimo giorno della finestra (NaN prima di window)
+    """
+    if window < 2:
+        raise ValueError(f"La finestra deve essere di almeno 2 giorni, ricevuto {window}")
+
+    values = np.ascontiguousarray(returns_df.values, dtype=np.float64)
+    mean_corr, strategy_corr = _rolling_correlation_stats_kernel(values, window)
+
+    n_pad = len(returns_df) - len(mean_corr)
+    mean_corr = np.concatenate([np.full(n_pad, np.nan), mean_corr])
+    strategy_corr = np.vstack([np.full((n_pad, values.shape[1]), np.nan), strategy_corr])
+
+    return {
+        'mean_correlation': pd.Series(mean_corr, index=returns_df.index, name='mean_correlation'),
+        'strategy_correlation': pd.DataFrame(strategy_corr, index=returns_df.index,
+                                             columns=returns_df.columns)
+    }
+
+
+def deduplicate_strategies(labels: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    Mantiene solo la strategia con punteggio più alto di ogni cluster.
+
+    Parameters:
+    -----------
+    labels : np.ndarray
+        Etichetta di cluster di ogni strategia
+    scores : np.ndarray
+        Punteggio di ogni strategia (es. rendimento cumulato nel lookback)
+
+    Returns:
+    --------
+    np.ndarray
+        Maschera booleana delle strategie mantenute (una per cluster; a parità
+        di punteggio vince la prima in ordine di colonna)
+    """
+    labels = np.asarray(labels)
+    scores = np.asarray(scores, dtype=np.float64)
+    # Ordina per cluster e punteggio decrescente (stabile sull'indice di colonna)
+    order = np.lexsort((np.arange(len(labels)), -scores, labels))
+    first_in_cluster = np.r_[True, labels[order][1:] != labels[order][:-1]] if len(labels) > 0 else np.zeros(0, dtype=bool)
+    keep = np.zeros(len(labels), dtype=bool)
+    keep[order[first_in_cluster]] = True
+    return keep
+
+
+class StrategyClusterer:
+    """
+    Clustering gerarchico delle strategie per correlazione, con cache delle linkage.
+
+    La linkage di ogni finestra [start, end) viene calcolata una sola volta e
+    riusata per qualsiasi soglia: configurazioni della grid search con lo
+    stesso lookback e calendario condividono le stesse finestre.
+    """
+
+    def __init__(self, returns_matrix: np.ndarray, method: str = 'complete', cache_size: int = 512):
+        """
+        Parameters:
+        -----------
+        returns_matrix : np.ndarray
+            Matrice dei rendimenti [giorni, strategie]
+        method : str, default 'complete'
+            Metodo di linkage di scipy; con 'complete' ogni coppia all'interno
+            di un cluster ha correlazione >= soglia
+        cache_size : int, default 512
+            Numero massimo di linkage conservate (LRU)
+        """
+        self.returns_matrix = np.ascontiguousarray(returns_matrix, dtype=np.float64)
+        self.method = method
+        self.cache_size = cache_size
+        self._linkage_cache = OrderedDict()
+        self._rolling_covariances: Dict[int, RollingCovariance] = {}
+
+    def correlation(self, start: int, end: int) -> np.ndarray:
+        """
+        Matrice di correlazione della finestra [start, end).
+
+        Parameters:
+        -----------
+        start : int
+            Primo giorno della finestra
+        end : int
+            Giorno successivo all'ultimo della finestra
+
+        Returns:
+        --------
+        np.ndarray
+            Matrice di correlazione [strategie, strategie]
+        """
+        window = end - start
+        rolling_cov = self._rolling_covariances.get(window)
+        if rolling_cov is None:
+            rolling_cov = RollingCovariance(self.returns_matrix, window, shrinkage=0.0)
+            self._rolling_covariances[window] = rolling_cov
+        return covariance_to_correlation(rolling_cov.covariance_at(end))
+
+    def linkage(self, start: int, end: int) -> np.ndarray:
+        """
+        Linkage (scipy) delle strategie sulla distanza 1 - correlazione della
+        finestra [start, end), dalla cache se già calcolata.
+
+        Parameters:
+        -----------
+        start : int
+            Primo giorno della finestra
+        end : int
+            Giorno successivo all'ultimo della finestra
+
+        Returns:
+        --------
+        np.ndarray
+            Matrice di linkage [strategie - 1, 4]
+        """
+        from scipy.cluster.hierarchy import linkage
+        from scipy.spatial.distance import squareform
+
+        key = (int(start), int(end))
+        link = self._linkage_cache.get(key)
+        if link is not None:
+            self._linkage_cache.move_to_end(key)
+            return link
+
+        distance = 1.0 - self.correlation(start, end)
+        np.fill_diagonal(distance, 0.0)
+        link = linkage(squareform(distance, checks=False), method=self.method)
+
+        self._linkage_cache[key] = link
+        while len(self._linkage_cache) > self.cache_size:
+            self._linkage_cache.popitem(last=False)
+        return link
+
+    def cluster_labels(self, start: int, end: int,
+                       threshold: float = DEFAULT_CORRELATION_THRESHOLD) -> np.ndarray:
+        """
+        Etichette di cluster delle strategie nella finestra [start, end).
+
+        Parameters:
+        -----------
+        start : int
+            Primo giorno della finestra
+        end : int
+            Giorno successivo all'ultimo della finestra
+        threshold : float, default 0.8
+            Correlazione minima per unire due strategie nello stesso cluster
+
+        Returns:
+        --------
+        np.ndarray
+            Etichetta di cluster (da 1) di ogni strategia
+        """
+        from scipy.cluster.hierarchy import fcluster
+
+        n_assets = self.returns_matrix.shape[1]
+        if n_assets < 2:
+            return np.ones(n_assets, dtype=np.int64)
+        return fcluster(self.linkage(start, end), t=1.0 - threshold, criterion='distance')
+
+    def dedup_masks(self, rebalance_idx: np.ndarray, lookback: int, scores: np.ndarray,
+                    threshold: float = DEFAULT_CORRELATION_THRESHOLD) -> np.ndarray:
+        """
+        Maschere delle strategie mantenute dopo la deduplicazione per ogni
+        data di ribilanciamento.
+
+        Parameters:
+        -----------
+        rebalance_idx : np.ndarray
+            Indici (crescenti) dei giorni di ribilanciamento
+        lookback : int
+            Periodo di lookback in giorni (finestra [idx - lookback, idx))
+        scores : np.ndarray
+            Punteggi [ribilanciamenti, strategie] usati per scegliere la
+            strategia da mantenere in ogni cluster
+        threshold : float, default 0.8
+            Correlazione minima per considerare due strategie duplicate
+
+        Returns:
+        --------
+        np.ndarray
+            Maschera booleana [ribilanciamenti, strategie]; prima del lookback
+            tutte le strategie sono mantenute
+        """
+        if not -1.0 <= threshold <= 1.0:
+            raise ValueError(f"La soglia di correlazione deve essere tra -1 e 1, ricevuto {threshold}")
+
+        n_assets = self.returns_matrix.shape[1]
+        masks = np.ones((len(rebalance_idx), n_assets), dtype=bool)
+        for k, day in enumerate(rebalance_idx):
+            if day < lookback:
+                continue
+            labels = self.cluster_labels(int(day) - lookback, int(day), threshold)
+            masks[k] = deduplicate_strategies(labels, scores[k])
+        return masks
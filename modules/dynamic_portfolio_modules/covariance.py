@@ -0,0 +1,575 @@
+"""
+Covariance Module for Dynamic Portfolio Optimization
+====================================================
+
+This module contains an incremental rolling covariance estimator and the
+covariance-aware allocation methods built on it (minimum variance, equal risk
+contribution and hierarchical risk parity).
+
+The window sums (sum of returns and sum of cross products) are updated by
+adding the rows entering the window and removing the rows leaving it, so
+moving the window by one day costs O(N^2) instead of recomputing the
+covariance from the whole lookback window at every rebalance.
+
+Functions:
+----------
+- RollingCovariance: Incremental rolling covariance over a returns matrix
+- calculate_min_variance_weights: Long-only minimum variance weights (active set)
+- calculate_erc_weights: Equal risk contribution weights (cyclical coordinate descent)
+- calculate_hrp_weights: Hierarchical risk parity weights
+- calculate_covariance_weights_batch: Weights of a covariance method for all rebalance dates
+
+Author: Portfolio Optimization Team
+Version: 1.0.0
+"""
+
+import numpy as np
+from numba import jit
+from .utils import calculate_prefix_statistics, _window_cum_returns
+
+
+# Metodi di allocazione basati sulla covarianza
+COVARIANCE_METHODS = ('min_variance', 'erc', 'hrp')
+
+# Intensità dello shrinkage verso la diagonale (le finestre brevi con molte
+# strategie danno covarianze singolari)
+DEFAULT_SHRINKAGE = 0.1
+
+_MIN_VARIANCE = 0
+_ERC = 1
+
+
+@jit(nopython=True)
+def _advance_window_sums(returns_matrix, sum_vec, cross_sum, old_start, old_end, new_start, new_end):
+    """
+    Sposta la finestra [old_start, old_end) su [new_start, new_end) aggiornando
+    sul posto la somma dei rendimenti e la somma dei prodotti incrociati
+    (solo triangolo superiore). Ogni riga aggiunta o rimossa costa O(N^2).
+
+    Returns:
+    --------
+    tuple
+        (new_start, new_end)
+    """
+    n_assets = returns_matrix.shape[1]
+
+    # Finestra non sovrapposta o all'indietro: ricalcola da zero
+    if new_start < old_start or new_start >= old_end or new_end < old_end:
+        sum_vec[:] = 0.0
+        cross_sum[:, :] = 0.0
+        old_start = new_start
+        old_end = new_start
+
+    # Rimuove le righe uscite dalla finestra
+    for t in range(old_start, new_start):
+        for i in range(n_assets):
+            r_i = returns_matrix[t, i]
+            sum_vec[i] -= r_i
+            for j in range(i, n_assets):
+                cross_sum[i, j] -= r_i * returns_matrix[t, j]
+
+    # Aggiunge le righe entrate nella finestra
+    for t in range(old_end, new_end):
+        for i in range(n_assets):
+            r_i = returns_matrix[t, i]
+            sum_vec[i] += r_i
+            for j in range(i, n_assets):
+                cross_sum[i, j] += r_i * returns_matrix[t, j]
+
+    return new_start, new_end
+
+
+@jit(nopython=True)
+def _window_covariance(sum_vec, cross_sum, n_obs, shrinkage):
+    """
+    Covarianza (popolazione) della finestra dalle somme, con shrinkage verso la diagonale.
+    """
+    n_assets = len(sum_vec)
+    cov = np.empty((n_assets, n_assets))
+    means = sum_vec / n_obs
+    for i in range(n_assets):
+        for j in range(i, n_assets):
+            value = cross_sum[i, j] / n_obs - means[i] * means[j]
+            if i != j:
+                value *= 1.0 - shrinkage
+            elif value < 0:
+                # Gli errori di arrotondamento possono rendere la varianza leggermente negativa
+                value = 0.0
+            cov[i, j] = value
+            cov[j, i] = value
+    return cov
+
+
+@jit(nopython=True)
+def _candidate_assets(cov, mask):
+    """
+    Indici delle strategie ammesse dalla maschera e con varianza positiva.
+    """
+    n_assets = len(mask)
+    count = 0
+    for i in range(n_assets):
+        if mask[i] and cov[i, i] > 0:
+            count += 1
+    idx = np.empty(count, dtype=np.int64)
+    count = 0
+    for i in range(n_assets):
+        if mask[i] and cov[i, i] > 0:
+            idx[count] = i
+            count += 1
+    return idx
+
+
+@jit(nopython=True)
+def calculate_min_variance_weights(cov, mask):
+    """
+    Calcola i pesi long-only a varianza minima con un metodo active set.
+
+    Parameters:
+    -----------
+    cov : np.ndarray
+        Matrice di covarianza [strategie, strategie]
+    mask : np.ndarray
+        Maschera booleana delle strategie ammesse (es. solo quelle in profitto)
+
+    Returns:
+    --------
+    np.ndarray
+        Array dei pesi che somma a 1, o zeri se nessuna strategia è ammessa
+
+    Notes:
+    ------
+    - Risolve min w'Σw con sum(w) = 1 e w >= 0
+    - Ad ogni passo risolve il sistema Σ_A x = 1 sull'insieme attivo A,
+      rimuove la strategia con peso più negativo oppure, se i pesi sono tutti
+      non negativi, reinserisce la strategia esclusa che viola di più le
+      condizioni KKT ((Σw)_j < w'Σw)
+    - Le strategie con varianza nulla vengono escluse
+    """
+    n_assets = len(mask)
+    weights = np.zeros(n_assets)
+    candidates = _candidate_assets(cov, mask)
+    n_candidates = len(candidates)
+    if n_candidates == 0:
+        return weights
+
+    # Piccola regolarizzazione per matrici quasi singolari
+    mean_var = 0.0
+    for i in candidates:
+        mean_var += cov[i, i]
+    ridge = 1e-10 * mean_var / n_candidates
+
+    active = np.ones(n_candidates, dtype=np.bool_)
+    best = np.zeros(n_assets)
+    for k in range(n_candidates):
+        best[candidates[k]] = 1.0 / n_candidates
+
+    for _ in range(4 * n_candidates + 10):
+        n_active = 0
+        for k in range(n_candidates):
+            if active[k]:
+                n_active += 1
+        if n_active == 0:
+            break
+        idx = np.empty(n_active, dtype=np.int64)
+        pos = np.empty(n_active, dtype=np.int64)
+        n_active = 0
+        for k in range(n_candidates):
+            if active[k]:
+                idx[n_active] = candidates[k]
+                pos[n_active] = k
+                n_active += 1
+
+        sub = np.empty((n_active, n_active))
+        for a in range(n_active):
+            for b in range(n_active):
+                sub[a, b] = cov[idx[a], idx[b]]
+            sub[a, a] += ridge
+        x = np.linalg.solve(sub, np.ones(n_active))
+        total = np.sum(x)
+        if total <= 0:
+            break
+        x = x / total
+
+        # Rimuove la strategia con il peso più negativo
+        worst = np.argmin(x)
+        if x[worst] < 0:
+            active[pos[worst]] = False
+            continue
+
+        weights[:] = 0.0
+        for a in range(n_active):
+            weights[idx[a]] = x[a]
+        best[:] = weights
+
+        # Condizioni KKT sulle strategie escluse
+        gradient = cov @ weights
+        portfolio_var = np.dot(weights, gradient)
+        violation = 0.0
+        entering = -1
+        for k in range(n_candidates):
+            if not active[k]:
+                gap = portfolio_var - gradient[candidates[k]]
+                if gap > violation + 1e-12 * portfolio_var:
+                    violation = gap
+                    entering = k
+        if entering < 0:
+            return weights
+        active[entering] = True
+
+    return best
+
+
+@jit(nopython=True)
+def calculate_erc_weights(cov, mask, max_iter=500, tol=1e-8):
+    """
+    Calcola i pesi a uguale contributo al rischio (equal risk contribution).
+
+    Parameters:
+    -----------
+    cov : np.ndarray
+        Matrice di covarianza [strategie, strategie]
+    mask : np.ndarray
+        Maschera booleana delle strategie ammesse (es. solo quelle in profitto)
+    max_iter : int, default 500
+        Numero massimo di passate di coordinate descent
+    tol : float, default 1e-8
+        Tolleranza sulla variazione relativa massima di una coordinata
+
+    Returns:
+    --------
+    np.ndarray
+        Array dei pesi che somma a 1, o zeri se nessuna strategia è ammessa
+
+    Notes:
+    ------
+    - Coordinate descent ciclico su min 0.5 x'Σx - b'log(x) con budget
+      b_i = 1/m: ogni coordinata ha soluzione in forma chiusa e il prodotto
+      Σx viene aggiornato in O(m) ad ogni passo
+    - I pesi sono x normalizzato a somma 1
+    - Le strategie con varianza nulla vengono escluse
+    """
+    n_assets = len(mask)
+    weights = np.zeros(n_assets)
+    idx = _candidate_assets(cov, mask)
+    m = len(idx)
+    if m == 0:
+        return weights
+
+    budget = 1.0 / m
+    x = np.empty(m)
+    for a in range(m):
+        x[a] = 1.0 / np.sqrt(cov[idx[a], idx[a]])
+    x = x / np.sum(x)
+
+    # Σx ristretto alle strategie candidate
+    sigma_x = np.zeros(m)
+    for a in range(m):
+        for b in range(m):
+            sigma_x[a] += cov[idx[a], idx[b]] * x[b]
+
+    for _ in range(max_iter):
+        max_change = 0.0
+        for a in range(m):
+            var_a = cov[idx[a], idx[a]]
+            c = sigma_x[a] - var_a * x[a]
+            new_value = (-c + np.sqrt(c * c + 4.0 * var_a * budget)) / (2.0 * var_a)
+            delta = new_value - x[a]
+            if delta != 0.0:
+                for b in range(m):
+                    sigma_x[b] += cov[idx[b], idx[a]] * delta
+                x[a] = new_value
+                change = abs(delta) / new_value
+                if change > max_change:
+                    max_change = change
+        if max_change < tol:
+            break
+
+    total = np.sum(x)
+    for a in range(m):
+        weights[idx[a]] = x[a] / total
+    return weights
+
+
+@jit(nopython=True)
+def _hrp_recursive_bisection(cov, order):
+    """
+    Bisezione ricorsiva (con uno stack) dell'ordinamento quasi-diagonale:
+    ogni cluster divide il peso tra le due metà in proporzione inversa
+    alla loro varianza (pesi inverse-variance all'interno della metà).
+    """
+    n = len(order)
+    weights = np.ones(n)
+    stack_start = np.empty(n, dtype=np.int64)
+    stack_end = np.empty(n, dtype=np.int64)
+    stack_start[0] = 0
+    stack_end[0] = n
+    top = 1
+
+    while top > 0:
+        top -= 1
+        start = stack_start[top]
+        end = stack_end[top]
+        if end - start < 2:
+            continue
+        mid = start + (end - start) // 2
+
+        variances = np.empty(2)
+        for half in range(2):
+            a0 = start if half == 0 else mid
+            a1 = mid if half == 0 else end
+            inv_var = np.empty(a1 - a0)
+            for a in range(a0, a1):
+                inv_var[a - a0] = 1.0 / cov[order[a], order[a]]
+            inv_var = inv_var / np.sum(inv_var)
+            cluster_var = 0.0
+            for a in range(a0, a1):
+                for b in range(a0, a1):
+                    cluster_var += inv_var[a - a0] * cov[order[a], order[b]] * inv_var[b - a0]
+            variances[half] = cluster_var
+
+        alpha = 1.0 - variances[0] / (variances[0] + variances[1])
+        for a in range(start, mid):
+            weights[a] *= alpha
+        for a in range(mid, end):
+            weights[a] *= 1.0 - alpha
+
+        stack_start[top] = start
+        stack_end[top] = mid
+        top += 1
+        stack_start[top] = mid
+        stack_end[top] = end
+        top += 1
+
+    return weights
+
+
+def calculate_hrp_weights(cov: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+    """
+    Calcola i pesi hierarchical risk parity (López de Prado).
+
+    Parameters:
+    -----------
+    cov : np.ndarray
+        Matrice di covarianza [strategie, strategie]
+    mask : np.ndarray, default None
+        Maschera booleana delle strategie ammesse (None = tutte)
+
+    Returns:
+    --------
+    np.ndarray
+        Array dei pesi che somma a 1, o zeri se nessuna strategia è ammessa
+
+    Notes:
+    ------
+    - Distanza d_ij = sqrt((1 - ρ_ij) / 2) e clustering gerarchico single linkage
+    - Ordinamento quasi-diagonale dalle foglie del dendrogramma
+    - Bisezione ricorsiva compilata con numba
+    - Le strategie con varianza nulla vengono escluse
+    """
+    from scipy.cluster.hierarchy import linkage, leaves_list
+    from scipy.spatial.distance import squareform
+
+    cov = np.ascontiguousarray(cov, dtype=np.float64)
+    n_assets = cov.shape[0]
+    if mask is None:
+        mask = np.ones(n_assets, dtype=bool)
+    weights = np.zeros(n_assets)
+    idx = _candidate_assets(cov, np.asarray(mask, dtype=np.bool_))
+    if len(idx) == 0:
+        return weights
+    if len(idx) == 1:
+        weights[idx[0]] = 1.0
+        return weights
+
+    sub_cov = cov[np.ix_(idx, idx)]
+    std = np.sqrt(np.diag(sub_cov))
+    corr = np.clip(sub_cov / np.outer(std, std), -1.0, 1.0)
+    distance = np.sqrt(np.clip(0.5 * (1.0 - corr), 0.0, None))
+    np.fill_diagonal(distance, 0.0)
+
+    link = linkage(squareform(distance, checks=False), method='single')
+    order = leaves_list(link).astype(np.int64)
+
+    cluster_weights = _hrp_recursive_bisection(sub_cov, order)
+    weights[idx[order]] = cluster_weights
+    return weights
+
+
+@jit(nopython=True)
+def _profitable_mask_from_prefix(prefix_stats, rebalance_idx, lookback):
+    """
+    Maschera [ribilanciamenti, strategie] delle strategie con rendimento
+    cumulato positivo nella finestra [idx - lookback, idx).
+    """
+    log_prefix, ruin_prefix, sum_prefix, sq_prefix = prefix_stats
+    n_assets = log_prefix.shape[1]
+    mask = np.zeros((len(rebalance_idx), n_assets), dtype=np.bool_)
+    for k in range(len(rebalance_idx)):
+        day = rebalance_idx[k]
+        if day < lookback:
+            continue
+        cum_returns = _window_cum_returns(log_prefix, ruin_prefix, day - lookback, day)
+        for i in range(n_assets):
+            mask[k, i] = cum_returns[i] > 0
+    return mask
+
+
+@jit(nopython=True)
+def _covariance_weights_kernel(returns_matrix, rebalance_idx, lookback, profitable_mask,
+                               method_code, shrinkage):
+    """
+    Pesi a varianza minima o ERC per tutte le date di ribilanciamento,
+    facendo scorrere le somme della finestra da un ribilanciamento al successivo.
+    """
+    n_assets = returns_matrix.shape[1]
+    weights = np.empty((len(rebalance_idx), n_assets))
+    sum_vec = np.zeros(n_assets)
+    cross_sum = np.zeros((n_assets, n_assets))
+    start = 0
+    end = 0
+
+    for k in range(len(rebalance_idx)):
+        day = rebalance_idx[k]
+        if day < lookback:
+            weights[k] = 1.0 / n_assets
+            continue
+        start, end = _advance_window_sums(returns_matrix, sum_vec, cross_sum,
+                                          start, end, day - lookback, day)
+        cov = _window_covariance(sum_vec, cross_sum, lookback, shrinkage)
+        if method_code == _MIN_VARIANCE:
+            weights[k] = calculate_min_variance_weights(cov, profitable_mask[k])
+        else:
+            weights[k] = calculate_erc_weights(cov, profitable_mask[k])
+
+    return weights
+
+
+class RollingCovariance:
+    """
+    Covarianza mobile incrementale su una matrice dei rendimenti.
+
+    Le somme della finestra vengono aggiornate aggiungendo le righe entrate e
+    rimuovendo quelle uscite: interrogare finestre crescenti costa O(N^2) per
+    giorno di spostamento (la finestra viene ricalcolata da zero solo se si
+    torna indietro o non c'è sovrapposizione).
+    """
+
+    def __init__(self, returns_matrix: np.ndarray, lookback: int,
+                 shrinkage: float = DEFAULT_SHRINKAGE):
+        """
+        Parameters:
+        -----------
+        returns_matrix : np.ndarray
+            Matrice dei rendimenti [giorni, strategie]
+        lookback : int
+            Lunghezza della finestra in giorni (finestra [day - lookback, day))
+        shrinkage : float, default 0.1
+            Intensità dello shrinkage delle covarianze verso la diagonale (0 = nessuno)
+        """
+        if lookback <= 0:
+            raise ValueError(f"Il lookback deve essere positivo, ricevuto {lookback}")
+        if not 0.0 <= shrinkage <= 1.0:
+            raise ValueError(f"Lo shrinkage deve essere tra 0 e 1, ricevuto {shrinkage}")
+
+        self.returns_matrix = np.ascontiguousarray(returns_matrix, dtype=np.float64)
+        self.lookback = int(lookback)
+        self.shrinkage = float(shrinkage)
+
+        n_assets = self.returns_matrix.shape[1]
+        self._sum_vec = np.zeros(n_assets)
+        self._cross_sum = np.zeros((n_assets, n_assets))
+        self._start = 0
+        self._end = 0
+
+    def covariance_at(self, day: int) -> np.ndarray:
+        """
+        Covarianza (popolazione, con shrinkage) della finestra che termina prima di day.
+
+        Parameters:
+        -----------
+        day : int
+            Indice del giorno (la finestra è [day - lookback, day))
+
+        Returns:
+        --------
+        np.ndarray
+            Matrice di covarianza [strategie, strategie]
+        """
+        if day < self.lookback or day > len(self.returns_matrix):
+            raise ValueError(
+                f"Giorno {day} fuori intervallo per lookback {self.lookback} "
+                f"e {len(self.returns_matrix)} giorni"
+            )
+        self._start, self._end = _advance_window_sums(
+            self.returns_matrix, self._sum_vec, self._cross_sum,
+            self._start, self._end, day - self.lookback, day
+        )
+        return _window_covariance(self._sum_vec, self._cross_sum, self.lookback, self.shrinkage)
+
+
+def calculate_covariance_weights_batch(returns_matrix: np.ndarray, rebalance_idx: np.ndarray,
+                                       lookback: int, method: str, prefix_stats: tuple = None,
+                                       shrinkage: float = DEFAULT_SHRINKAGE,
+                                       eligible: np.ndarray = None) -> np.ndarray:
+    """
+    Calcola i pesi di un metodo basato sulla covarianza per tutte le date di ribilanciamento.
+
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice dei rendimenti [giorni, strategie]
+    rebalance_idx : np.ndarray
+        Indici (int64, ordinati in modo crescente) dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    method : str
+        'min_variance', 'erc' o 'hrp'
+    prefix_stats : tuple, default None
+        Risultato di calculate_prefix_statistics (calcolato se None)
+    shrinkage : float, default 0.1
+        Intensità dello shrinkage delle covarianze verso la diagonale
+    eligible : np.ndarray, default None
+        Maschera booleana [ribilanciamenti, strategie] delle strategie ammesse
+        (es. dopo la deduplicazione per correlazione); None = tutte
+
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+
+    Notes:
+    ------
+    - Come gli altri metodi considera solo le strategie con rendimento
+      cumulato positivo nel lookback; se nessuna è in profitto non investe
+    - Prima del lookback i pesi sono uguali
+    - La covarianza è aggiornata in modo incrementale tra un ribilanciamento
+      e il successivo (vedi RollingCovariance)
+    """
+    if method not in COVARIANCE_METHODS:
+        raise ValueError(f"Metodo '{method}' non supportato. Usa: {', '.join(COVARIANCE_METHODS)}")
+
+    returns_matrix = np.ascontiguousarray(returns_matrix, dtype=np.float64)
+    rebalance_idx = np.asarray(rebalance_idx, dtype=np.int64)
+    if prefix_stats is None:
+        prefix_stats = calculate_prefix_statistics(returns_matrix)
+    profitable_mask = _profitable_mask_from_prefix(prefix_stats, rebalance_idx, lookback)
+    if eligible is not None:
+        profitable_mask &= np.asarray(eligible, dtype=np.bool_)
+
+    if method == 'min_variance':
+        return _covariance_weights_kernel(returns_matrix, rebalance_idx, lookback,
+                                          profitable_mask, _MIN_VARIANCE, shrinkage)
+    if method == 'erc':
+        return _covariance_weights_kernel(returns_matrix, rebalance_idx, lookback,
+                                          profitable_mask, _ERC, shrinkage)
+
+    # HRP: la linkage di scipy non è compilabile, la covarianza resta incrementale
+    n_assets = returns_matrix.shape[1]
+    weights = np.empty((len(rebalance_idx), n_assets))
+    rolling_cov = RollingCovariance(returns_matrix, lookback, shrinkage)
+    for k, day in enumerate(rebalance_idx):
+        if day < lookback:
+            weights[k] = 1.0 / n_assets
+            continue
+        weights[k] = calculate_hrp_weights(rolling_cov.covariance_at(int(day)), profitable_mask[k])
+    return weights
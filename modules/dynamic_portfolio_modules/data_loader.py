@@ -8,20 +8,39 @@ from CSV files, with proper error handling and data validation.
 Functions:
 ----------
 - load_trading_data: Main function to load all trading strategy data
+- trades_to_returns_matrix: In-memory bridge from backtester trade ledgers
+  to the same balance/returns DataFrames (no CSV round-trip)
 - _process_csv_file: Helper function to process individual CSV files
 - _combine_dataframes: Helper function to combine multiple strategy DataFrames
+- _read_cache / _write_cache: Parquet cache of the combined data with a manifest
+  of the source files (size, mtime, hash) for incremental reloads
 
 Author: Portfolio Optimization Team
 Version: 1.0.0
 """
 
+import io
 import os
+import json
+import uuid
+import hashlib
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple, Optional, Any, Union
 
 
-def load_trading_data(data_path: str = "/home/edocame/Desktop/bollingerBands/DATA") -> Tuple[Dict, pd.DataFrame, pd.DataFrame]:
+# Cartella di cache di default (creata dentro data_path) e versione del formato
+CACHE_DIR_NAME = '.portfolio_cache'
+CACHE_MANIFEST = 'manifest.json'
+CACHE_VERSION = 1
+
+
+def load_trading_data(data_path: str = "/home/edocame/Desktop/bollingerBands/DATA",
+                      n_workers: Optional[int] = None,
+                      date_format: Optional[str] = None,
+                      use_cache: bool = True,
+                      cache_dir: Optional[str] = None) -> Tuple[Dict, pd.DataFrame, pd.DataFrame]:
     """
     Carica tutti i file CSV di trading dalla cartella specificata e li combina
     in un dataset coerente per l'analisi di portfolio.
@@ -30,6 +49,16 @@ def load_trading_data(data_path: str = "/home/edocame/Desktop/bollingerBands/DAT
     -----------
     data_path : str, default "/workspaces/bollingerBands/DATA"
         Percorso della cartella contenente i file CSV delle strategie
+    n_workers : Optional[int], default None
+        Numero di thread per la lettura parallela dei file (None = default di
+        ThreadPoolExecutor, 1 = lettura sequenziale)
+    date_format : Optional[str], default None
+        Formato delle date nei file (es. '%Y.%m.%d %H:%M'). Se None viene
+        dedotto dalla prima riga di ogni file
+    use_cache : bool, default True
+        Se True salva/riusa una cache parquet dei DataFrame combinati
+    cache_dir : Optional[str], default None
+        Cartella della cache (None = data_path/.portfolio_cache)
     
     Returns:
     --------
@@ -41,9 +70,16 @@ def load_trading_data(data_path: str = "/home/edocame/Desktop/bollingerBands/DAT
     Notes:
     ------
     - I file devono essere in formato CSV con encoding UTF-16
+    - I file vengono letti in parallelo con un pool di thread (I/O e parsing
+      di read_csv rilasciano il GIL); l'ordine delle strategie resta quello
+      di os.listdir
     - La prima colonna deve contenere le date, la seconda i bilanci
     - I dati vengono resampleati a frequenza giornaliera
     - Gli outlier nei rendimenti (>50% o <-50%) vengono sostituiti con 0
+    - Con la cache attiva, se nessun file è cambiato i DataFrame vengono letti
+      direttamente dai parquet; altrimenti vengono riletti solo i file nuovi o
+      modificati (dimensione/mtime diversi e hash diverso) e uniti alle colonne
+      in cache, con lo stesso risultato di un caricamento completo
     """
     # Trova tutti i file CSV nella cartella
     files = [f for f in os.listdir(data_path) if f.lower().endswith('.csv')]
@@ -57,9 +93,61 @@ def load_trading_data(data_path: str = "/home/edocame/Desktop/bollingerBands/DAT
     
     print(f"Trovati {len(files)} file CSV da processare...")
     
+    # Verifica quali file possono essere riusati dalla cache
+    cache_dir = cache_dir or os.path.join(data_path, CACHE_DIR_NAME)
+    signatures = {file: _file_signature(os.path.join(data_path, file)) for file in files}
+    cache = _read_cache(cache_dir, date_format) if use_cache else None
+    reusable = _find_reusable_files(cache, signatures, data_path) if cache else {}
+    
+    # Caso "warm": stessi file, nessuna modifica -> lettura diretta dei parquet
+    if cache and len(reusable) == len(files) and list(cache['manifest']['files']) == files:
+        strategy_names = [entry['strategy'] for entry in reusable.values() if entry['strategy']]
+        combined_df = cache['combined'][strategy_names]
+        returns_df = cache['returns'][strategy_names]
+        if reusable != cache['manifest']['files']:
+            # Solo mtime aggiornati (contenuto identico): aggiorna il manifest
+            try:
+                _write_cache(cache_dir, reusable, combined_df, returns_df, date_format)
+            except Exception as e:
+                print(f"⚠️ Impossibile aggiornare la cache in {cache_dir}: {e}")
+        print(f"♻️ Cache valida: {len(files)} file invariati, nessun file riletto")
+        strategies = _create_strategy_dict(combined_df, returns_df, strategy_names)
+        _print_load_summary(combined_df, returns_df)
+        return strategies, combined_df, returns_df
+    
+    to_parse = [file for file in files if file not in reusable]
+    if reusable:
+        print(f"♻️ Cache: {len(reusable)} file invariati, {len(to_parse)} da rileggere")
+    
+    # Lettura concorrente: map mantiene l'ordine dei file
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        parsed = dict(zip(to_parse, executor.map(
+            lambda file: _process_csv_file(os.path.join(data_path, file), file, date_format),
+            to_parse
+        )))
+    
+    manifest_files: Dict[str, Dict[str, Any]] = {}
     for file in files:
         try:
-            processed_df, strategy_name = _process_csv_file(os.path.join(data_path, file), file)
+            if file in reusable:
+                # Colonna giornaliera dalla cache, limitata al periodo coperto dal file
+                entry = reusable[file]
+                manifest_files[file] = entry
+                if entry['strategy']:
+                    dfs[entry['strategy']] = cache['combined'].loc[
+                        entry['first_day']:entry['last_day'], [entry['strategy']]
+                    ].rename(columns={entry['strategy']: 'BALANCE'})
+                    strategy_names.append(entry['strategy'])
+                continue
+            
+            processed_df, strategy_name = parsed[file]
+            manifest_files[file] = {
+                **signatures[file],
+                'sha256': _file_sha256(os.path.join(data_path, file)),
+                'strategy': strategy_name,
+                'first_day': str(processed_df.index[0].normalize()) if processed_df is not None else None,
+                'last_day': str(processed_df.index[-1].normalize()) if processed_df is not None else None
+            }
             if processed_df is not None:
                 dfs[strategy_name] = processed_df
                 strategy_names.append(strategy_name)
@@ -83,15 +171,396 @@ def load_trading_data(data_path: str = "/home/edocame/Desktop/bollingerBands/DAT
     # Crea dizionario finale delle strategie
     strategies = _create_strategy_dict(combined_df, returns_df, strategy_names)
     
+    # Aggiorna la cache (un errore di scrittura non blocca il caricamento)
+    if use_cache:
+        try:
+            _write_cache(cache_dir, manifest_files, combined_df, returns_df, date_format)
+        except Exception as e:
+            print(f"⚠️ Impossibile aggiornare la cache in {cache_dir}: {e}")
+    
+    _print_load_summary(combined_df, returns_df)
+    
+    return strategies, combined_df, returns_df
+
+
+def trades_to_returns_matrix(ledgers: Union[Dict[str, Any], list],
+                             pip_value: Union[float, Dict[str, float]] = 1.0,
+                             initial_balance: float = 10000,
+                             dates: Optional[pd.DatetimeIndex] = None,
+                             pnl_column: str = 'PnL',
+                             entry_column: str = 'Entry_Time',
+                             exit_column: str = 'Exit_Time') -> Tuple[Dict, pd.DataFrame, pd.DataFrame]:
+    """
+    Converte i trade di più backtest in bilanci e rendimenti giornalieri,
+    nello stesso formato di load_trading_data (senza passare dai CSV).
+    
+    Parameters:
+    -----------
+    ledgers : Union[Dict[str, Any], list]
+        Trade di ogni strategia: DataFrame (es. Backtest.get_trades_dataframe)
+        o oggetti Backtest già eseguiti. Dizionario nome -> ledger, oppure
+        lista (nomi STRATEGY_0, STRATEGY_1, ...)
+    pip_value : Union[float, Dict[str, float]], default 1.0
+        Valore monetario di un pip per la size di ogni strategia: unico, o
+        dizionario nome -> valore con tutte le strategie di ledgers
+    initial_balance : float, default 10000
+        Bilancio iniziale di ogni strategia
+    dates : Optional[pd.DatetimeIndex], default None
+        Date giornaliere su cui allineare i bilanci (es. l'indice di un
+        returns_df esistente). Se None usa tutti i giorni dal primo ingresso
+        all'ultima uscita
+    pnl_column : str, default 'PnL'
+        Colonna del PnL in pips nei DataFrame
+    entry_column : str, default 'Entry_Time'
+        Colonna dell'orario di ingresso nei DataFrame
+    exit_column : str, default 'Exit_Time'
+        Colonna dell'orario di uscita nei DataFrame
+    
+    Returns:
+    --------
+    Tuple[Dict, pd.DataFrame, pd.DataFrame]
+        - strategies: Dizionario con i dati individuali di ogni strategia
+        - combined_df: DataFrame combinato con i bilanci di tutte le strategie
+        - returns_df: DataFrame con i rendimenti giornalieri di tutte le strategie
+        
+    Notes:
+    ------
+    - Come nei report di bilancio MT5, il PnL è realizzato nel giorno di uscita
+    - Tutti i trade sono concatenati e assegnati alla cella [giorno, strategia]
+      con searchsorted; np.bincount somma il PnL di ogni cella in un solo
+      passaggio e il cumsum sui giorni dà i bilanci
+    - Con dates esplicite i trade chiusi prima della prima data sono inclusi
+      nel bilancio iniziale, quelli chiusi dopo l'ultima data sono ignorati
+    - I giorni sono quelli dell'ora locale: con dates tz-aware gli orari
+      tz-aware sono convertiti nel fuso di dates e quelli naive sono
+      considerati già nel suo fuso; senza fuso in dates ogni orario tz-aware
+      usa il proprio
+    - I rendimenti sono filtrati dagli outlier come in load_trading_data
+    """
+    if isinstance(ledgers, dict):
+        names = [str(name) for name in ledgers.keys()]
+        ledger_list = list(ledgers.values())
+    else:
+        ledger_list = list(ledgers)
+        names = [f"STRATEGY_{i}" for i in range(len(ledger_list))]
+    
+    if not ledger_list:
+        print("Nessun ledger di trade fornito!")
+        return {}, pd.DataFrame(), pd.DataFrame()
+    
+    if isinstance(pip_value, dict):
+        missing = [name for name in names if name not in pip_value]
+        if missing:
+            raise ValueError(f"pip_value mancante per le strategie: {missing}")
+    
+    if dates is not None:
+        dates = pd.DatetimeIndex(dates)
+    tz = dates.tz if dates is not None else None
+    
+    # Estrai PnL (in valuta), orari di ingresso e di uscita di ogni ledger
+    pnl_parts, entry_parts, exit_parts, column_parts = [], [], [], []
+    for j, (name, ledger) in enumerate(zip(names, ledger_list)):
+        pnl, entry_times, exit_times = _ledger_arrays(ledger, pnl_column, entry_column, exit_column)
+        value = pip_value[name] if isinstance(pip_value, dict) else pip_value
+        pnl_parts.append(pnl * float(value))
+        entry_parts.append(_wall_clock_times(entry_times, tz))
+        exit_parts.append(_wall_clock_times(exit_times, tz))
+        column_parts.append(np.full(len(pnl), j, dtype=np.int64))
+    
+    pnl = np.concatenate(pnl_parts)
+    entry_days = pd.DatetimeIndex(np.concatenate(entry_parts)).normalize()
+    exit_days = pd.DatetimeIndex(np.concatenate(exit_parts)).normalize()
+    columns = np.concatenate(column_parts)
+    
+    if dates is None:
+        if len(pnl) == 0:
+            print("Nessun trade nei ledger forniti!")
+            return {}, pd.DataFrame(), pd.DataFrame()
+        dates = pd.date_range(min(entry_days.min(), exit_days.min()), exit_days.max(), freq='D')
+    
+    # Giorno di realizzo di ogni trade: prima data >= giorno di uscita (ora locale)
+    local_days = (dates.tz_localize(None) if tz is not None else dates).normalize()
+    day_pos = np.searchsorted(local_days.values, exit_days.values, side='left')
+    in_range = day_pos < len(dates)
+    if not in_range.all():
+        print(f"⚠️ {int((~in_range).sum())} trade chiusi dopo l'ultima data ignorati")
+    
+    # Somma del PnL per cella [giorno, strategia] in un solo passaggio
+    n_days, n_strategies = len(dates), len(names)
+    daily_pnl = np.bincount(
+        day_pos[in_range] * n_strategies + columns[in_range],
+        weights=pnl[in_range],
+        minlength=n_days * n_strategies
+    ).reshape(n_days, n_strategies)
+    
+    combined_df = pd.DataFrame(initial_balance + np.cumsum(daily_pnl, axis=0),
+                               index=dates, columns=names)
+    
+    # Calcola e filtra i rendimenti come per i file CSV
+    returns_df = _filter_outlier_returns(combined_df.pct_change().fillna(0))
+    strategies = _create_strategy_dict(combined_df, returns_df, names)
+    
+    print(f"✓ Convertiti {len(pnl)} trade di {n_strategies} strategie")
+    _print_load_summary(combined_df, returns_df)
+    
+    return strategies, combined_df, returns_df
+
+
+def _ledger_arrays(ledger: Any, pnl_column: str, entry_column: str,
+                   exit_column: str) -> Tuple[np.ndarray, pd.DatetimeIndex, pd.DatetimeIndex]:
+    """
+    Estrae PnL in pips, orari di ingresso e di uscita da un ledger di trade.
+    
+    Parameters:
+    -----------
+    ledger : Any
+        DataFrame dei trade o oggetto Backtest già eseguito
+    pnl_column : str
+        Colonna del PnL nei DataFrame
+    entry_column : str
+        Colonna dell'orario di ingresso nei DataFrame
+    exit_column : str
+        Colonna dell'orario di uscita nei DataFrame
+    
+    Returns:
+    --------
+    Tuple[np.ndarray, pd.DatetimeIndex, pd.DatetimeIndex]
+        (PnL, orari di ingresso, orari di uscita), con il fuso del ledger
+        
+    Notes:
+    ------
+    Per un Backtest gli indici di ingresso/uscita dei risultati grezzi sono
+    convertiti in orari con un'unica indicizzazione vettoriale di
+    Backtest.datetime_index (stessa logica di get_trades_dataframe, senza il
+    ciclo sui trade); un indice senza orari solleva ValueError.
+    """
+    if isinstance(ledger, pd.DataFrame):
+        if ledger.empty:
+            empty = pd.DatetimeIndex([])
+            return np.array([], dtype=float), empty, empty
+        missing = [c for c in (pnl_column, entry_column, exit_column) if c not in ledger.columns]
+        if missing:
+            raise ValueError(f"Colonne mancanti nel ledger dei trade: {missing}")
+        return (ledger[pnl_column].to_numpy(dtype=float),
+                pd.DatetimeIndex(pd.to_datetime(ledger[entry_column])),
+                pd.DatetimeIndex(pd.to_datetime(ledger[exit_column])))
+    
+    if hasattr(ledger, 'results') and hasattr(ledger, 'data'):
+        results = np.asarray(ledger.results, dtype=float).reshape(-1, 4)
+        time_index = ledger.datetime_index()
+        if time_index is None:
+            raise ValueError("L'indice dei dati del Backtest non contiene orari: "
+                             "impossibile assegnare i trade ai giorni")
+        last = len(ledger.data) - 1
+        entry_idx = np.minimum(results[:, 2].astype(np.int64), last)
+        exit_idx = np.minimum(results[:, 3].astype(np.int64), last)
+        return results[:, 0], time_index[entry_idx], time_index[exit_idx]
+    
+    raise ValueError(f"Ledger non supportato: {type(ledger).__name__} "
+                     "(usa un DataFrame dei trade o un Backtest eseguito)")
+
+
+def _wall_clock_times(times: pd.DatetimeIndex, tz: Any = None) -> np.ndarray:
+    """
+    Orari come datetime64[ns] naive nell'ora locale di tz.
+    
+    Parameters:
+    -----------
+    times : pd.DatetimeIndex
+        Orari naive o tz-aware
+    tz : Any, default None
+        Fuso di destinazione degli orari tz-aware (None = il loro fuso)
+    
+    Returns:
+    --------
+    np.ndarray
+        Orari locali datetime64[ns]; gli orari naive restano invariati
+    """
+    if times.tz is not None:
+        if tz is not None:
+            times = times.tz_convert(tz)
+        times = times.tz_localize(None)
+    return times.to_numpy(dtype='datetime64[ns]')
+
+
+def _print_load_summary(combined_df: pd.DataFrame, returns_df: pd.DataFrame) -> None:
+    """
+    Stampa il riepilogo finale del caricamento.
+    
+    Parameters:
+    -----------
+    combined_df : pd.DataFrame
+        DataFrame combinato con i bilanci
+    returns_df : pd.DataFrame
+        DataFrame con i rendimenti
+    """
     print(f"\n✅ Caricamento completato!")
     print(f"   DataFrame combinato: {combined_df.shape[0]} righe, {combined_df.shape[1]} colonne")
     print(f"   Periodo: da {combined_df.index.min()} a {combined_df.index.max()}")
     print(f"   Indice unico: {returns_df.index.is_unique}")
+
+
+def _file_signature(file_path: str) -> Dict[str, int]:
+    """
+    Restituisce dimensione e mtime (ns) di un file, usati per il controllo rapido della cache.
     
-    return strategies, combined_df, returns_df
+    Parameters:
+    -----------
+    file_path : str
+        Percorso del file
+    
+    Returns:
+    --------
+    Dict[str, int]
+        Dizionario con 'size' e 'mtime_ns'
+    """
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _file_sha256(file_path: str) -> str:
+    """
+    Calcola l'hash SHA-256 del contenuto di un file.
+    
+    Parameters:
+    -----------
+    file_path : str
+        Percorso del file
+    
+    Returns:
+    --------
+    str
+        Hash esadecimale del contenuto
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _find_reusable_files(cache: Dict[str, Any], signatures: Dict[str, Dict[str, int]],
+                         data_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Individua i file il cui contenuto in cache è ancora valido.
+    
+    Parameters:
+    -----------
+    cache : Dict[str, Any]
+        Cache letta da _read_cache
+    signatures : Dict[str, Dict[str, int]]
+        Dimensione e mtime correnti di ogni file
+    data_path : str
+        Cartella dei file CSV
+    
+    Returns:
+    --------
+    Dict[str, Dict[str, Any]]
+        Voci del manifest (aggiornate con l'mtime corrente) dei file riusabili
+        
+    Notes:
+    ------
+    Se dimensione e mtime coincidono il file è considerato invariato senza
+    leggerlo; se cambia solo l'mtime viene confrontato l'hash del contenuto.
+    """
+    reusable = {}
+    for file, signature in signatures.items():
+        entry = cache['manifest']['files'].get(file)
+        if entry is None or entry['size'] != signature['size']:
+            continue
+        if entry['mtime_ns'] == signature['mtime_ns']:
+            reusable[file] = entry
+        elif _file_sha256(os.path.join(data_path, file)) == entry['sha256']:
+            reusable[file] = {**entry, 'mtime_ns': signature['mtime_ns']}
+    return reusable
 
 
-def _process_csv_file(file_path: str, filename: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+def _read_cache(cache_dir: str, date_format: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Legge manifest e DataFrame in cache, se presenti e compatibili.
+    
+    Parameters:
+    -----------
+    cache_dir : str
+        Cartella della cache
+    date_format : Optional[str]
+        Formato date usato nel caricamento corrente (un formato diverso invalida la cache)
+    
+    Returns:
+    --------
+    Optional[Dict[str, Any]]
+        Dizionario con 'manifest', 'combined' e 'returns', o None se la cache non è utilizzabile
+    """
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != CACHE_VERSION or manifest.get('date_format') != date_format:
+            return None
+        # Il parquet non conserva la frequenza: l'indice è già giornaliero
+        # completo, asfreq ripristina freq='D' come nel caricamento da CSV
+        combined = pd.read_parquet(os.path.join(cache_dir, manifest['combined'])).asfreq('D')
+        returns = pd.read_parquet(os.path.join(cache_dir, manifest['returns'])).asfreq('D')
+    except Exception as e:
+        print(f"⚠️ Cache non leggibile, ricaricamento completo: {e}")
+        return None
+    return {'manifest': manifest, 'combined': combined, 'returns': returns}
+
+
+def _write_cache(cache_dir: str, manifest_files: Dict[str, Dict[str, Any]],
+                 combined_df: pd.DataFrame, returns_df: pd.DataFrame,
+                 date_format: Optional[str]) -> None:
+    """
+    Salva i DataFrame combinati in parquet e il manifest dei file sorgente.
+    
+    Parameters:
+    -----------
+    cache_dir : str
+        Cartella della cache
+    manifest_files : Dict[str, Dict[str, Any]]
+        Voci del manifest per ogni file CSV (size, mtime_ns, sha256, strategy, periodo)
+    combined_df : pd.DataFrame
+        DataFrame combinato con i bilanci
+    returns_df : pd.DataFrame
+        DataFrame con i rendimenti
+    date_format : Optional[str]
+        Formato date usato nel caricamento
+        
+    Notes:
+    ------
+    I parquet hanno un nome univoco referenziato dal manifest, che viene
+    sostituito per ultimo con os.replace: un lettore vede sempre una cache
+    coerente anche se la scrittura si interrompe a metà.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    token = uuid.uuid4().hex
+    combined_name = f"combined_{token}.parquet"
+    returns_name = f"returns_{token}.parquet"
+    combined_df.to_parquet(os.path.join(cache_dir, combined_name))
+    returns_df.to_parquet(os.path.join(cache_dir, returns_name))
+    
+    manifest = {
+        'version': CACHE_VERSION,
+        'date_format': date_format,
+        'combined': combined_name,
+        'returns': returns_name,
+        'files': manifest_files
+    }
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    
+    # Rimuovi i parquet delle versioni precedenti
+    for name in os.listdir(cache_dir):
+        if name.endswith('.parquet') and name not in (combined_name, returns_name):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def _process_csv_file(file_path: str, filename: str,
+                      date_format: Optional[str] = None) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
     """
     Processa un singolo file CSV e restituisce il DataFrame processato e il nome della strategia.
     
@@ -101,42 +570,43 @@ def _process_csv_file(file_path: str, filename: str) -> Tuple[Optional[pd.DataFr
         Percorso completo del file CSV
     filename : str
         Nome del file (usato per generare il nome della strategia)
+    date_format : Optional[str], default None
+        Formato delle date; se None viene dedotto da pandas
     
     Returns:
     --------
     Tuple[Optional[pd.DataFrame], Optional[str]]
         DataFrame processato e nome della strategia, o (None, None) se errore
+    
+    Notes:
+    ------
+    Il file viene decodificato una sola volta e parsato da read_csv (C engine)
+    leggendo solo le prime due colonne; le righe con bilancio non numerico
+    vengono scartate come nel parsing riga per riga originale.
     """
     try:
-        # Leggi file con encoding UTF-16
-        with open(file_path, 'r', encoding='utf-16') as f:
-            lines = f.readlines()
+        # Leggi file con encoding UTF-16 (decodifica unica dell'intero contenuto)
+        with open(file_path, 'rb') as f:
+            text = f.read().decode('utf-16')
         
-        # Estrai dati dal file
-        dates = []
-        balances = []
-        
-        for line in lines[1:]:  # Salta l'header
-            parts = line.strip().split('\t')
-            if len(parts) >= 2:  # Verifica che ci siano almeno 2 parti
-                date_str = parts[0].strip()
-                try:
-                    balance = float(parts[1].strip())
-                    dates.append(date_str)
-                    balances.append(balance)
-                except ValueError:
-                    continue
+        # Estrai data e bilancio saltando l'header; righe più lunghe o più corte sono tollerate
+        raw = pd.read_csv(
+            io.StringIO(text), sep='\t', header=None, skiprows=1,
+            usecols=[0, 1], names=['DATE', 'BALANCE'], dtype=str
+        )
+        balances = pd.to_numeric(raw['BALANCE'].str.strip(), errors='coerce')
+        valid = balances.notna()
         
-        if not dates:
+        if not valid.any():
             return None, None
         
         # Crea DataFrame e assicurati che l'indice sia unico
         df = pd.DataFrame({
-            'BALANCE': balances
-        }, index=pd.to_datetime(dates))
+            'BALANCE': balances[valid].to_numpy(dtype=float)
+        }, index=pd.to_datetime(raw.loc[valid, 'DATE'].str.strip(), format=date_format).to_numpy())
         
         # Ordina l'indice e gestisci i duplicati (prendi l'ultimo valore per ogni data)
-        df = df.sort_index()
+        df = df.sort_index(kind='stable')
         df = df[~df.index.duplicated(keep='last')]
         
         # Usa il nome completo del file (senza estensione) come strategia
@@ -164,25 +634,28 @@ def _combine_dataframes(dfs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     pd.DataFrame
         DataFrame combinato con tutte le strategie
     """
-    # Combinare tutti i dataframe con un outer join
-    combined_df = None
-    for name, df in dfs.items():
-        if combined_df is None:
-            combined_df = df.rename(columns={'BALANCE': name})
-        else:
-            combined_df = combined_df.join(df.rename(columns={'BALANCE': name}), how='outer')
-    
-    # Forward fill per i valori mancanti
-    combined_df = combined_df.fillna(method='ffill')
-    
-    # Inizializza solo la prima riga con 10k per strategie senza dati iniziali
-    if combined_df.iloc[0].isna().any():
-        combined_df.iloc[0] = combined_df.iloc[0].fillna(10000)
-        # Ripropaga in avanti dopo aver inizializzato la prima riga
-        combined_df = combined_df.fillna(method='ffill')
-    
-    # Resample a frequenza giornaliera per evitare buchi e assicurare dati regolari
-    combined_df = combined_df.resample('D').last().fillna(method='ffill')
+    names = list(dfs.keys())
+    
+    # Indice unione giornaliero costruito una sola volta (stesse etichette di resample('D'))
+    first_day = min(df.index[0] for df in dfs.values()).normalize()
+    last_day = max(df.index[-1] for df in dfs.values()).normalize()
+    daily_index = pd.date_range(first_day, last_day, freq='D')
+    
+    # Riempimento diretto dell'array [giorni, strategie] con l'ultimo bilancio
+    # di ogni giorno: equivale a outer join + ffill + resample('D').last(),
+    # ma senza riallocare il DataFrame combinato a ogni strategia
+    values = np.full((len(daily_index), len(names)), np.nan)
+    for j, name in enumerate(names):
+        df = dfs[name]  # indice già ordinato e senza duplicati (_process_csv_file)
+        day_pos = ((df.index.normalize() - first_day) // pd.Timedelta(days=1)).to_numpy()
+        is_last_of_day = np.append(day_pos[1:] != day_pos[:-1], True)
+        values[day_pos[is_last_of_day], j] = df['BALANCE'].to_numpy()[is_last_of_day]
+    
+    # Forward fill sui giorni senza operazioni
+    combined_df = pd.DataFrame(values, index=daily_index, columns=names).ffill()
+    
+    # Inizializza con 10k le strategie senza dati iniziali (fino al primo bilancio)
+    combined_df = combined_df.fillna(10000)
     
     return combined_df
 
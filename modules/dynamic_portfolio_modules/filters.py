@@ -3,11 +3,19 @@ Filtering Module for Dynamic Portfolio Optimization
 ==================================================
 
 This module contains filtering mechanisms to protect strategies from excessive
-losses, including rolling drawdown filters and other risk management tools.
+losses, including rolling drawdown filters, trade-sequence filters (consecutive
+wins and trade autocorrelation) and other risk management tools.
 
 Functions:
 ----------
 - apply_rolling_drawdown_filter: Apply rolling drawdown filter to strategy
+- apply_rolling_drawdown_filter_matrix: Apply the same filter to all columns of a balance DataFrame
+- optimize_filter_parameters: Parallel grid search over window, stop and restart parameters
+- apply_streak_filter / apply_streak_filter_matrix: Consecutive wins/losses trade filter
+- apply_autocorrelation_filter / apply_autocorrelation_filter_matrix: Lag-k trade
+  autocorrelation gating with running sums
+- optimize_streak_filter_parameters / optimize_autocorrelation_filter_parameters:
+  Parameter sweeps of the trade-sequence filters
 - apply_filter_to_all_strategies: Apply filter to multiple strategies
 - create_filtered_rebalancer: Create rebalancer with filtered strategies
 
@@ -17,7 +25,11 @@ Version: 1.0.0
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from numba import jit
+from joblib import Parallel, delayed
+from typing import Dict, Tuple, List, Optional
+
+from .performance_metrics import calculate_performance_metrics_matrix, _max_drawdown_window
 
 
 def apply_rolling_drawdown_filter(balance_series: pd.Series, 
@@ -53,29 +65,115 @@ def apply_rolling_drawdown_filter(balance_series: pd.Series,
     - Il trading riprende quando il drawdown migliora oltre la soglia di restart
     - Durante il fermo, il bilancio rimane costante
     """
-    df_temp = pd.DataFrame({
-        'BALANCE': balance_series,
-        'DATE': balance_series.index
-    })
+    balances = np.asarray(balance_series.values, dtype=np.float64).reshape(-1, 1)
+    
+    # Calcola rolling max (drawdown in dollari assoluti = BALANCE - rolling_max)
+    rolling_max = balance_series.rolling(window=window_days, min_periods=1).max()
+    rolling_max = np.asarray(rolling_max.values, dtype=np.float64).reshape(-1, 1)
     
-    # Calcola rolling drawdown in dollari assoluti
-    df_temp['rolling_max'] = df_temp['BALANCE'].rolling(window=window_days, min_periods=1).max()
-    df_temp['rolling_drawdown_usd'] = df_temp['BALANCE'] - df_temp['rolling_max']
+    restart_threshold_usd = stop_threshold_usd * restart_multiplier
+    adjusted = _drawdown_filter_kernel(balances, rolling_max, stop_threshold_usd, restart_threshold_usd)
+    
+    return pd.Series(adjusted[:, 0], index=balance_series.index, name='adjusted_balance')
+
+
+def apply_rolling_drawdown_filter_matrix(balance_df: pd.DataFrame,
+                                        window_days: int = 90,
+                                        stop_threshold_usd: float = -5.0,
+                                        restart_multiplier: float = 0.5) -> pd.DataFrame:
+    """
+    Applica il filtro drawdown rolling a tutte le colonne di un DataFrame di bilanci.
+    
+    Parameters:
+    -----------
+    balance_df : pd.DataFrame
+        DataFrame con i bilanci, una colonna per strategia
+    window_days : int, default 90
+        Giorni per la finestra rolling del drawdown
+    stop_threshold_usd : float, default -5.0
+        Soglia di stop in dollari assoluti (negativa)
+    restart_multiplier : float, default 0.5
+        Moltiplicatore per la soglia di restart (0.5 = metà della soglia stop)
     
-    # Inizializza variabili
-    df_temp['active'] = True
-    df_temp['adjusted_balance'] = df_temp['BALANCE'].copy()
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame con i bilanci filtrati (stesso indice e colonne)
+        
+    Notes:
+    ------
+    Stessa logica di apply_rolling_drawdown_filter colonna per colonna: il
+    rolling max è calcolato una volta per tutte le colonne e la macchina a
+    stati stop/restart gira in un unico kernel numba.
+    """
+    balances = np.ascontiguousarray(balance_df.values, dtype=np.float64)
+    rolling_max = balance_df.rolling(window=window_days, min_periods=1).max()
+    rolling_max = np.ascontiguousarray(rolling_max.values, dtype=np.float64)
     
     restart_threshold_usd = stop_threshold_usd * restart_multiplier
+    adjusted = _drawdown_filter_kernel(balances, rolling_max, stop_threshold_usd, restart_threshold_usd)
+    
+    return pd.DataFrame(adjusted, index=balance_df.index, columns=balance_df.columns)
+
+
+@jit(nopython=True)
+def _drawdown_filter_kernel(balances, rolling_max, stop_threshold_usd, restart_threshold_usd):
+    """
+    Macchina a stati stop/restart del filtro drawdown, per ogni colonna.
+    
+    Parameters:
+    -----------
+    balances : np.ndarray
+        Matrice dei bilanci [giorni, strategie]
+    rolling_max : np.ndarray
+        Massimo rolling dei bilanci [giorni, strategie]
+    stop_threshold_usd : float
+        Soglia di stop in dollari (negativa)
+    restart_threshold_usd : float
+        Soglia di restart in dollari
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei bilanci filtrati [giorni, strategie]
+        
+    Notes:
+    ------
+    - Da attiva la strategia segue le variazioni di bilancio e si ferma quando
+      il drawdown rolling scende sotto la soglia di stop
+    - Da ferma il bilancio resta costante; quando il drawdown risale sopra la
+      soglia di restart la strategia riparte dal periodo successivo
+    """
+    n_days, n_strategies = balances.shape
+    adjusted = np.empty((n_days, n_strategies))
+    column = np.empty(n_days)
+    
+    for j in range(n_strategies):
+        _drawdown_filter_column(balances[:, j], rolling_max[:, j],
+                                stop_threshold_usd, restart_threshold_usd, column)
+        adjusted[:, j] = column
+    
+    return adjusted
+
+
+@jit(nopython=True, nogil=True)
+def _drawdown_filter_column(balance, rolling_max, stop_threshold_usd, restart_threshold_usd, adjusted):
+    """
+    Applica la macchina a stati stop/restart a una singola serie di bilanci,
+    scrivendo il risultato in adjusted (stessa lunghezza di balance).
+    """
+    n_days = len(balance)
+    if n_days == 0:
+        return
     
     # Variabili di stato
     is_active = True
-    balance_when_stopped = df_temp['BALANCE'].iloc[0]
-    current_active_balance = df_temp['BALANCE'].iloc[0]
+    balance_when_stopped = balance[0]
+    current_active_balance = balance[0]
     restart_next_period = False
     
-    for i in range(len(df_temp)):
-        current_dd_usd = df_temp['rolling_drawdown_usd'].iloc[i]
+    for i in range(n_days):
+        current_dd_usd = balance[i] - rolling_max[i]
         
         # Gestisci restart dal periodo precedente
         if restart_next_period:
@@ -86,9 +184,8 @@ def apply_rolling_drawdown_filter(balance_series: pd.Series,
         if is_active:
             # Strategia attiva - aggiorna progressivamente
             if i > 0:
-                balance_change = df_temp['BALANCE'].iloc[i] - df_temp['BALANCE'].iloc[i-1]
-                current_active_balance += balance_change
-            df_temp.loc[df_temp.index[i], 'adjusted_balance'] = current_active_balance
+                current_active_balance += balance[i] - balance[i - 1]
+            adjusted[i] = current_active_balance
             
             # Verifica condizione di stop (drawdown in dollari)
             if current_dd_usd < stop_threshold_usd:
@@ -96,15 +193,782 @@ def apply_rolling_drawdown_filter(balance_series: pd.Series,
                 balance_when_stopped = current_active_balance
         else:
             # Strategia fermata - mantieni bilancio di stop
-            df_temp.loc[df_temp.index[i], 'adjusted_balance'] = balance_when_stopped
+            adjusted[i] = balance_when_stopped
             
             # Verifica condizione di restart - ma riprendi dal periodo successivo
             if current_dd_usd > restart_threshold_usd:
                 restart_next_period = True
+
+
+def optimize_filter_parameters(strategies_data: Dict[str, pd.DataFrame],
+                               window_days_range: Optional[List[int]] = None,
+                               stop_threshold_range: Optional[List[float]] = None,
+                               restart_multiplier_range: Optional[List[float]] = None,
+                               n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Grid search dei parametri del filtro drawdown su tutte le strategie.
+    
+    Parameters:
+    -----------
+    strategies_data : Dict[str, pd.DataFrame]
+        Dizionario con i dati delle strategie originali (colonne 'BALANCE' e
+        'returns', stesso indice per tutte)
+    window_days_range : Optional[List[int]], default None
+        Finestre rolling da testare. Se None, usa [15, 30, 45, 60, 90, 120, 180, 240]
+    stop_threshold_range : Optional[List[float]], default None
+        Soglie di stop in dollari da testare. Se None, usa [-1, -2, -3, -5, -7, -10, -15, -20]
+    restart_multiplier_range : Optional[List[float]], default None
+        Moltiplicatori di restart da testare. Se None, usa [0.1, 0.2, 0.3, 0.5, 0.7, 0.8, 0.9, 1.0]
+    n_jobs : int, default 1
+        Numero di thread paralleli (le finestre vengono elaborate in parallelo)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Una riga per combinazione (window_days, stop_threshold_usd,
+        restart_multiplier) con le medie sulle strategie delle stesse metriche
+        di calculate_filter_effectiveness (Filtered_Sharpe, Filtered_MaxDD,
+        Filtered_Return, Sharpe_Improvement, MaxDD_Improvement,
+        Return_Difference) e il numero di strategie con Sharpe migliorato;
+        ordinato per Filtered_Sharpe e poi Filtered_MaxDD decrescenti
+        
+    Notes:
+    ------
+    - Il rolling max è calcolato una sola volta per finestra e condiviso da
+      tutte le combinazioni stop/restart
+    - Filtro e metriche girano in un kernel numba senza GIL, senza creare
+      DataFrame intermedi: migliaia di combinazioni su centinaia di strategie
+      richiedono pochi secondi
+    - I rendimenti filtrati sono pct_change del bilancio filtrato (primo
+      giorno = 0), come in apply_filter_to_all_strategies
+    """
+    if window_days_range is None:
+        window_days_range = [15, 30, 45, 60, 90, 120, 180, 240]
+    if stop_threshold_range is None:
+        stop_threshold_range = [-1, -2, -3, -5, -7, -10, -15, -20]
+    if restart_multiplier_range is None:
+        restart_multiplier_range = [0.1, 0.2, 0.3, 0.5, 0.7, 0.8, 0.9, 1.0]
+    
+    prepared = _prepare_filter_grid(strategies_data)
+    if prepared is None:
+        return pd.DataFrame()
+    balance_df, balances, original_metrics = prepared
+    names = list(balance_df.columns)
+    
+    stops = np.repeat(np.asarray(stop_threshold_range, dtype=np.float64), len(restart_multiplier_range))
+    multipliers = np.tile(np.asarray(restart_multiplier_range, dtype=np.float64), len(stop_threshold_range))
+    restarts = stops * multipliers
+    
+    n_combos = len(window_days_range) * len(stops)
+    print(f"🔍 Ottimizzazione parametri filtro drawdown...")
+    print(f"   Strategie: {len(names)} | Combinazioni: {n_combos}")
+    print(f"   Finestre: {list(window_days_range)}")
+    print(f"   Parallelizzazione: {'Sì' if n_jobs > 1 else 'No'} ({n_jobs} thread)")
+    
+    def _evaluate_window(window_days):
+        # Rolling max condiviso da tutte le soglie della finestra
+        rolling_max = balance_df.rolling(window=window_days, min_periods=1).max()
+        rolling_max = np.ascontiguousarray(rolling_max.values, dtype=np.float64)
+        return _filter_grid_kernel(balances, rolling_max, stops, restarts)
+    
+    window_results = Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_evaluate_window)(window_days) for window_days in window_days_range
+    )
+    
+    params = []
+    for window_days in window_days_range:
+        for k in range(len(stops)):
+            params.append({
+                'window_days': window_days,
+                'stop_threshold_usd': stops[k],
+                'restart_multiplier': multipliers[k]
+            })
+    results_df = _summarize_filter_grid(
+        params,
+        np.vstack([result[0] for result in window_results]),
+        np.vstack([result[1] for result in window_results]),
+        np.vstack([result[2] for result in window_results]),
+        original_metrics
+    )
+    
+    best = results_df.iloc[0]
+    print(f"✅ Ottimizzazione filtro completata!")
+    print(f"   Migliore configurazione: Window={best['window_days']}d, "
+          f"Stop=${best['stop_threshold_usd']}, Restart={best['restart_multiplier']}")
+    print(f"   Filtered Sharpe medio: {best['Filtered_Sharpe']:.3f} | "
+          f"Filtered MaxDD medio: {best['Filtered_MaxDD']:.3f}")
+    
+    return results_df
+
+
+@jit(nopython=True, nogil=True)
+def _filter_grid_kernel(balances, rolling_max, stops, restarts):
+    """
+    Applica il filtro per ogni coppia (stop, restart) e calcola le metriche
+    dei rendimenti filtrati di ogni strategia.
+    
+    Parameters:
+    -----------
+    balances : np.ndarray
+        Matrice dei bilanci [giorni, strategie]
+    rolling_max : np.ndarray
+        Massimo rolling dei bilanci per la finestra corrente [giorni, strategie]
+    stops : np.ndarray
+        Soglie di stop in dollari, una per combinazione
+    restarts : np.ndarray
+        Soglie di restart in dollari, una per combinazione
+    
+    Returns:
+    --------
+    tuple
+        (annual_return, sharpe_ratio, max_drawdown), matrici [combinazioni, strategie]
+    """
+    n_days, n_strategies = balances.shape
+    n_combos = len(stops)
+    annual = np.zeros((n_combos, n_strategies))
+    sharpe = np.zeros((n_combos, n_strategies))
+    maxdd = np.zeros((n_combos, n_strategies))
+    adjusted = np.empty(n_days)
+    returns = np.empty(n_days)
+    
+    for k in range(n_combos):
+        for j in range(n_strategies):
+            _drawdown_filter_column(balances[:, j], rolling_max[:, j], stops[k], restarts[k], adjusted)
+            annual[k, j], sharpe[k, j], maxdd[k, j] = _balance_metrics(adjusted, returns)
+    
+    return annual, sharpe, maxdd
+
+
+@jit(nopython=True, nogil=True)
+def _balance_metrics(adjusted, returns):
+    """
+    Metriche (vedi _returns_metrics) dei rendimenti di un bilancio filtrato:
+    pct_change con primo giorno = 0, scritti nel buffer returns.
+    """
+    n_days = len(adjusted)
+    if n_days > 0:
+        returns[0] = 0.0
+    for i in range(1, n_days):
+        returns[i] = adjusted[i] / adjusted[i - 1] - 1 if adjusted[i - 1] != 0 else 0.0
+    return _returns_metrics(returns)
+
+
+@jit(nopython=True, nogil=True)
+def _returns_metrics(returns):
+    """
+    Rendimento annualizzato, Sharpe e max drawdown di una serie di rendimenti,
+    con le stesse formule di calculate_performance_metrics (zeri se meno di 5 osservazioni).
+    """
+    n = len(returns)
+    if n < 5:
+        return 0.0, 0.0, 0.0
+    
+    cumulative = 1.0
+    for i in range(n):
+        cumulative *= 1 + returns[i]
+    
+    annual_return = cumulative ** (1 / (n / 252)) - 1
+    volatility = np.std(returns) * np.sqrt(252)
+    sharpe_ratio = annual_return / volatility if volatility > 0 else 0.0
+    max_drawdown = _max_drawdown_window(returns, 0, n)
+    
+    return annual_return, sharpe_ratio, max_drawdown
+
+
+def _prepare_filter_grid(strategies_data: Dict[str, pd.DataFrame]) -> Optional[Tuple[pd.DataFrame, np.ndarray, np.ndarray]]:
+    """
+    Prepara i dati comuni alle grid search dei filtri.
+    
+    Parameters:
+    -----------
+    strategies_data : Dict[str, pd.DataFrame]
+        Dizionario con i dati delle strategie originali (colonne 'BALANCE' e
+        'returns', stesso indice per tutte)
+    
+    Returns:
+    --------
+    Optional[Tuple[pd.DataFrame, np.ndarray, np.ndarray]]
+        (balance_df, matrice dei bilanci, metriche originali [strategie, 5]
+        come calculate_performance_metrics_matrix), o None se non ci sono strategie
+    """
+    names = list(strategies_data.keys())
+    if not names:
+        print("❌ Nessuna strategia da ottimizzare!")
+        return None
+    if not all(strategies_data[name].index.equals(strategies_data[names[0]].index) for name in names):
+        raise ValueError("Le strategie devono avere lo stesso indice temporale")
+    
+    balance_df = pd.DataFrame({name: strategies_data[name]['BALANCE'] for name in names})
+    balances = np.ascontiguousarray(balance_df.values, dtype=np.float64)
+    
+    # Metriche delle strategie originali (calcolate una sola volta)
+    original_metrics = calculate_performance_metrics_matrix(
+        np.column_stack([strategies_data[name]['returns'].values for name in names])
+    ).values
+    
+    return balance_df, balances, original_metrics
+
+
+def _summarize_filter_grid(params: List[Dict[str, float]], annual: np.ndarray, sharpe: np.ndarray,
+                           maxdd: np.ndarray, original_metrics: np.ndarray) -> pd.DataFrame:
+    """
+    Riassume le metriche [combinazioni, strategie] di una grid search dei filtri
+    in un DataFrame con una riga per combinazione di parametri.
+    
+    Parameters:
+    -----------
+    params : List[Dict[str, float]]
+        Parametri di ogni combinazione (stesso ordine delle righe delle metriche)
+    annual, sharpe, maxdd : np.ndarray
+        Metriche dei rendimenti filtrati [combinazioni, strategie]
+    original_metrics : np.ndarray
+        Metriche delle strategie originali (vedi _prepare_filter_grid)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Parametri più medie sulle strategie di Filtered_Sharpe, Filtered_MaxDD,
+        Filtered_Return, Sharpe_Improvement, MaxDD_Improvement, Return_Difference
+        e Strategies_Improved; ordinato per Filtered_Sharpe e poi Filtered_MaxDD decrescenti
+    """
+    orig_annual = original_metrics[:, 1]
+    orig_sharpe = original_metrics[:, 3]
+    orig_maxdd = original_metrics[:, 4]
+    
+    rows = []
+    for k, combo in enumerate(params):
+        row = dict(combo)
+        row.update({
+            'Filtered_Sharpe': sharpe[k].mean(),
+            'Filtered_MaxDD': maxdd[k].mean(),
+            'Filtered_Return': annual[k].mean(),
+            'Sharpe_Improvement': (sharpe[k] - orig_sharpe).mean(),
+            'MaxDD_Improvement': (maxdd[k] - orig_maxdd).mean(),
+            'Return_Difference': (annual[k] - orig_annual).mean(),
+            'Strategies_Improved': int((sharpe[k] - orig_sharpe > 0).sum())
+        })
+        rows.append(row)
+    
+    return pd.DataFrame(rows).sort_values(
+        ['Filtered_Sharpe', 'Filtered_MaxDD'], ascending=False
+    ).reset_index(drop=True)
+
+
+def apply_streak_filter(balance_series: pd.Series,
+                        min_wins_to_activate: int = 2,
+                        max_losses_to_deactivate: int = 3,
+                        cooldown_trades: int = 1) -> pd.Series:
+    """
+    Applica il filtro a vincite consecutive a una serie di bilanci.
+    
+    La strategia si attiva dopo una serie di trade vincenti consecutivi e si
+    disattiva dopo una serie di trade perdenti consecutivi (notebook
+    'consecutive wins.ipynb').
+    
+    Parameters:
+    -----------
+    balance_series : pd.Series
+        Serie pandas con i bilanci della strategia
+    min_wins_to_activate : int, default 2
+        Trade vincenti consecutivi necessari per attivare la strategia
+    max_losses_to_deactivate : int, default 3
+        Trade perdenti consecutivi che disattivano la strategia
+    cooldown_trades : int, default 1
+        Trade di attesa dopo la disattivazione prima di poter riattivare
+        (0 = riattivabile dal trade successivo)
+    
+    Returns:
+    --------
+    pd.Series
+        Serie pandas con i bilanci filtrati
+        
+    Notes:
+    ------
+    - Un trade è ogni variazione del bilancio rispetto al periodo precedente
+    - La decisione su un trade usa solo i trade precedenti (nessun lookahead)
+    - La strategia parte disattivata; da ferma il bilancio resta costante
+    - Dopo la disattivazione i successivi cooldown_trades trade sono saltati
+      e non contano per la serie di vincite che riattiva la strategia
+    """
+    adjusted = apply_streak_filter_matrix(
+        balance_series.to_frame(), min_wins_to_activate, max_losses_to_deactivate, cooldown_trades
+    )
+    return pd.Series(adjusted.values[:, 0], index=balance_series.index, name='adjusted_balance')
+
+
+def apply_streak_filter_matrix(balance_df: pd.DataFrame,
+                               min_wins_to_activate: int = 2,
+                               max_losses_to_deactivate: int = 3,
+                               cooldown_trades: int = 1) -> pd.DataFrame:
+    """
+    Applica il filtro a vincite consecutive a tutte le colonne di un DataFrame di bilanci.
+    
+    Parameters:
+    -----------
+    balance_df : pd.DataFrame
+        DataFrame con i bilanci, una colonna per strategia
+    min_wins_to_activate : int, default 2
+        Trade vincenti consecutivi necessari per attivare la strategia
+    max_losses_to_deactivate : int, default 3
+        Trade perdenti consecutivi che disattivano la strategia
+    cooldown_trades : int, default 1
+        Trade di attesa dopo la disattivazione prima di poter riattivare
+        (0 = riattivabile dal trade successivo)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame con i bilanci filtrati (stesso indice e colonne)
+        
+    Notes:
+    ------
+    Stessa logica di apply_streak_filter colonna per colonna, in un unico kernel numba.
+    """
+    if min_wins_to_activate < 1 or max_losses_to_deactivate < 1 or cooldown_trades < 0:
+        raise ValueError("min_wins_to_activate e max_losses_to_deactivate devono essere >= 1, "
+                         "cooldown_trades >= 0")
+    
+    balances = np.ascontiguousarray(balance_df.values, dtype=np.float64)
+    adjusted = _streak_filter_kernel(balances, min_wins_to_activate, max_losses_to_deactivate, cooldown_trades)
+    
+    return pd.DataFrame(adjusted, index=balance_df.index, columns=balance_df.columns)
+
+
+@jit(nopython=True)
+def _streak_filter_kernel(balances, min_wins, max_losses, cooldown_trades):
+    """
+    Filtro a vincite consecutive per ogni colonna della matrice dei bilanci [giorni, strategie].
+    """
+    n_days, n_strategies = balances.shape
+    adjusted = np.empty((n_days, n_strategies))
+    balance = np.empty(n_days)
+    column = np.empty(n_days)
+    
+    for j in range(n_strategies):
+        balance[:] = balances[:, j]
+        _streak_filter_column(balance, min_wins, max_losses, cooldown_trades, column)
+        adjusted[:, j] = column
+    
+    return adjusted
+
+
+@jit(nopython=True, nogil=True)
+def _streak_filter_column(balance, min_wins, max_losses, cooldown_trades, adjusted):
+    """
+    Macchina a stati del filtro a vincite consecutive su una singola serie di
+    bilanci, scrivendo il risultato in adjusted (stessa lunghezza di balance).
+    """
+    n_days = len(balance)
+    if n_days == 0:
+        return
+    
+    # Variabili di stato (le serie contano solo i trade già chiusi)
+    is_active = False
+    win_streak = 0
+    loss_streak = 0
+    cooldown_remaining = 0
+    current_balance = balance[0]
+    adjusted[0] = current_balance
+    
+    for i in range(1, n_days):
+        pnl = balance[i] - balance[i - 1]
+        if pnl != 0:
+            # Attivazione / disattivazione prima del trade, senza lookahead
+            waiting = False
+            if not is_active:
+                if cooldown_remaining > 0:
+                    waiting = True
+                elif win_streak >= min_wins:
+                    is_active = True
+            elif loss_streak >= max_losses:
+                is_active = False
+                cooldown_remaining = cooldown_trades
+            
+            if is_active:
+                current_balance += pnl
+            
+            # Aggiorna le serie con il trade appena chiuso
+            if pnl > 0:
+                win_streak += 1
+                loss_streak = 0
+            else:
+                loss_streak += 1
+                win_streak = 0
+            
+            # I trade di cooldown non contano per la serie di riattivazione
+            if waiting:
+                cooldown_remaining -= 1
+                win_streak = 0
+        
+        adjusted[i] = current_balance
+
+
+def apply_autocorrelation_filter(balance_series: pd.Series,
+                                 window_trades: int = 50,
+                                 lag: int = 1,
+                                 min_abs_autocorr: float = 0.1) -> pd.Series:
+    """
+    Applica il filtro di autocorrelazione dei trade a una serie di bilanci.
+    
+    Il P&L dei trade viene trattato come serie: se l'autocorrelazione al lag k
+    sugli ultimi trade è significativa e prevede una perdita per il prossimo
+    trade (segno di rho_k * pnl[t-k] negativo), il trade viene saltato.
+    
+    Parameters:
+    -----------
+    balance_series : pd.Series
+        Serie pandas con i bilanci della strategia
+    window_trades : int, default 50
+        Numero di coppie (pnl[t], pnl[t-k]) nella finestra dell'autocorrelazione
+    lag : int, default 1
+        Lag k in numero di trade
+    min_abs_autocorr : float, default 0.1
+        Autocorrelazione minima in valore assoluto per considerare il segnale
+    
+    Returns:
+    --------
+    pd.Series
+        Serie pandas con i bilanci filtrati
+        
+    Notes:
+    ------
+    - Un trade è ogni variazione del bilancio rispetto al periodo precedente
+    - L'autocorrelazione è aggiornata con somme mobili (O(1) per trade) e usa
+      solo i trade precedenti (nessun lookahead)
+    - Finché la finestra non è piena la strategia resta attiva
+    """
+    adjusted = apply_autocorrelation_filter_matrix(
+        balance_series.to_frame(), window_trades, lag, min_abs_autocorr
+    )
+    return pd.Series(adjusted.values[:, 0], index=balance_series.index, name='adjusted_balance')
+
+
+def apply_autocorrelation_filter_matrix(balance_df: pd.DataFrame,
+                                        window_trades: int = 50,
+                                        lag: int = 1,
+                                        min_abs_autocorr: float = 0.1) -> pd.DataFrame:
+    """
+    Applica il filtro di autocorrelazione dei trade a tutte le colonne di un DataFrame di bilanci.
+    
+    Parameters:
+    -----------
+    balance_df : pd.DataFrame
+        DataFrame con i bilanci, una colonna per strategia
+    window_trades : int, default 50
+        Numero di coppie (pnl[t], pnl[t-k]) nella finestra dell'autocorrelazione
+    lag : int, default 1
+        Lag k in numero di trade
+    min_abs_autocorr : float, default 0.1
+        Autocorrelazione minima in valore assoluto per considerare il segnale
+    
+    Returns:
+    --------
+    pd.DataFrame
+        DataFrame con i bilanci filtrati (stesso indice e colonne)
         
-        df_temp.loc[df_temp.index[i], 'active'] = is_active
+    Notes:
+    ------
+    Stessa logica di apply_autocorrelation_filter colonna per colonna, in un unico kernel numba.
+    """
+    if window_trades < 3 or lag < 1:
+        raise ValueError("window_trades deve essere >= 3 e lag >= 1")
+    
+    balances = np.ascontiguousarray(balance_df.values, dtype=np.float64)
+    adjusted = _autocorrelation_filter_kernel(balances, window_trades, lag, min_abs_autocorr)
+    
+    return pd.DataFrame(adjusted, index=balance_df.index, columns=balance_df.columns)
+
+
+@jit(nopython=True)
+def _autocorrelation_filter_kernel(balances, window_trades, lag, min_abs_autocorr):
+    """
+    Filtro di autocorrelazione per ogni colonna della matrice dei bilanci [giorni, strategie].
+    """
+    n_days, n_strategies = balances.shape
+    adjusted = np.empty((n_days, n_strategies))
+    balance = np.empty(n_days)
+    column = np.empty(n_days)
+    pnl_buffer = np.empty(n_days)
     
-    return df_temp['adjusted_balance']
+    for j in range(n_strategies):
+        balance[:] = balances[:, j]
+        _autocorrelation_filter_column(balance, window_trades, lag, min_abs_autocorr, pnl_buffer, column)
+        adjusted[:, j] = column
+    
+    return adjusted
+
+
+@jit(nopython=True, nogil=True)
+def _autocorrelation_filter_column(balance, window_trades, lag, min_abs_autocorr, pnl_buffer, adjusted):
+    """
+    Filtro di autocorrelazione al lag k su una singola serie di bilanci,
+    scrivendo il risultato in adjusted. pnl_buffer (lunghezza >= giorni)
+    contiene il P&L dei trade già chiusi.
+    """
+    n_days = len(balance)
+    if n_days == 0:
+        return
+    
+    # Somme mobili delle coppie (x = pnl[t], y = pnl[t - lag]) nella finestra
+    sum_x = 0.0
+    sum_y = 0.0
+    sum_xx = 0.0
+    sum_yy = 0.0
+    sum_xy = 0.0
+    n_pairs = 0
+    n_trades = 0
+    current_balance = balance[0]
+    adjusted[0] = current_balance
+    
+    for i in range(1, n_days):
+        pnl = balance[i] - balance[i - 1]
+        if pnl != 0:
+            is_active = True
+            if n_pairs == window_trades:
+                cov = sum_xy / n_pairs - (sum_x / n_pairs) * (sum_y / n_pairs)
+                var_x = sum_xx / n_pairs - (sum_x / n_pairs) ** 2
+                var_y = sum_yy / n_pairs - (sum_y / n_pairs) ** 2
+                if var_x > 0 and var_y > 0:
+                    rho = cov / np.sqrt(var_x * var_y)
+                    # Salta il trade se l'autocorrelazione prevede una perdita
+                    if abs(rho) >= min_abs_autocorr and rho * pnl_buffer[n_trades - lag] < 0:
+                        is_active = False
+            
+            if is_active:
+                current_balance += pnl
+            
+            # Aggiunge la coppia del trade appena chiuso e rimuove la più vecchia
+            pnl_buffer[n_trades] = pnl
+            if n_trades >= lag:
+                y = pnl_buffer[n_trades - lag]
+                sum_x += pnl
+                sum_y += y
+                sum_xx += pnl * pnl
+                sum_yy += y * y
+                sum_xy += pnl * y
+                n_pairs += 1
+                if n_pairs > window_trades:
+                    old = n_trades - window_trades
+                    old_x = pnl_buffer[old]
+                    old_y = pnl_buffer[old - lag]
+                    sum_x -= old_x
+                    sum_y -= old_y
+                    sum_xx -= old_x * old_x
+                    sum_yy -= old_y * old_y
+                    sum_xy -= old_x * old_y
+                    n_pairs -= 1
+            n_trades += 1
+        
+        adjusted[i] = current_balance
+
+
+def optimize_streak_filter_parameters(strategies_data: Dict[str, pd.DataFrame],
+                                      min_wins_range: Optional[List[int]] = None,
+                                      max_losses_range: Optional[List[int]] = None,
+                                      cooldown_range: Optional[List[int]] = None,
+                                      n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Grid search dei parametri del filtro a vincite consecutive su tutte le strategie.
+    
+    Parameters:
+    -----------
+    strategies_data : Dict[str, pd.DataFrame]
+        Dizionario con i dati delle strategie originali (colonne 'BALANCE' e
+        'returns', stesso indice per tutte)
+    min_wins_range : Optional[List[int]], default None
+        Vincite consecutive per l'attivazione. Se None, usa [1, 2, 3, 4, 5]
+    max_losses_range : Optional[List[int]], default None
+        Perdite consecutive per la disattivazione. Se None, usa [1, 2, 3, 4, 5]
+    cooldown_range : Optional[List[int]], default None
+        Trade di cooldown. Se None, usa [0, 1, 2, 3]
+    n_jobs : int, default 1
+        Numero di thread paralleli (le combinazioni sono divise tra i thread)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Una riga per combinazione (min_wins_to_activate, max_losses_to_deactivate,
+        cooldown_trades) con le stesse metriche di optimize_filter_parameters
+        
+    Notes:
+    ------
+    Filtro e metriche girano in un kernel numba senza GIL, come per il filtro drawdown.
+    """
+    if min_wins_range is None:
+        min_wins_range = [1, 2, 3, 4, 5]
+    if max_losses_range is None:
+        max_losses_range = [1, 2, 3, 4, 5]
+    if cooldown_range is None:
+        cooldown_range = [0, 1, 2, 3]
+    
+    prepared = _prepare_filter_grid(strategies_data)
+    if prepared is None:
+        return pd.DataFrame()
+    balance_df, balances, original_metrics = prepared
+    
+    grid = np.array([(wins, losses, cooldown) for wins in min_wins_range for losses in max_losses_range
+                     for cooldown in cooldown_range], dtype=np.int64)
+    print(f"🔍 Ottimizzazione parametri filtro vincite consecutive...")
+    print(f"   Strategie: {balances.shape[1]} | Combinazioni: {len(grid)}")
+    print(f"   Parallelizzazione: {'Sì' if n_jobs > 1 else 'No'} ({n_jobs} thread)")
+    
+    annual, sharpe, maxdd = _run_filter_grid_chunks(
+        _streak_grid_kernel, balances, (grid[:, 0], grid[:, 1], grid[:, 2]), n_jobs
+    )
+    params = [{'min_wins_to_activate': int(wins), 'max_losses_to_deactivate': int(losses),
+               'cooldown_trades': int(cooldown)} for wins, losses, cooldown in grid]
+    results_df = _summarize_filter_grid(params, annual, sharpe, maxdd, original_metrics)
+    
+    best = results_df.iloc[0]
+    print(f"✅ Ottimizzazione filtro completata!")
+    print(f"   Migliore configurazione: Wins={best['min_wins_to_activate']}, "
+          f"Losses={best['max_losses_to_deactivate']}, Cooldown={best['cooldown_trades']}")
+    print(f"   Filtered Sharpe medio: {best['Filtered_Sharpe']:.3f} | "
+          f"Filtered MaxDD medio: {best['Filtered_MaxDD']:.3f}")
+    
+    return results_df
+
+
+def optimize_autocorrelation_filter_parameters(strategies_data: Dict[str, pd.DataFrame],
+                                               window_trades_range: Optional[List[int]] = None,
+                                               lag_range: Optional[List[int]] = None,
+                                               min_abs_autocorr_range: Optional[List[float]] = None,
+                                               n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Grid search dei parametri del filtro di autocorrelazione su tutte le strategie.
+    
+    Parameters:
+    -----------
+    strategies_data : Dict[str, pd.DataFrame]
+        Dizionario con i dati delle strategie originali (colonne 'BALANCE' e
+        'returns', stesso indice per tutte)
+    window_trades_range : Optional[List[int]], default None
+        Finestre (in coppie di trade) da testare. Se None, usa [20, 30, 50, 75, 100]
+    lag_range : Optional[List[int]], default None
+        Lag da testare. Se None, usa [1, 2, 3, 5]
+    min_abs_autocorr_range : Optional[List[float]], default None
+        Soglie di autocorrelazione da testare. Se None, usa [0.0, 0.05, 0.1, 0.2, 0.3]
+    n_jobs : int, default 1
+        Numero di thread paralleli (le combinazioni sono divise tra i thread)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Una riga per combinazione (window_trades, lag, min_abs_autocorr) con le
+        stesse metriche di optimize_filter_parameters
+        
+    Notes:
+    ------
+    Filtro e metriche girano in un kernel numba senza GIL, come per il filtro drawdown.
+    """
+    if window_trades_range is None:
+        window_trades_range = [20, 30, 50, 75, 100]
+    if lag_range is None:
+        lag_range = [1, 2, 3, 5]
+    if min_abs_autocorr_range is None:
+        min_abs_autocorr_range = [0.0, 0.05, 0.1, 0.2, 0.3]
+    if min(window_trades_range) < 3 or min(lag_range) < 1:
+        raise ValueError("window_trades deve essere >= 3 e lag >= 1")
+    
+    prepared = _prepare_filter_grid(strategies_data)
+    if prepared is None:
+        return pd.DataFrame()
+    balance_df, balances, original_metrics = prepared
+    
+    combos = [(window, lag, threshold) for window in window_trades_range for lag in lag_range
+              for threshold in min_abs_autocorr_range]
+    windows = np.array([c[0] for c in combos], dtype=np.int64)
+    lags = np.array([c[1] for c in combos], dtype=np.int64)
+    thresholds = np.array([c[2] for c in combos], dtype=np.float64)
+    print(f"🔍 Ottimizzazione parametri filtro autocorrelazione...")
+    print(f"   Strategie: {balances.shape[1]} | Combinazioni: {len(combos)}")
+    print(f"   Parallelizzazione: {'Sì' if n_jobs > 1 else 'No'} ({n_jobs} thread)")
+    
+    annual, sharpe, maxdd = _run_filter_grid_chunks(
+        _autocorrelation_grid_kernel, balances, (windows, lags, thresholds), n_jobs
+    )
+    params = [{'window_trades': int(window), 'lag': int(lag), 'min_abs_autocorr': float(threshold)}
+              for window, lag, threshold in combos]
+    results_df = _summarize_filter_grid(params, annual, sharpe, maxdd, original_metrics)
+    
+    best = results_df.iloc[0]
+    print(f"✅ Ottimizzazione filtro completata!")
+    print(f"   Migliore configurazione: Window={best['window_trades']} trade, "
+          f"Lag={best['lag']}, Soglia={best['min_abs_autocorr']}")
+    print(f"   Filtered Sharpe medio: {best['Filtered_Sharpe']:.3f} | "
+          f"Filtered MaxDD medio: {best['Filtered_MaxDD']:.3f}")
+    
+    return results_df
+
+
+def _run_filter_grid_chunks(kernel, balances: np.ndarray, grid_params: Tuple[np.ndarray, ...],
+                            n_jobs: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Divide le combinazioni in blocchi ed esegue il kernel di griglia in thread
+    paralleli (i kernel rilasciano il GIL).
+    
+    Returns:
+    --------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        (annual_return, sharpe_ratio, max_drawdown), matrici [combinazioni, strategie]
+    """
+    n_combos = len(grid_params[0])
+    chunks = [chunk for chunk in np.array_split(np.arange(n_combos), max(1, min(n_jobs, n_combos)))
+              if len(chunk) > 0]
+    chunk_results = Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(kernel)(balances, *[np.ascontiguousarray(param[chunk]) for param in grid_params])
+        for chunk in chunks
+    )
+    return tuple(np.vstack([result[m] for result in chunk_results]) for m in range(3))
+
+
+@jit(nopython=True, nogil=True)
+def _streak_grid_kernel(balances, min_wins, max_losses, cooldowns):
+    """
+    Applica il filtro a vincite consecutive per ogni combinazione e calcola le
+    metriche dei rendimenti filtrati di ogni strategia.
+    """
+    n_days, n_strategies = balances.shape
+    n_combos = len(min_wins)
+    annual = np.zeros((n_combos, n_strategies))
+    sharpe = np.zeros((n_combos, n_strategies))
+    maxdd = np.zeros((n_combos, n_strategies))
+    balance = np.empty(n_days)
+    adjusted = np.empty(n_days)
+    returns = np.empty(n_days)
+    
+    for j in range(n_strategies):
+        balance[:] = balances[:, j]
+        for k in range(n_combos):
+            _streak_filter_column(balance, min_wins[k], max_losses[k], cooldowns[k], adjusted)
+            annual[k, j], sharpe[k, j], maxdd[k, j] = _balance_metrics(adjusted, returns)
+    
+    return annual, sharpe, maxdd
+
+
+@jit(nopython=True, nogil=True)
+def _autocorrelation_grid_kernel(balances, windows, lags, thresholds):
+    """
+    Applica il filtro di autocorrelazione per ogni combinazione e calcola le
+    metriche dei rendimenti filtrati di ogni strategia.
+    """
+    n_days, n_strategies = balances.shape
+    n_combos = len(windows)
+    annual = np.zeros((n_combos, n_strategies))
+    sharpe = np.zeros((n_combos, n_strategies))
+    maxdd = np.zeros((n_combos, n_strategies))
+    balance = np.empty(n_days)
+    adjusted = np.empty(n_days)
+    returns = np.empty(n_days)
+    pnl_buffer = np.empty(n_days)
+    
+    for j in range(n_strategies):
+        balance[:] = balances[:, j]
+        for k in range(n_combos):
+            _autocorrelation_filter_column(balance, windows[k], lags[k], thresholds[k], pnl_buffer, adjusted)
+            annual[k, j], sharpe[k, j], maxdd[k, j] = _balance_metrics(adjusted, returns)
+    
+    return annual, sharpe, maxdd
 
 
 def apply_filter_to_all_strategies(strategies_data: Dict[str, pd.DataFrame],
@@ -145,15 +1009,26 @@ def apply_filter_to_all_strategies(strategies_data: Dict[str, pd.DataFrame],
     print("\n📊 Applicazione filtro per strategia:")
     print("-" * 70)
     
+    # Se tutte le strategie condividono lo stesso indice, filtra in un'unica chiamata
+    names = list(strategies_data.keys())
+    same_index = all(strategies_data[name].index.equals(strategies_data[names[0]].index) for name in names)
+    filtered_matrix = None
+    if names and same_index:
+        balance_df = pd.DataFrame({name: strategies_data[name]['BALANCE'] for name in names})
+        filtered_matrix = apply_rolling_drawdown_filter_matrix(balance_df, **filter_params)
+    
     for strategy_name, strategy_data in strategies_data.items():
         # Estrai la serie dei bilanci
         balance_series = strategy_data['BALANCE']
         
         # Applica il filtro
-        filtered_balance = apply_rolling_drawdown_filter(
-            balance_series, 
-            **filter_params
-        )
+        if filtered_matrix is not None:
+            filtered_balance = filtered_matrix[strategy_name].rename('adjusted_balance')
+        else:
+            filtered_balance = apply_rolling_drawdown_filter(
+                balance_series, 
+                **filter_params
+            )
         
         # Calcola statistiche di confronto
         original_final = balance_series.iloc[-1]
@@ -260,32 +1135,36 @@ def calculate_filter_effectiveness(original_strategies: Dict[str, pd.DataFrame],
     pd.DataFrame
         DataFrame con statistiche comparative di efficacia
     """
-    from .performance_metrics import calculate_performance_metrics
+    names = [name for name in original_strategies.keys() if name in filtered_strategies]
+    
+    # Metriche di tutte le strategie in due chiamate vettoriali (una per colonna se le lunghezze differiscono)
+    def _metrics(strategies):
+        series = [strategies[name]['returns'].values for name in names]
+        if series and all(len(values) == len(series[0]) for values in series):
+            return calculate_performance_metrics_matrix(np.column_stack(series)).values
+        return np.array([calculate_performance_metrics_matrix(values).values[0] for values in series])
+    
+    original_metrics = _metrics(original_strategies)
+    filtered_metrics = _metrics(filtered_strategies)
     
     comparison_data = []
     
-    for strategy_name in original_strategies.keys():
-        if strategy_name in filtered_strategies:
-            # Calcola metriche per strategia originale
-            orig_returns = original_strategies[strategy_name]['returns']
-            orig_total, orig_annual, orig_vol, orig_sharpe, orig_maxdd = calculate_performance_metrics(orig_returns)
-            
-            # Calcola metriche per strategia filtrata
-            filt_returns = filtered_strategies[strategy_name]['returns']
-            filt_total, filt_annual, filt_vol, filt_sharpe, filt_maxdd = calculate_performance_metrics(filt_returns)
-            
-            comparison_data.append({
-                'Strategy': strategy_name,
-                'Original_Sharpe': orig_sharpe,
-                'Filtered_Sharpe': filt_sharpe,
-                'Sharpe_Improvement': filt_sharpe - orig_sharpe,
-                'Original_MaxDD': orig_maxdd,
-                'Filtered_MaxDD': filt_maxdd,
-                'MaxDD_Improvement': filt_maxdd - orig_maxdd,  # Improvement = less negative
-                'Original_Return': orig_annual,
-                'Filtered_Return': filt_annual,
-                'Return_Difference': filt_annual - orig_annual
-            })
+    for k, strategy_name in enumerate(names):
+        _, orig_annual, _, orig_sharpe, orig_maxdd = original_metrics[k]
+        _, filt_annual, _, filt_sharpe, filt_maxdd = filtered_metrics[k]
+        
+        comparison_data.append({
+            'Strategy': strategy_name,
+            'Original_Sharpe': orig_sharpe,
+            'Filtered_Sharpe': filt_sharpe,
+            'Sharpe_Improvement': filt_sharpe - orig_sharpe,
+            'Original_MaxDD': orig_maxdd,
+            'Filtered_MaxDD': filt_maxdd,
+            'MaxDD_Improvement': filt_maxdd - orig_maxdd,  # Improvement = less negative
+            'Original_Return': orig_annual,
+            'Filtered_Return': filt_annual,
+            'Return_Difference': filt_annual - orig_annual
+        })
     
     effectiveness_df = pd.DataFrame(comparison_data)
     
@@ -10,6 +10,7 @@ growth patterns.
 Functions:
 ----------
 - calculate_linearity_metrics: Calculate linearity metrics for equity curve
+- calculate_linearity_metrics_matrix: Closed-form linearity metrics for many equity curves at once
 - optimize_single_config_linearity: Optimize single config for linearity
 - grid_search_optimization_linearity: Grid search for linearity optimization
 - analyze_linearity_results: Analyze and interpret linearity results
@@ -20,15 +21,10 @@ Version: 1.0.0
 
 import numpy as np
 import pandas as pd
-from scipy import stats
-from sklearn.metrics import r2_score
-from sklearn.linear_model import LinearRegression
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 import warnings
 warnings.filterwarnings('ignore')
 
-from .performance_metrics import calculate_performance_metrics
-
 
 def calculate_linearity_metrics(portfolio_values: pd.Series) -> Dict[str, float]:
     """
@@ -64,37 +60,82 @@ def calculate_linearity_metrics(portfolio_values: pd.Series) -> Dict[str, float]
             'residual_std': float('inf')
         }
     
-    # Converti in array numpy
-    values = np.array(portfolio_values)
-    x = np.arange(len(values)).reshape(-1, 1)
-    
-    # Fit regressione lineare
-    reg = LinearRegression()
-    reg.fit(x, values)
-    
-    # Predizioni
-    y_pred = reg.predict(x)
-    
-    # Calcola metriche
-    r_squared = r2_score(values, y_pred)
-    
-    # Correlazione di Pearson
-    correlation, _ = stats.pearsonr(np.arange(len(values)), values)
+    values = np.asarray(portfolio_values, dtype=np.float64).reshape(-1, 1)
+    metrics = calculate_linearity_metrics_matrix(values)
     
-    # Deviazione standard dei residui (normalizzata)
-    residuals = values - y_pred
-    residual_std = np.std(residuals) / np.mean(values) if np.mean(values) != 0 else float('inf')
+    return {name: float(column[0]) for name, column in metrics.items()}
+
+
+def calculate_linearity_metrics_matrix(values_matrix: Union[np.ndarray, pd.DataFrame]) -> Union[Dict[str, np.ndarray], pd.DataFrame]:
+    """
+    Calcola le metriche di linearità per più equity curve contemporaneamente.
     
-    # Score di linearità combinato (R² pesato per correlazione positiva)
-    linearity_score = r_squared * max(0, correlation)
+    Parameters:
+    -----------
+    values_matrix : Union[np.ndarray, pd.DataFrame]
+        Matrice dei valori [giorni, equity curve]
+        
+    Returns:
+    --------
+    Union[Dict[str, np.ndarray], pd.DataFrame]
+        Stesse metriche di calculate_linearity_metrics (r_squared, correlation,
+        linearity_score, slope, residual_std), una per equity curve: dizionario
+        di array per input numpy, DataFrame (una riga per colonna) per input DataFrame
+        
+    Notes:
+    ------
+    - Regressione sul tempo x = 0..n-1 in forma chiusa con somme centrate:
+      slope = Sxy / Sxx, R² = 1 - SSres / Syy, correlazione = Sxy / sqrt(Sxx * Syy)
+    - Una sola regressione per curva (prima: LinearRegression + pearsonr)
+    - Curve costanti: R² = 1, correlazione NaN, linearity_score = 0
+    - Con meno di 10 osservazioni restituisce i valori di default
+    """
+    values = np.asarray(values_matrix, dtype=np.float64)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    n_days, n_curves = values.shape
+    
+    if n_days < 10:
+        metrics = {
+            'r_squared': np.zeros(n_curves),
+            'correlation': np.zeros(n_curves),
+            'linearity_score': np.zeros(n_curves),
+            'slope': np.zeros(n_curves),
+            'residual_std': np.full(n_curves, np.inf)
+        }
+    else:
+        # Somme centrate su tempo e valori
+        x_centered = np.arange(n_days, dtype=np.float64) - (n_days - 1) / 2
+        means = values.mean(axis=0)
+        y_centered = values - means
+        sxx = n_days * (n_days ** 2 - 1) / 12.0
+        sxy = x_centered @ y_centered
+        syy = np.einsum('ij,ij->j', y_centered, y_centered)
+        
+        slope = sxy / sxx
+        residuals = y_centered - np.outer(x_centered, slope)
+        ss_res = np.einsum('ij,ij->j', residuals, residuals)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Come r2_score: con Syy = 0 vale 1 se la previsione è perfetta, altrimenti 0
+            r_squared = np.where(syy > 0, 1 - ss_res / syy, np.where(ss_res == 0, 1.0, 0.0))
+            correlation = np.where(syy > 0, sxy / np.sqrt(sxx * syy), np.nan)
+            residual_std = np.where(means != 0, np.sqrt(ss_res / n_days) / means, np.inf)
+        
+        # Score di linearità combinato (R² pesato per correlazione positiva)
+        positive_correlation = np.where(correlation > 0, correlation, 0.0)
+        
+        metrics = {
+            'r_squared': r_squared,
+            'correlation': correlation,
+            'linearity_score': r_squared * positive_correlation,
+            'slope': slope,
+            'residual_std': residual_std
+        }
     
-    return {
-        'r_squared': r_squared,
-        'correlation': correlation,
-        'linearity_score': linearity_score,
-        'slope': reg.coef_[0],
-        'residual_std': residual_std
-    }
+    if isinstance(values_matrix, pd.DataFrame):
+        return pd.DataFrame(metrics, index=values_matrix.columns)
+    return metrics
 
 
 def optimize_single_config_linearity(lookback: int, method: str, rebalancer) -> Optional[Dict[str, Any]]:
@@ -116,43 +157,17 @@ def optimize_single_config_linearity(lookback: int, method: str, rebalancer) ->
         Risultati dell'ottimizzazione con metriche di linearità o None se errore
         Contiene metriche standard + metriche di linearità
     """
-    try:
-        # Esegui backtest
-        result = rebalancer.backtest_strategy(lookback, method)
-        portfolio_data = result['portfolio_data']
-        
-        # Calcola metriche standard
-        total_ret, annual_ret, vol, sharpe, max_dd = calculate_performance_metrics(portfolio_data['returns'])
-        
-        # Calcola metriche di linearità
-        linearity_metrics = calculate_linearity_metrics(portfolio_data['value'])
-        
-        return {
-            'lookback': lookback,
-            'method': method,
-            'total_return': total_ret,
-            'annual_return': annual_ret,
-            'volatility': vol,
-            'sharpe_ratio': sharpe,
-            'max_drawdown': max_dd,
-            'final_value': result['final_value'],
-            'result': result,
-            # Metriche di linearità
-            'r_squared': linearity_metrics['r_squared'],
-            'correlation': linearity_metrics['correlation'],
-            'linearity_score': linearity_metrics['linearity_score'],
-            'slope': linearity_metrics['slope'],
-            'residual_std': linearity_metrics['residual_std']
-        }
-    except Exception as e:
-        print(f"Errore con lookback={lookback}, method={method}: {e}")
-        return None
+    from .optimization import optimize_single_config
+    
+    return optimize_single_config(lookback, method, rebalancer, include_linearity=True)
 
 
 def grid_search_optimization_linearity(rebalancer, 
                                      lookback_range: Optional[List[int]] = None,
                                      methods: Optional[List[str]] = None,
-                                     n_jobs: int = 1) -> pd.DataFrame:
+                                     n_jobs: int = 1,
+                                     keep_top_k: Optional[int] = 10,
+                                     calendars: Optional[List[Any]] = None) -> pd.DataFrame:
     """
     Grid search per trovare la configurazione con equity curve più lineare.
     
@@ -166,6 +181,11 @@ def grid_search_optimization_linearity(rebalancer,
         Lista dei metodi da testare
     n_jobs : int, default 1
         Numero di processi paralleli
+    keep_top_k : Optional[int], default 10
+        Numero di configurazioni (per linearity_score) di cui conservare il
+        risultato completo nella colonna 'result'; None = tutte
+    calendars : Optional[List[Any]], default None
+        Calendari di ribilanciamento da testare (vedi grid_search_optimization)
         
     Returns:
     --------
@@ -174,11 +194,13 @@ def grid_search_optimization_linearity(rebalancer,
         
     Notes:
     ------
-    - Utilizza le stesse configurazioni dell'ottimizzazione standard
+    - Utilizza le stesse configurazioni (e lo stesso backend parallelo) di
+      grid_search_optimization, con include_linearity=True
     - Ordina i risultati per linearity_score decrescente
     - Include tutte le metriche standard + metriche di linearità
+    - Fuori dal top keep_top_k la colonna 'result' è None (vedi get_config_result)
     """
-    from .optimization import _get_default_lookback_range, _get_default_methods
+    from .optimization import _get_default_lookback_range, _get_default_methods, grid_search_optimization
     
     # Usa parametri di default se non specificati
     if lookback_range is None:
@@ -187,44 +209,19 @@ def grid_search_optimization_linearity(rebalancer,
     if methods is None:
         methods = _get_default_methods()
     
-    # Crea tutte le combinazioni
-    configs = []
-    for lookback in lookback_range:
-        for method in methods:
-            configs.append((lookback, method, rebalancer))
-    
     print(f"🎯 Avvio ottimizzazione basata su LINEARITÀ...")
-    print(f"   Configurazioni da testare: {len(configs)}")
     print(f"   Obiettivo: Trovare equity curve più lineari possibili")
-    print(f"   Lookback range: {min(lookback_range)}-{max(lookback_range)} giorni")
-    print(f"   Metodi: {', '.join(methods)}")
-    
-    # Esegui ottimizzazione
-    results = []
-    for i, config in enumerate(configs):
-        if i % 10 == 0:
-            print(f"   Progresso: {i}/{len(configs)} ({i/len(configs)*100:.1f}%)")
-        result = optimize_single_config_linearity(*config)
-        if result:
-            results.append(result)
-    
-    # Filtra risultati validi
-    valid_results = [r for r in results if r is not None]
-    
-    if not valid_results:
-        print("❌ Nessun risultato valido trovato!")
-        return pd.DataFrame()
-    
-    # Converti in DataFrame
-    results_df = pd.DataFrame(valid_results)
-    
-    # Ordina per linearità (linearity_score)
-    results_df = results_df.sort_values('linearity_score', ascending=False)
-    
-    print(f"✅ Ottimizzazione per linearità completata!")
-    print(f"   Configurazioni valide: {len(results_df)}")
-    print(f"   Miglior linearity score: {results_df.iloc[0]['linearity_score']:.4f}")
-    print(f"   Migliore configurazione: {results_df.iloc[0]['method']} | Lookback {results_df.iloc[0]['lookback']}")
+    
+    # Stessa grid search (anche parallela) con ranking per linearity_score
+    results_df = grid_search_optimization(
+        rebalancer, lookback_range, methods, n_jobs=n_jobs, keep_top_k=keep_top_k,
+        include_linearity=True, rank_by='linearity_score', calendars=calendars
+    )
+    
+    if len(results_df) > 0:
+        print(f"✅ Ottimizzazione per linearità completata!")
+        print(f"   Miglior linearity score: {results_df.iloc[0]['linearity_score']:.4f}")
+        print(f"   Migliore configurazione: {results_df.iloc[0]['method']} | Lookback {results_df.iloc[0]['lookback']}")
     
     return results_df
 
@@ -10,19 +10,39 @@ Functions:
 - optimize_single_config: Optimize a single configuration of lookback and method
 - grid_search_optimization: Perform comprehensive grid search optimization
 - _get_default_parameters: Get default parameter ranges for optimization
+- _collect_top_k_results: Streams grid results keeping full results only for the top K
+- get_config_result: Returns (or lazily recomputes) the full result of a grid row
+  (including its rebalance calendar, when the grid spans several calendars)
+- _publish_shared_arrays / _load_shared_rebalancer: Memmap sharing of the returns
+  matrix with the parallel workers
 
 Author: Portfolio Optimization Team
 Version: 1.0.0
 """
 
+import os
+import heapq
+import shutil
+import tempfile
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, dump, load
 from .performance_metrics import calculate_performance_metrics
+from .linearity_analysis import calculate_linearity_metrics
+from .calendars import describe_calendar
 
 
-def optimize_single_config(lookback: int, method: str, rebalancer) -> Optional[Dict[str, Any]]:
+# Colonne prodotte da calculate_linearity_metrics
+_LINEARITY_COLUMNS = ('r_squared', 'correlation', 'linearity_score', 'slope', 'residual_std')
+
+# Rebalancer ricostruito nel processo worker sui dati condivisi (percorso -> istanza)
+_SHARED_REBALANCER_CACHE: Dict[str, Any] = {}
+
+
+def optimize_single_config(lookback: int, method: str, rebalancer,
+                           include_linearity: bool = False,
+                           rebalance_calendar: Any = None) -> Optional[Dict[str, Any]]:
     """
     Ottimizza una singola configurazione di lookback e metodo.
     
@@ -34,24 +54,37 @@ def optimize_single_config(lookback: int, method: str, rebalancer) -> Optional[D
         Metodo di ribilanciamento
     rebalancer : DynamicPortfolioRebalancer
         Istanza del rebalancer
+    include_linearity : bool, default False
+        Se True aggiunge le metriche di linearità dell'equity curve
+        (r_squared, correlation, linearity_score, slope, residual_std)
+    rebalance_calendar : Any, default None
+        Calendario di ribilanciamento (vedi calendars.get_rebalance_indices).
+        Se None usa quello di default del rebalancer ('W-SUN') e non aggiunge
+        la colonna 'rebalance_calendar'
     
     Returns:
     --------
     Optional[Dict[str, Any]]
         Dizionario con i risultati dell'ottimizzazione o None se errore
         Contiene: lookback, method, metriche di performance, result completo
+        (e metriche di linearità e calendario se richiesti)
     """
     try:
         # Esegui backtest
-        result = rebalancer.backtest_strategy(lookback, method)
+        if rebalance_calendar is None:
+            result = rebalancer.backtest_strategy(lookback, method)
+        else:
+            result = rebalancer.backtest_strategy(lookback, method,
+                                                  rebalance_calendar=rebalance_calendar)
         portfolio_data = result['portfolio_data']
         
         # Calcola metriche di performance
         total_ret, annual_ret, vol, sharpe, max_dd = calculate_performance_metrics(portfolio_data['returns'])
         
-        return {
+        row = {
             'lookback': lookback,
             'method': method,
+            **({} if rebalance_calendar is None else {'rebalance_calendar': rebalance_calendar}),
             'total_return': total_ret,
             'annual_return': annual_ret,
             'volatility': vol,
@@ -60,15 +93,26 @@ def optimize_single_config(lookback: int, method: str, rebalancer) -> Optional[D
             'final_value': result['final_value'],
             'result': result
         }
+        
+        if include_linearity:
+            # Metriche di linearità sullo stesso backtest
+            row.update(calculate_linearity_metrics(portfolio_data['value']))
+        
+        return row
     except Exception as e:
-        print(f"Errore con lookback={lookback}, method={method}: {e}")
+        calendar_info = '' if rebalance_calendar is None else f", calendar={describe_calendar(rebalance_calendar)}"
+        print(f"Errore con lookback={lookback}, method={method}{calendar_info}: {e}")
         return None
 
 
 def grid_search_optimization(rebalancer, 
                            lookback_range: Optional[List[int]] = None,
                            methods: Optional[List[str]] = None,
-                           n_jobs: int = 1) -> pd.DataFrame:
+                           n_jobs: int = 1,
+                           keep_top_k: Optional[int] = 10,
+                           include_linearity: bool = False,
+                           rank_by: str = 'sharpe_ratio',
+                           calendars: Optional[List[Any]] = None) -> pd.DataFrame:
     """
     Esegue grid search parallelo per trovare i migliori parametri di portfolio.
     
@@ -82,18 +126,37 @@ def grid_search_optimization(rebalancer,
         Lista dei metodi da testare. Se None, usa metodi di default
     n_jobs : int, default 1
         Numero di processi paralleli (1 = sequenziale)
+    keep_top_k : Optional[int], default 10
+        Numero di configurazioni (secondo rank_by) di cui conservare il
+        risultato completo nella colonna 'result'; None = tutte
+    include_linearity : bool, default False
+        Se True calcola anche le metriche di linearità dallo stesso backtest
+    rank_by : str, default 'sharpe_ratio'
+        Metrica (più alto = migliore) usata per ordinare i risultati e per il
+        top K, es. 'sharpe_ratio' o 'linearity_score'
+    calendars : Optional[List[Any]], default None
+        Calendari di ribilanciamento da testare come ulteriore dimensione della
+        griglia (es. ['D', 'W-SUN', 'MS', 5]). Se None usa solo il calendario
+        di default e il DataFrame non ha la colonna 'rebalance_calendar'
     
     Returns:
     --------
     pd.DataFrame
         DataFrame con i risultati di tutte le configurazioni testate,
-        ordinato per Sharpe ratio decrescente
+        ordinato per rank_by decrescente
     
     Notes:
     ------
-    - Se n_jobs > 1, utilizza joblib per parallelizzazione
+    - Se n_jobs > 1, utilizza joblib per parallelizzazione: matrice dei rendimenti
+      e somme prefisse vengono salvate una volta in un memmap temporaneo e ogni
+      worker ricostruisce un rebalancer leggero su di essi
     - Filtra automaticamente i risultati non validi
     - Include parametri di default ottimali se non specificati
+    - Con include_linearity (o rank_by su una metrica di linearità) Sharpe e
+      linearità sono calcolati dallo stesso backtest in un'unica passata
+    - Le metriche scalari sono conservate per tutte le configurazioni, il
+      risultato completo solo per le migliori keep_top_k (le altre hanno
+      'result' = None e possono essere ricalcolate con get_config_result)
     """
     # Usa parametri di default se non specificati
     if lookback_range is None:
@@ -102,36 +165,50 @@ def grid_search_optimization(rebalancer,
     if methods is None:
         methods = _get_default_methods()
     
+    if rank_by in _LINEARITY_COLUMNS:
+        include_linearity = True
+    
     # Crea tutte le combinazioni di parametri
+    calendar_range = [None] if calendars is None else list(calendars)
     configs = []
     for lookback in lookback_range:
         for method in methods:
-            configs.append((lookback, method, rebalancer))
+            for calendar in calendar_range:
+                configs.append((lookback, method, calendar))
     
     print(f"🔍 Avvio ottimizzazione grid search...")
     print(f"   Configurazioni da testare: {len(configs)}")
     print(f"   Lookback range: {min(lookback_range)}-{max(lookback_range)} giorni")
     print(f"   Metodi: {', '.join(methods)}")
+    if calendars is not None:
+        print(f"   Calendari: {', '.join(describe_calendar(c) for c in calendar_range)}")
     print(f"   Parallelizzazione: {'Sì' if n_jobs > 1 else 'No'} ({n_jobs} processi)")
     
     # Esegui ottimizzazione
     if n_jobs > 1:
         print("   Esecuzione in parallelo...")
-        results = Parallel(n_jobs=n_jobs, verbose=1)(
-            delayed(optimize_single_config)(*config) for config in configs
-        )
+        # Pubblica la matrice una sola volta: ai worker arrivano solo (lookback, method)
+        temp_dir = tempfile.mkdtemp(prefix='portfolio_grid_')
+        try:
+            shared_path = _publish_shared_arrays(rebalancer, temp_dir)
+            results = Parallel(n_jobs=n_jobs, verbose=1, return_as='generator')(
+                delayed(_optimize_single_config_shared)(lookback, method, shared_path,
+                                                        include_linearity, calendar)
+                for lookback, method, calendar in configs
+            )
+            valid_results = _collect_top_k_results(results, rank_by, keep_top_k)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
     else:
         print("   Esecuzione sequenziale...")
-        results = []
-        for i, config in enumerate(configs):
-            if i % 10 == 0:
-                print(f"   Progresso: {i}/{len(configs)} ({i/len(configs)*100:.1f}%)")
-            result = optimize_single_config(*config)
-            if result:
-                results.append(result)
-    
-    # Filtra risultati validi
-    valid_results = [r for r in results if r is not None]
+        
+        def _run_sequential():
+            for i, (lookback, method, calendar) in enumerate(configs):
+                if i % 10 == 0:
+                    print(f"   Progresso: {i}/{len(configs)} ({i/len(configs)*100:.1f}%)")
+                yield optimize_single_config(lookback, method, rebalancer, include_linearity, calendar)
+        
+        valid_results = _collect_top_k_results(_run_sequential(), rank_by, keep_top_k)
     
     if not valid_results:
         print("❌ Nessun risultato valido trovato!")
@@ -140,17 +217,189 @@ def grid_search_optimization(rebalancer,
     # Converti in DataFrame
     results_df = pd.DataFrame(valid_results)
     
-    # Ordina per Sharpe ratio decrescente
-    results_df = results_df.sort_values('sharpe_ratio', ascending=False)
+    # Ordina per la metrica di ranking decrescente
+    results_df = results_df.sort_values(rank_by, ascending=False)
     
     print(f"✅ Ottimizzazione completata!")
     print(f"   Configurazioni valide: {len(results_df)}")
-    print(f"   Miglior Sharpe ratio: {results_df.iloc[0]['sharpe_ratio']:.3f}")
+    print(f"   Miglior Sharpe ratio: {results_df['sharpe_ratio'].max():.3f}")
+    if include_linearity:
+        print(f"   Miglior linearity score: {results_df['linearity_score'].max():.4f}")
     print(f"   Migliore configurazione: {results_df.iloc[0]['method']} | Lookback {results_df.iloc[0]['lookback']}")
     
     return results_df
 
 
+def _collect_top_k_results(results, metric: str, keep_top_k: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Consuma i risultati della grid search man mano che arrivano, conservando
+    il risultato completo solo per le migliori keep_top_k configurazioni.
+    
+    Parameters:
+    -----------
+    results : Iterable[Optional[Dict[str, Any]]]
+        Risultati di optimize_single_config (None = configurazione fallita)
+    metric : str
+        Metrica di ranking (valori più alti sono migliori)
+    keep_top_k : Optional[int]
+        Numero di risultati completi da conservare; None = tutti
+    
+    Returns:
+    --------
+    List[Dict[str, Any]]
+        Righe valide con le metriche scalari; 'result' è None fuori dal top K
+        
+    Notes:
+    ------
+    Un min-heap di dimensione K tiene i risultati completi: la memoria resta
+    limitata indipendentemente dalla dimensione della griglia.
+    """
+    rows = []
+    heap = []  # (metrica, indice riga, result)
+    
+    for row in results:
+        if row is None:
+            continue
+        full_result = row.get('result')
+        row['result'] = None
+        rows.append(row)
+        
+        if keep_top_k is None:
+            row['result'] = full_result
+            continue
+        if keep_top_k <= 0:
+            continue
+        
+        score = row[metric]
+        score = -np.inf if score is None or np.isnan(score) else score
+        entry = (score, -(len(rows) - 1), full_result)
+        if len(heap) < keep_top_k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    
+    for _, neg_index, full_result in heap:
+        rows[-neg_index]['result'] = full_result
+    
+    return rows
+
+
+def get_config_result(rebalancer, row) -> Dict[str, Any]:
+    """
+    Restituisce il risultato completo di una riga della grid search,
+    ricalcolandolo se non è stato conservato (fuori dal top K).
+    
+    Parameters:
+    -----------
+    rebalancer : DynamicPortfolioRebalancer
+        Istanza del rebalancer usata per la grid search
+    row : pd.Series or Dict[str, Any]
+        Riga del DataFrame dei risultati (servono 'lookback' e 'method',
+        più 'rebalance_calendar' se presente)
+    
+    Returns:
+    --------
+    Dict[str, Any]
+        Risultato di backtest_strategy per la configurazione della riga
+    """
+    result = row.get('result')
+    if result is not None:
+        return result
+    calendar = row.get('rebalance_calendar')
+    if calendar is None:
+        return rebalancer.backtest_strategy(int(row['lookback']), row['method'])
+    return rebalancer.backtest_strategy(int(row['lookback']), row['method'],
+                                        rebalance_calendar=calendar)
+
+
+def _publish_shared_arrays(rebalancer, folder: str) -> str:
+    """
+    Salva matrice dei rendimenti, somme prefisse, date, nomi delle strategie
+    e cartella della cache backtest in un file joblib apribile in memmap dai worker.
+    
+    Parameters:
+    -----------
+    rebalancer : DynamicPortfolioRebalancer
+        Istanza del rebalancer da condividere
+    folder : str
+        Cartella temporanea in cui salvare il file
+    
+    Returns:
+    --------
+    str
+        Percorso del file da passare ai worker
+    """
+    shared_path = os.path.join(folder, 'rebalancer_arrays.joblib')
+    dump({
+        'returns_matrix': np.ascontiguousarray(rebalancer.returns_matrix, dtype=np.float64),
+        'prefix_stats': rebalancer._get_prefix_statistics(),
+        'dates': np.asarray(rebalancer.dates.values),
+        'strategy_names': list(rebalancer.strategy_names),
+        'cache_dir': rebalancer.cache_dir
+    }, shared_path)
+    return shared_path
+
+
+def _load_shared_rebalancer(shared_path: str):
+    """
+    Restituisce il rebalancer costruito sui dati condivisi, creandolo una sola
+    volta per processo worker.
+    
+    Parameters:
+    -----------
+    shared_path : str
+        Percorso del file creato da _publish_shared_arrays
+    
+    Returns:
+    --------
+    DynamicPortfolioRebalancer
+        Rebalancer in sola lettura sugli array in memmap
+    """
+    from .portfolio_rebalancer import DynamicPortfolioRebalancer
+    
+    rebalancer = _SHARED_REBALANCER_CACHE.get(shared_path)
+    if rebalancer is None:
+        arrays = load(shared_path, mmap_mode='r')
+        rebalancer = DynamicPortfolioRebalancer.from_arrays(
+            arrays['returns_matrix'], arrays['dates'], arrays['strategy_names'],
+            prefix_stats=tuple(arrays['prefix_stats']), verbose=False,
+            cache_dir=arrays['cache_dir']
+        )
+        # Tieni solo i dati della grid search corrente
+        _SHARED_REBALANCER_CACHE.clear()
+        _SHARED_REBALANCER_CACHE[shared_path] = rebalancer
+    return rebalancer
+
+
+def _optimize_single_config_shared(lookback: int, method: str, shared_path: str,
+                                   include_linearity: bool = False,
+                                   rebalance_calendar: Any = None) -> Optional[Dict[str, Any]]:
+    """
+    Variante di optimize_single_config per i worker paralleli: riceve solo il
+    percorso dei dati condivisi invece dell'intero rebalancer.
+    
+    Parameters:
+    -----------
+    lookback : int
+        Periodo di lookback in giorni
+    method : str
+        Metodo di ribilanciamento
+    shared_path : str
+        Percorso del file creato da _publish_shared_arrays
+    include_linearity : bool, default False
+        Se True aggiunge le metriche di linearità
+    rebalance_calendar : Any, default None
+        Calendario di ribilanciamento (None = default del rebalancer)
+    
+    Returns:
+    --------
+    Optional[Dict[str, Any]]
+        Come optimize_single_config
+    """
+    return optimize_single_config(lookback, method, _load_shared_rebalancer(shared_path),
+                                  include_linearity, rebalance_calendar)
+
+
 def _get_default_lookback_range() -> List[int]:
     """
     Restituisce il range di default per i periodi di lookback.
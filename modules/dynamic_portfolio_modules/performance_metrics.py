@@ -8,11 +8,14 @@ including returns, volatility, Sharpe ratio, and maximum drawdown.
 Functions:
 ----------
 - calculate_performance_metrics: Main function to calculate all performance metrics
+- calculate_performance_metrics_matrix: Same metrics for every column of a returns matrix
 - calculate_total_return: Calculate total return over period
 - calculate_annual_return: Calculate annualized return
 - calculate_volatility: Calculate annualized volatility
 - calculate_sharpe_ratio: Calculate Sharpe ratio
 - calculate_max_drawdown: Calculate maximum drawdown
+- calculate_rolling_metrics: Rolling metrics for a single return series
+- calculate_rolling_metrics_matrix: Rolling metrics for all columns of a returns DataFrame
 
 Author: Portfolio Optimization Team
 Version: 1.0.0
@@ -20,7 +23,8 @@ Version: 1.0.0
 
 import numpy as np
 import pandas as pd
-from typing import Tuple
+from numba import jit
+from typing import Tuple, Dict, Union
 
 
 def calculate_performance_metrics(returns_series: pd.Series) -> Tuple[float, float, float, float, float]:
@@ -62,6 +66,66 @@ def calculate_performance_metrics(returns_series: pd.Series) -> Tuple[float, flo
     return total_return, annual_return, volatility, sharpe_ratio, max_drawdown
 
 
+def calculate_performance_metrics_matrix(returns_matrix: Union[np.ndarray, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Calcola le metriche di performance per tutte le colonne di una matrice di rendimenti.
+    
+    Parameters:
+    -----------
+    returns_matrix : Union[np.ndarray, pd.DataFrame]
+        Rendimenti giornalieri [giorni, curve] (strategie, configurazioni, ...)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Una riga per colonna (indice = colonne del DataFrame o 0..N-1) con
+        total_return, annual_return, volatility, sharpe_ratio, max_drawdown
+        
+    Notes:
+    ------
+    - Stesse formule di calculate_performance_metrics, con riduzioni numpy
+      sull'asse dei giorni e un unico passaggio compilato per il drawdown
+    - Con meno di 5 osservazioni tutte le metriche valgono 0
+    """
+    returns = np.asarray(returns_matrix, dtype=np.float64)
+    if returns.ndim == 1:
+        returns = returns.reshape(-1, 1)
+    n_days, n_curves = returns.shape
+    index = returns_matrix.columns if isinstance(returns_matrix, pd.DataFrame) else None
+    columns = ['total_return', 'annual_return', 'volatility', 'sharpe_ratio', 'max_drawdown']
+    
+    if n_days < 5:
+        return pd.DataFrame(0.0, index=index if index is not None else range(n_curves), columns=columns)
+    
+    total_return = np.prod(1 + returns, axis=0) - 1
+    n_years = n_days / 252
+    annual_return = (1 + total_return) ** (1 / n_years) - 1
+    volatility = np.std(returns, axis=0) * np.sqrt(252)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratio = np.where(volatility > 0, annual_return / volatility, 0.0)
+    max_drawdown = _max_drawdown_columns(np.ascontiguousarray(returns))
+    
+    return pd.DataFrame({
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown
+    }, index=index)
+
+
+@jit(nopython=True)
+def _max_drawdown_columns(returns):
+    """
+    Massimo drawdown di ogni colonna della matrice dei rendimenti.
+    """
+    n_days, n_curves = returns.shape
+    max_drawdown = np.zeros(n_curves)
+    for j in range(n_curves):
+        max_drawdown[j] = _max_drawdown_window(returns[:, j], 0, n_days)
+    return max_drawdown
+
+
 def calculate_total_return(returns: np.ndarray) -> float:
     """
     Calcola il rendimento totale per l'intero periodo.
@@ -171,7 +235,9 @@ def calculate_max_drawdown(returns: np.ndarray) -> float:
     
     Notes:
     ------
-    Il drawdown è calcolato come (valore_corrente - picco_precedente) / picco_precedente
+    - Il drawdown è calcolato come (valore_corrente - picco_precedente) / picco_precedente
+    - Con un picco <= 0 (perdita totale dal primo giorno) il drawdown non è
+      definito e viene restituito NaN
     """
     if len(returns) == 0:
         return 0.0
@@ -181,6 +247,8 @@ def calculate_max_drawdown(returns: np.ndarray) -> float:
     
     # Calcola i picchi raggiunti fino ad ogni punto
     peak = np.maximum.accumulate(cumulative)
+    if np.any(peak <= 0):
+        return np.nan
     
     # Calcola il drawdown in ogni punto
     drawdown = (cumulative - peak) / peak
@@ -203,24 +271,144 @@ def calculate_rolling_metrics(returns_series: pd.Series, window: int = 252) -> p
     Returns:
     --------
     pd.DataFrame
-        DataFrame con metriche rolling: sharpe, volatility, rolling_return
+        DataFrame con metriche rolling: sharpe, volatility, rolling_return,
+        max_drawdown, sortino, calmar (vedi calculate_rolling_metrics_matrix)
     """
+    metrics = calculate_rolling_metrics_matrix(returns_series.to_frame(), window)
+    
     result_df = pd.DataFrame(index=returns_series.index)
+    for name, metric_df in metrics.items():
+        result_df[name] = metric_df.iloc[:, 0]
+    
+    return result_df
+
+
+def calculate_rolling_metrics_matrix(returns_df: pd.DataFrame, window: int = 252) -> Dict[str, pd.DataFrame]:
+    """
+    Calcola metriche di performance rolling per tutte le colonne di un DataFrame di rendimenti.
+    
+    Parameters:
+    -----------
+    returns_df : pd.DataFrame
+        DataFrame dei rendimenti giornalieri [giorni, strategie]
+    window : int, default 252
+        Finestra per il calcolo rolling (giorni)
     
-    # Rolling Sharpe ratio
-    rolling_mean = returns_series.rolling(window=window).mean() * 252
-    rolling_std = returns_series.rolling(window=window).std() * np.sqrt(252)
-    result_df['sharpe'] = rolling_mean / rolling_std
+    Returns:
+    --------
+    Dict[str, pd.DataFrame]
+        Dizionario metrica -> DataFrame (stesso indice e colonne di returns_df):
+        - 'sharpe': media rolling annualizzata / volatilità rolling
+        - 'volatility': deviazione standard rolling annualizzata
+        - 'rolling_return': rendimento composto della finestra
+        - 'max_drawdown': massimo drawdown all'interno della finestra
+        - 'sortino': media rolling annualizzata / downside deviation annualizzata
+        - 'calmar': rendimento annualizzato della finestra / |max_drawdown|
+        
+    Notes:
+    ------
+    - Le prime window - 1 righe sono NaN, così come le finestre con NaN
+    - Il rendimento composto usa somme prefisse di log(1 + r): O(1) per finestra
+    - Il max drawdown rolling è calcolato da un kernel numba su tutte le colonne
+    - La downside deviation è sqrt(media(min(r, 0)^2)) sulla finestra
+    """
+    returns = np.ascontiguousarray(returns_df.values, dtype=np.float64)
     
-    # Rolling volatility
-    result_df['volatility'] = rolling_std
+    # Media e volatilità rolling (annualizzate)
+    rolling_mean = returns_df.rolling(window=window).mean() * 252
+    rolling_std = returns_df.rolling(window=window).std() * np.sqrt(252)
+    downside = np.sqrt(returns_df.clip(upper=0).pow(2).rolling(window=window).mean()) * np.sqrt(252)
     
-    # Rolling return
-    result_df['rolling_return'] = returns_series.rolling(window=window).apply(
-        lambda x: np.prod(1 + x) - 1, raw=True
-    )
+    rolling_return, rolling_max_dd = _rolling_return_drawdown_kernel(returns, window)
+    rolling_return = pd.DataFrame(rolling_return, index=returns_df.index, columns=returns_df.columns)
+    rolling_max_dd = pd.DataFrame(rolling_max_dd, index=returns_df.index, columns=returns_df.columns)
     
-    return result_df
+    # Calmar: rendimento annualizzato della finestra rispetto al drawdown
+    annualized_return = (1 + rolling_return) ** (252 / window) - 1
+    calmar = annualized_return / rolling_max_dd.abs().where(rolling_max_dd < 0)
+    
+    return {
+        'sharpe': rolling_mean / rolling_std,
+        'volatility': rolling_std,
+        'rolling_return': rolling_return,
+        'max_drawdown': rolling_max_dd,
+        'sortino': rolling_mean / downside,
+        'calmar': calmar
+    }
+
+
+@jit(nopython=True)
+def _max_drawdown_window(returns, start, end):
+    """
+    Massimo drawdown della curva cumprod(1 + r) sui rendimenti [start, end),
+    con la stessa definizione di calculate_max_drawdown (NaN se il picco è
+    <= 0, cioè la finestra parte da una perdita totale).
+    """
+    cumulative = 1.0
+    peak = 0.0
+    max_drawdown = 0.0
+    for i in range(start, end):
+        cumulative *= 1 + returns[i]
+        if i == start or cumulative > peak:
+            peak = cumulative
+        if peak <= 0:
+            return np.nan
+        drawdown = (cumulative - peak) / peak
+        if drawdown < max_drawdown:
+            max_drawdown = drawdown
+    return max_drawdown
+
+
+@jit(nopython=True)
+def _rolling_return_drawdown_kernel(returns, window):
+    """
+    Rendimento composto e massimo drawdown rolling per ogni colonna.
+    
+    Parameters:
+    -----------
+    returns : np.ndarray
+        Matrice dei rendimenti [giorni, strategie]
+    window : int
+        Finestra rolling
+    
+    Returns:
+    --------
+    tuple
+        (rolling_return, rolling_max_drawdown), matrici [giorni, strategie]
+        con NaN nelle prime window - 1 righe e nelle finestre con NaN
+    """
+    n_days, n_assets = returns.shape
+    rolling_return = np.full((n_days, n_assets), np.nan)
+    rolling_max_dd = np.full((n_days, n_assets), np.nan)
+    log_prefix = np.zeros(n_days + 1)
+    special_prefix = np.zeros(n_days + 1, dtype=np.int64)
+    
+    for j in range(n_assets):
+        # Prefissi di log(1 + r); NaN e r <= -1 sono contati a parte
+        for t in range(n_days):
+            r = returns[t, j]
+            if np.isnan(r) or r <= -1:
+                log_prefix[t + 1] = log_prefix[t]
+                special_prefix[t + 1] = special_prefix[t] + 1
+            else:
+                log_prefix[t + 1] = log_prefix[t] + np.log1p(r)
+                special_prefix[t + 1] = special_prefix[t]
+        
+        for t in range(window - 1, n_days):
+            start = t - window + 1
+            if special_prefix[t + 1] > special_prefix[start]:
+                # Finestra con NaN o perdite totali: prodotto diretto
+                product = 1.0
+                for i in range(start, t + 1):
+                    product *= 1 + returns[i, j]
+                rolling_return[t, j] = product - 1
+                if np.isnan(product):
+                    continue
+            else:
+                rolling_return[t, j] = np.exp(log_prefix[t + 1] - log_prefix[start]) - 1
+            rolling_max_dd[t, j] = _max_drawdown_window(returns[:, j], start, t + 1)
+    
+    return rolling_return, rolling_max_dd
 
 
 def calculate_risk_metrics(returns_series: pd.Series, confidence_level: float = 0.05) -> dict:
@@ -3,7 +3,8 @@ Portfolio Rebalancer Module for Dynamic Portfolio Optimization
 ==============================================================
 
 This module contains the main DynamicPortfolioRebalancer class that implements
-various portfolio rebalancing strategies with automatic Sunday rebalancing.
+various portfolio rebalancing strategies with configurable rebalance calendars
+(Sunday rebalancing by default).
 
 Classes:
 --------
@@ -13,16 +14,33 @@ Author: Portfolio Optimization Team
 Version: 1.0.0
 """
 
+import os
+import pickle
+import hashlib
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from .covariance import COVARIANCE_METHODS, calculate_covariance_weights_batch
+from .correlation import StrategyClusterer
+from .calendars import DEFAULT_CALENDAR, get_rebalance_indices, calendar_cache_key
 from .utils import (
-    calculate_momentum_weights,
-    calculate_sharpe_momentum_weights, 
-    calculate_top_n_ranking_weights
+    calculate_prefix_statistics,
+    calculate_momentum_weights_from_prefix,
+    calculate_sharpe_momentum_weights_from_prefix,
+    calculate_top_n_ranking_weights_from_prefix,
+    calculate_equal_weights_from_prefix,
+    calculate_risk_parity_weights_from_prefix,
+    calculate_portfolio_performance_kernel,
+    _window_cum_returns
 )
 
 
+# Versione del formato dei risultati in cache: va incrementata quando cambia
+# il contenuto di backtest_strategy, così i file su disco vengono ricalcolati
+CACHE_VERSION = 1
+
+
 class DynamicPortfolioRebalancer:
     """
     Classe principale per il ribilanciamento dinamico del portfolio.
@@ -40,9 +58,14 @@ class DynamicPortfolioRebalancer:
         Matrice numpy dei rendimenti [giorni, strategie]
     dates : pd.DatetimeIndex
         Indice delle date
+    cache_size : int
+        Numero massimo di backtest conservati nella cache LRU in memoria
+    cache_dir : Optional[str]
+        Cartella della cache su disco dei backtest (None = disattivata)
     """
     
-    def __init__(self, returns_df: pd.DataFrame):
+    def __init__(self, returns_df: pd.DataFrame, verbose: bool = True,
+                 cache_size: int = 128, cache_dir: Optional[str] = None):
         """
         Inizializza il rebalancer usando il DataFrame dei rendimenti combinato.
         
@@ -50,6 +73,13 @@ class DynamicPortfolioRebalancer:
         -----------
         returns_df : pd.DataFrame
             DataFrame con i rendimenti di ogni strategia
+        verbose : bool, default True
+            Se True stampa il riepilogo di inizializzazione
+        cache_size : int, default 128
+            Numero di backtest conservati in memoria (0 = nessuna cache in memoria)
+        cache_dir : Optional[str], default None
+            Cartella in cui salvare i backtest su disco, condivisa tra sessioni
+            e processi; None = solo cache in memoria
             
         Notes:
         ------
@@ -68,12 +98,71 @@ class DynamicPortfolioRebalancer:
         self.returns_matrix = self.returns_df.values  # [giorni, strategie]
         self.dates = self.returns_df.index
         
-        print(f"Rebalancer inizializzato:")
-        print(f"  Matrice rendimenti: {self.returns_matrix.shape}")
-        print(f"  Periodo: da {self.dates.min()} a {self.dates.max()}")
-        print(f"  Strategie: {len(self.strategy_names)}")
+        # Somme prefisse condivise da tutti i lookback e metodi (calcolate al primo uso)
+        self._prefix_statistics = None
+        
+        # Clustering per correlazione (linkage in cache, creato al primo uso)
+        self._clusterer = None
+        
+        # Cache dei backtest: chiave = (configurazione, impronta dei dati)
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self._result_cache = OrderedDict()
+        self._data_fingerprint = None
+        
+        if verbose:
+            print(f"Rebalancer inizializzato:")
+            print(f"  Matrice rendimenti: {self.returns_matrix.shape}")
+            print(f"  Periodo: da {self.dates.min()} a {self.dates.max()}")
+            print(f"  Strategie: {len(self.strategy_names)}")
+    
+    @classmethod
+    def from_arrays(cls, returns_matrix: np.ndarray, dates, strategy_names: list,
+                    prefix_stats: Optional[tuple] = None,
+                    verbose: bool = False,
+                    cache_size: int = 128,
+                    cache_dir: Optional[str] = None) -> 'DynamicPortfolioRebalancer':
+        """
+        Crea un rebalancer direttamente da array numpy, senza copiare i dati.
+        
+        Parameters:
+        -----------
+        returns_matrix : np.ndarray
+            Matrice dei rendimenti [giorni, strategie] (anche memmap in sola lettura)
+        dates : array-like
+            Date corrispondenti alle righe della matrice
+        strategy_names : list
+            Nomi delle strategie (colonne della matrice)
+        prefix_stats : Optional[tuple], default None
+            Somme prefisse già calcolate (vedi calculate_prefix_statistics);
+            se None vengono calcolate al primo uso
+        verbose : bool, default False
+            Se True stampa il riepilogo di inizializzazione
+        cache_size : int, default 128
+            Numero di backtest conservati in memoria
+        cache_dir : Optional[str], default None
+            Cartella della cache su disco dei backtest
+        
+        Returns:
+        --------
+        DynamicPortfolioRebalancer
+            Rebalancer che lavora sugli array forniti
+            
+        Notes:
+        ------
+        Usato dai worker della grid search parallela per ricostruire una vista
+        leggera sui dati condivisi via memmap.
+        """
+        returns_df = pd.DataFrame(returns_matrix, index=pd.DatetimeIndex(dates),
+                                  columns=list(strategy_names), copy=False)
+        rebalancer = cls(returns_df, verbose=verbose, cache_size=cache_size, cache_dir=cache_dir)
+        rebalancer._prefix_statistics = prefix_stats
+        return rebalancer
     
-    def backtest_strategy(self, lookback_days: int, method: str = 'momentum') -> Dict[str, Any]:
+    def backtest_strategy(self, lookback_days: int, method: str = 'momentum',
+                          weight_drift: bool = False,
+                          rebalance_calendar: Any = DEFAULT_CALENDAR,
+                          dedup_threshold: Optional[float] = None) -> Dict[str, Any]:
         """
         Esegue il backtest della strategia di ribilanciamento specificata.
         
@@ -88,6 +177,20 @@ class DynamicPortfolioRebalancer:
             - 'top_n_ranking': Pesi uguali per le top N strategie
             - 'equal': Pesi uguali escludendo strategie in perdita
             - 'risk_parity': Pesi basati su risk parity
+            - 'min_variance': Portfolio long-only a varianza minima
+            - 'erc': Pesi a uguale contributo al rischio (equal risk contribution)
+            - 'hrp': Hierarchical risk parity
+        weight_drift : bool, default False
+            Se True i pesi derivano con i rendimenti tra un ribilanciamento
+            e l'altro invece di restare costanti
+        rebalance_calendar : Any, default 'W-SUN'
+            Calendario di ribilanciamento (vedi calendars.get_rebalance_indices):
+            'D', 'W-MON'...'W-SUN', 'MS', 'ME', ogni N barre (int) o lista di date
+        dedup_threshold : Optional[float], default None
+            Se impostata, ad ogni ribilanciamento le strategie con correlazione
+            >= soglia nel lookback vengono raggruppate e di ogni gruppo viene
+            mantenuta solo quella con rendimento cumulato più alto, prima del
+            calcolo dei pesi (es. 0.8); None = nessuna deduplicazione
         
         Returns:
         --------
@@ -98,6 +201,119 @@ class DynamicPortfolioRebalancer:
             - 'final_value': Valore finale del portfolio
             - 'lookback': Periodo di lookback utilizzato
             - 'method': Metodo di ribilanciamento utilizzato
+            - 'rebalance_calendar': Calendario di ribilanciamento utilizzato
+            
+        Notes:
+        ------
+        I risultati sono memorizzati per (lookback, metodo, deriva, calendario,
+        impronta dei dati): richiamare la stessa configurazione (es. grid search Sharpe, poi
+        linearità, poi grafici) restituisce lo stesso oggetto senza ricalcolo.
+        Il dizionario restituito è condiviso con la cache e non va modificato.
+        """
+        key = self._cache_key(lookback_days, method, weight_drift, rebalance_calendar, dedup_threshold)
+        result = self._get_cached_result(key)
+        if result is None:
+            result = self._run_backtest(lookback_days, method, weight_drift, rebalance_calendar,
+                                        dedup_threshold)
+            self._store_cached_result(key, result)
+        return result
+    
+    def clear_cache(self) -> None:
+        """
+        Svuota la cache in memoria dei backtest (la cache su disco non viene toccata).
+        """
+        self._result_cache.clear()
+    
+    def _data_fingerprint_hash(self) -> str:
+        """
+        Restituisce l'impronta SHA-1 di matrice dei rendimenti, date e nomi delle strategie.
+        
+        Returns:
+        --------
+        str
+            Hash esadecimale, calcolato una sola volta per istanza
+        """
+        if self._data_fingerprint is None:
+            digest = hashlib.sha1()
+            digest.update(str(self.returns_matrix.shape).encode())
+            digest.update(np.ascontiguousarray(self.returns_matrix, dtype=np.float64).tobytes())
+            digest.update(np.asarray(self.dates.values, dtype='datetime64[ns]').tobytes())
+            digest.update('\x00'.join(map(str, self.strategy_names)).encode())
+            self._data_fingerprint = digest.hexdigest()
+        return self._data_fingerprint
+    
+    def _cache_key(self, lookback_days: int, method: str, weight_drift: bool,
+                   rebalance_calendar: Any = DEFAULT_CALENDAR,
+                   dedup_threshold: Optional[float] = None) -> Tuple:
+        """
+        Costruisce la chiave di cache di una configurazione di backtest.
+        """
+        dedup_key = None if dedup_threshold is None else float(dedup_threshold)
+        return (CACHE_VERSION, int(lookback_days), method, bool(weight_drift),
+                calendar_cache_key(rebalance_calendar), dedup_key, self._data_fingerprint_hash())
+    
+    def _cache_path(self, key: Tuple) -> str:
+        """
+        Percorso del file di cache su disco associato a una chiave.
+        """
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"backtest_{name}.pkl")
+    
+    def _get_cached_result(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Cerca un backtest nella cache in memoria e poi, se attiva, su disco.
+        """
+        if key in self._result_cache:
+            self._result_cache.move_to_end(key)
+            return self._result_cache[key]
+        
+        if self.cache_dir:
+            path = self._cache_path(key)
+            if os.path.exists(path):
+                try:
+                    with open(path, 'rb') as f:
+                        result = pickle.load(f)
+                except Exception as e:
+                    print(f"⚠️ Cache backtest non leggibile ({path}): {e}")
+                    return None
+                self._remember_result(key, result)
+                return result
+        return None
+    
+    def _store_cached_result(self, key: Tuple, result: Dict[str, Any]) -> None:
+        """
+        Salva un backtest nella cache in memoria e, se attiva, su disco.
+        """
+        self._remember_result(key, result)
+        
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                path = self._cache_path(key)
+                # Scrittura atomica: più processi possono condividere la cartella
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except Exception as e:
+                print(f"⚠️ Impossibile salvare la cache backtest in {self.cache_dir}: {e}")
+    
+    def _remember_result(self, key: Tuple, result: Dict[str, Any]) -> None:
+        """
+        Inserisce un risultato nella cache LRU in memoria, rimuovendo il meno recente se piena.
+        """
+        if self.cache_size <= 0:
+            return
+        self._result_cache[key] = result
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self.cache_size:
+            self._result_cache.popitem(last=False)
+    
+    def _run_backtest(self, lookback_days: int, method: str, weight_drift: bool,
+                      rebalance_calendar: Any = DEFAULT_CALENDAR,
+                      dedup_threshold: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Esegue il backtest senza passare dalla cache (vedi backtest_strategy).
         """
         n_days = len(self.returns_matrix)
         
@@ -107,50 +323,23 @@ class DynamicPortfolioRebalancer:
             lookback_days = max(5, n_days // 10)  # Usa almeno 5 giorni di lookback
             print(f"Utilizzando lookback ridotto: {lookback_days}")
         
-        weights_history = []
-        rebalance_dates_idx = []
-        rebalance_dates = []
-        
-        # Trova date di ribilanciamento ogni domenica (weekday=6)
-        start_idx = lookback_days
-        while start_idx < n_days:
-            if self.dates[start_idx].weekday() == 6:  # 6 = domenica
-                break
-            start_idx += 1
-        
-        # Genera una sequenza di indici per il ribilanciamento ogni domenica
-        for i in range(start_idx, n_days, 7):  # Ogni 7 giorni dalla prima domenica
-            # Verifica che sia effettivamente una domenica (controllo aggiuntivo)
-            if self.dates[i].weekday() != 6:
-                # Se non è domenica, cerca la domenica più vicina nei 7 giorni successivi
-                for j in range(i, min(i + 7, n_days)):
-                    if self.dates[j].weekday() == 6:
-                        i = j
-                        break
-                else:
-                    continue  # Salta se non trova una domenica nei prossimi 7 giorni
-            
-            rebalance_dates_idx.append(i)
-            rebalance_dates.append(self.dates[i])
-            
-            # Calcola i pesi in base al metodo scelto
-            weights = self._calculate_weights(i, lookback_days, method)
-            weights_history.append(weights)
+        # Indici di ribilanciamento dal calendario (dopo il periodo di lookback)
+        rebalance_idx = get_rebalance_indices(self.dates, rebalance_calendar, start_idx=lookback_days)
         
-        # Verifica che ci siano pesi calcolati
-        if not weights_history:
+        # Calcola i pesi di tutte le date di ribilanciamento in una sola chiamata
+        if len(rebalance_idx) > 0:
+            eligible = None
+            if dedup_threshold is not None:
+                eligible = self._dedup_masks(rebalance_idx, lookback_days, dedup_threshold)
+            weights_history = self._calculate_weights_batch(rebalance_idx, lookback_days, method,
+                                                            eligible)
+        else:
             print("Nessun periodo di ribilanciamento trovato!")
-            weights_history = [np.ones(len(self.strategy_names)) / len(self.strategy_names)]
-            
-            if len(rebalance_dates_idx) == 0:
-                rebalance_dates_idx = [lookback_days]
-                rebalance_dates = [self.dates[lookback_days]]
-        
-        # Calcola performance
-        weights_history = np.array(weights_history)
+            weights_history = np.ones((1, len(self.strategy_names))) / len(self.strategy_names)
+            rebalance_idx = np.array([lookback_days], dtype=np.int64)
         
         portfolio_returns, portfolio_values = self._calculate_portfolio_performance(
-            self.returns_matrix, weights_history, rebalance_dates_idx
+            self.returns_matrix, weights_history, rebalance_idx, weight_drift
         )
         
         # Crea DataFrame con i risultati
@@ -163,7 +352,7 @@ class DynamicPortfolioRebalancer:
         weights_df = pd.DataFrame(
             weights_history, 
             columns=self.strategy_names,
-            index=rebalance_dates
+            index=self.dates[rebalance_idx]
         )
         
         return {
@@ -171,7 +360,9 @@ class DynamicPortfolioRebalancer:
             'weights': weights_df,
             'final_value': portfolio_values[-1],
             'lookback': lookback_days,
-            'method': method
+            'method': method,
+            'rebalance_calendar': rebalance_calendar,
+            'dedup_threshold': dedup_threshold
         }
     
     def _calculate_weights(self, current_day: int, lookback: int, method: str) -> np.ndarray:
@@ -192,152 +383,147 @@ class DynamicPortfolioRebalancer:
         np.ndarray
             Array dei pesi per ogni strategia
         """
+        return self._calculate_weights_batch(
+            np.array([current_day], dtype=np.int64), lookback, method
+        )[0]
+    
+    def _calculate_weights_batch(self, rebalance_idx: np.ndarray, lookback: int,
+                                 method: str, eligible: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calcola i pesi per tutte le date di ribilanciamento con una sola chiamata compilata,
+        usando le somme prefisse condivise del rebalancer.
+        
+        Parameters:
+        -----------
+        rebalance_idx : np.ndarray
+            Indici (int64) dei giorni di ribilanciamento
+        lookback : int
+            Periodo di lookback in giorni
+        method : str
+            Metodo di calcolo dei pesi
+        eligible : Optional[np.ndarray], default None
+            Maschera booleana [ribilanciamenti, strategie] delle strategie
+            ammesse (vedi _dedup_masks); None = tutte
+        
+        Returns:
+        --------
+        np.ndarray
+            Matrice dei pesi [ribilanciamenti, strategie]
+        """
+        prefix_stats = self._get_prefix_statistics()
+        
         if method == 'momentum':
-            # Passa SOLO i rendimenti del periodo lookback rilevante
-            relevant_returns = self.returns_matrix[max(0, current_day-lookback):current_day]
-            weights = calculate_momentum_weights(relevant_returns, lookback)
+            weights = calculate_momentum_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible)
         elif method == 'sharpe_momentum':
-            # Passa SOLO i rendimenti del periodo lookback rilevante
-            relevant_returns = self.returns_matrix[max(0, current_day-lookback):current_day]
-            weights = calculate_sharpe_momentum_weights(relevant_returns, lookback)
+            weights = calculate_sharpe_momentum_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible)
         elif method == 'top_n_ranking':
-            # Passa SOLO i rendimenti del periodo lookback rilevante
-            relevant_returns = self.returns_matrix[max(0, current_day-lookback):current_day]
-            weights = calculate_top_n_ranking_weights(relevant_returns, lookback)
+            weights = calculate_top_n_ranking_weights_from_prefix(prefix_stats, rebalance_idx, lookback,
+                                                                  eligible=eligible)
         elif method == 'equal':
-            weights = self._calculate_equal_weights_exclude_losing(current_day, lookback)
+            weights = calculate_equal_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible)
         elif method == 'risk_parity':
-            weights = self._calculate_risk_parity_weights(current_day, lookback)
+            weights = calculate_risk_parity_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible)
+        elif method in COVARIANCE_METHODS:
+            weights = calculate_covariance_weights_batch(
+                self.returns_matrix, rebalance_idx, lookback, method, prefix_stats=prefix_stats,
+                eligible=eligible
+            )
         else:
             # Default to equal weights
-            weights = np.ones(len(self.strategy_names)) / len(self.strategy_names)
+            weights = np.ones((len(rebalance_idx), len(self.strategy_names))) / len(self.strategy_names)
         
         return weights
     
-    def _calculate_portfolio_performance(self, returns_matrix: np.ndarray, 
-                                       weights_history: np.ndarray, 
-                                       rebalance_dates_idx: list) -> tuple:
+    def _dedup_masks(self, rebalance_idx: np.ndarray, lookback: int,
+                     threshold: float) -> np.ndarray:
         """
-        Calcola la performance del portfolio nel tempo.
+        Maschere delle strategie ammesse dopo la deduplicazione per correlazione.
         
         Parameters:
         -----------
-        returns_matrix : np.ndarray
-            Matrice dei rendimenti [giorni, strategie]
-        weights_history : np.ndarray
-            Storico dei pesi di ribilanciamento
-        rebalance_dates_idx : list
-            Indici delle date di ribilanciamento
+        rebalance_idx : np.ndarray
+            Indici (int64) dei giorni di ribilanciamento
+        lookback : int
+            Periodo di lookback in giorni
+        threshold : float
+            Correlazione minima per considerare due strategie duplicate
         
         Returns:
         --------
-        tuple
-            (portfolio_returns, portfolio_values)
+        np.ndarray
+            Maschera booleana [ribilanciamenti, strategie]; in ogni cluster resta
+            la strategia con rendimento cumulato più alto nel lookback
+            
+        Notes:
+        ------
+        Le linkage delle finestre restano in cache nel clusterer del rebalancer
+        e sono riusate da tutti i metodi e le soglie con lo stesso lookback.
         """
-        n_days = returns_matrix.shape[0]
-        portfolio_value = np.ones(n_days + 1)  # Includi valore iniziale = 1.0
-        portfolio_returns = np.zeros(n_days)
-        
-        current_weights = weights_history[0] if len(weights_history) > 0 else np.ones(returns_matrix.shape[1]) / returns_matrix.shape[1]
-        rebal_idx = 0
+        if self._clusterer is None:
+            self._clusterer = StrategyClusterer(self.returns_matrix)
         
-        for day in range(n_days):
-            # Ribilancia se necessario
-            if day in rebalance_dates_idx and rebal_idx < len(weights_history):
-                current_weights = weights_history[rebal_idx]
-                rebal_idx += 1
-            
-            # Calcola rendimento giornaliero del portfolio
-            daily_return = np.dot(current_weights, returns_matrix[day])
-            portfolio_returns[day] = daily_return
-            portfolio_value[day + 1] = portfolio_value[day] * (1 + daily_return)
+        log_prefix, ruin_prefix, _, _ = self._get_prefix_statistics()
+        scores = np.zeros((len(rebalance_idx), len(self.strategy_names)))
+        for k, day in enumerate(rebalance_idx):
+            if day >= lookback:
+                scores[k] = _window_cum_returns(log_prefix, ruin_prefix, day - lookback, day)
         
-        return portfolio_returns, portfolio_value
+        return self._clusterer.dedup_masks(rebalance_idx, lookback, scores, threshold)
     
-    def _calculate_equal_weights_exclude_losing(self, current_day: int, lookback: int) -> np.ndarray:
+    def _get_prefix_statistics(self) -> tuple:
         """
-        Calcola pesi equi escludendo le strategie in perdita.
-        
-        Parameters:
-        -----------
-        current_day : int
-            Indice del giorno corrente
-        lookback : int
-            Periodo di lookback
+        Restituisce le somme prefisse di log(1 + r), r e r^2 della matrice dei rendimenti.
         
         Returns:
         --------
-        np.ndarray
-            Array dei pesi
+        tuple
+            (log_prefix, ruin_prefix, sum_prefix, sq_prefix), vedi calculate_prefix_statistics
+            
+        Notes:
+        ------
+        Vengono calcolate una sola volta e riusate da ogni configurazione della
+        grid search: le statistiche di qualsiasi finestra costano O(strategie).
         """
-        if current_day < lookback:
-            return np.ones(len(self.strategy_names)) / len(self.strategy_names)
-        
-        # Calcola rendimenti cumulati nell'ultimo lookback
-        recent_returns = self.returns_matrix[current_day-lookback:current_day]
-        cum_returns = np.zeros(len(self.strategy_names))
-        
-        for i in range(len(self.strategy_names)):
-            cum_returns[i] = np.prod(1 + recent_returns[:, i]) - 1
-        
-        # Identifica strategie in profitto (cum_return > 0)
-        profitable = cum_returns > 0
-        n_profitable = np.sum(profitable)
-        
-        # Se tutte sono in perdita, non investire in nessuna
-        if n_profitable == 0:
-            return np.zeros(len(self.strategy_names))
-        
-        # Calcola pesi uguali per le strategie redditizie
-        weights = np.zeros(len(self.strategy_names))
-        weights[profitable] = 1.0 / n_profitable
-        
-        return weights
+        if self._prefix_statistics is None:
+            self._prefix_statistics = calculate_prefix_statistics(
+                np.ascontiguousarray(self.returns_matrix, dtype=np.float64)
+            )
+        return self._prefix_statistics
     
-    def _calculate_risk_parity_weights(self, current_day: int, lookback: int) -> np.ndarray:
+    def _calculate_portfolio_performance(self, returns_matrix: np.ndarray, 
+                                       weights_history: np.ndarray, 
+                                       rebalance_dates_idx: list,
+                                       weight_drift: bool = False) -> tuple:
         """
-        Calcola pesi basati su risk parity, escludendo strategie in perdita.
+        Calcola la performance del portfolio nel tempo.
         
         Parameters:
         -----------
-        current_day : int
-            Indice del giorno corrente
-        lookback : int
-            Periodo di lookback
+        returns_matrix : np.ndarray
+            Matrice dei rendimenti [giorni, strategie]
+        weights_history : np.ndarray
+            Storico dei pesi di ribilanciamento
+        rebalance_dates_idx : list
+            Indici delle date di ribilanciamento
+        weight_drift : bool, default False
+            Se True i pesi derivano con i rendimenti tra i ribilanciamenti
         
         Returns:
         --------
-        np.ndarray
-            Array dei pesi basati su risk parity
+        tuple
+            (portfolio_returns, portfolio_values)
+            
+        Notes:
+        ------
+        Il calcolo è delegato al kernel numba calculate_portfolio_performance_kernel,
+        che scorre i giorni una sola volta con un puntatore sugli indici ordinati.
         """
-        if current_day < lookback:
-            return np.ones(len(self.strategy_names)) / len(self.strategy_names)
-        
-        # Calcola rendimenti cumulati e volatilità nell'ultimo lookback
-        recent_returns = self.returns_matrix[current_day-lookback:current_day]
-        cum_returns = np.zeros(len(self.strategy_names))
-        volatilities = np.std(recent_returns, axis=0)
-        
-        for i in range(len(self.strategy_names)):
-            cum_returns[i] = np.prod(1 + recent_returns[:, i]) - 1
-        
-        # Identifica strategie in profitto (cum_return > 0)
-        profitable = cum_returns > 0
-        
-        # Se tutte sono in perdita, non investire in nessuna
-        if not np.any(profitable):
-            return np.zeros(len(self.strategy_names))
-        
-        # Evita divisione per zero e considera solo strategie profittevoli
-        masked_volatilities = np.where(profitable & (volatilities > 0), volatilities, np.inf)
-        
-        # Pesi inversamente proporzionali alla volatilità
-        inv_vol = np.where(masked_volatilities < np.inf, 1.0 / masked_volatilities, 0.0)
-        total_inv_vol = np.sum(inv_vol)
-        
-        # Normalizza i pesi
-        weights = np.zeros(len(self.strategy_names))
-        if total_inv_vol > 0:
-            weights = inv_vol / total_inv_vol
-        
-        return weights
+        if len(weights_history) == 0:
+            weights_history = np.ones((1, returns_matrix.shape[1])) / returns_matrix.shape[1]
+        rebalance_idx = np.unique(np.asarray(rebalance_dates_idx, dtype=np.int64))
+        return calculate_portfolio_performance_kernel(
+            np.ascontiguousarray(returns_matrix, dtype=np.float64),
+            np.ascontiguousarray(weights_history, dtype=np.float64),
+            rebalance_idx,
+            weight_drift
+        )
@@ -0,0 +1,510 @@
+"""
+Subset Selection Module for Dynamic Portfolio Optimization
+==========================================================
+
+This module searches the best K-of-N subset of strategies for an
+equal-weight portfolio, by Sharpe ratio or by equity-curve linearity,
+without enumerating all combinations.
+
+Both objectives have the form sum(v_S) / sqrt(sum(Q_SS)):
+- Sharpe: v = mean daily returns, Q = covariance matrix of the returns
+- Linearity: v = centered cross products of the cumulative-return curves
+  with time, Q = centered Gram matrix of the curves (the correlation of the
+  portfolio curve with time, whose cube is the linearity_score)
+
+v and Q are computed once from the cached per-strategy return vectors, so
+adding or removing a member updates the portfolio variance in O(K).
+
+Functions:
+----------
+- SubsetSearch: Cached objective data, beam search and branch and bound
+- find_best_subsets: Best subsets for a range of sizes, with exact metrics
+- create_subset_rebalancer: Rebalancer restricted to a subset of strategies
+
+Author: Portfolio Optimization Team
+Version: 1.0.0
+"""
+
+import numpy as np
+import pandas as pd
+from numba import jit
+from joblib import Parallel, delayed
+from typing import Iterable, List, Optional, Sequence, Tuple
+from .performance_metrics import calculate_performance_metrics_matrix
+from .linearity_analysis import calculate_linearity_metrics_matrix
+
+
+OBJECTIVES = ('sharpe', 'linearity')
+
+
+class SubsetSearch:
+    """
+    Ricerca del miglior sottoinsieme di K strategie (portfolio a pesi uguali).
+
+    Attributes:
+    -----------
+    strategy_names : list
+        Nomi delle strategie
+    returns_matrix : np.ndarray
+        Matrice dei rendimenti [giorni, strategie]
+    objective : str
+        'sharpe' o 'linearity'
+    """
+
+    def __init__(self, returns, objective: str = 'sharpe'):
+        """
+        Parameters:
+        -----------
+        returns : pd.DataFrame or DynamicPortfolioRebalancer
+            DataFrame dei rendimenti [giorni, strategie] o rebalancer (ne usa
+            la matrice dei rendimenti già caricata)
+        objective : str, default 'sharpe'
+            'sharpe': Sharpe annualizzato (media / deviazione standard) dei
+            rendimenti giornalieri del portfolio;
+            'linearity': correlazione con il tempo della curva dei rendimenti
+            cumulati del portfolio
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Obiettivo '{objective}' non supportato. Usa: {', '.join(OBJECTIVES)}")
+
+        if isinstance(returns, pd.DataFrame):
+            self.strategy_names = list(returns.columns)
+            self.returns_matrix = np.ascontiguousarray(returns.values, dtype=np.float64)
+        else:
+            self.strategy_names = list(returns.strategy_names)
+            self.returns_matrix = np.ascontiguousarray(returns.returns_matrix, dtype=np.float64)
+        self.objective = objective
+
+        n_days = self.returns_matrix.shape[0]
+        if n_days < 2:
+            raise ValueError("Servono almeno 2 giorni di rendimenti")
+
+        if objective == 'sharpe':
+            centered = self.returns_matrix - self.returns_matrix.mean(axis=0)
+            self._vec = self.returns_matrix.mean(axis=0)
+            self._quad = centered.T @ centered / n_days
+            self._scale = np.sqrt(252)
+        else:
+            curves = np.cumsum(self.returns_matrix, axis=0)
+            centered = curves - curves.mean(axis=0)
+            time_centered = np.arange(n_days, dtype=np.float64) - (n_days - 1) / 2
+            self._vec = time_centered @ centered
+            self._quad = centered.T @ centered
+            self._scale = 1.0 / np.sqrt(n_days * (n_days ** 2 - 1) / 12.0)
+        self._quad = np.ascontiguousarray(self._quad)
+
+    def score(self, subset: Sequence[int]) -> float:
+        """
+        Valore dell'obiettivo per un sottoinsieme di indici di strategie.
+
+        Parameters:
+        -----------
+        subset : Sequence[int]
+            Indici delle strategie
+
+        Returns:
+        --------
+        float
+            Sharpe annualizzato o correlazione con il tempo (0 se varianza nulla)
+        """
+        idx = np.asarray(subset, dtype=np.int64)
+        quad = self._quad[np.ix_(idx, idx)].sum()
+        return float(self._scale * self._vec[idx].sum() / np.sqrt(quad)) if quad > 0 else 0.0
+
+    def beam_search(self, k: int, beam_width: int = 64, top_n: int = 5) -> List[Tuple[float, Tuple[int, ...]]]:
+        """
+        Beam search: aggiunge una strategia alla volta mantenendo i migliori
+        beam_width sottoinsiemi distinti di ogni dimensione.
+
+        Parameters:
+        -----------
+        k : int
+            Numero di strategie del sottoinsieme
+        beam_width : int, default 64
+            Sottoinsiemi mantenuti ad ogni livello
+        top_n : int, default 5
+            Numero di sottoinsiemi restituiti
+
+        Returns:
+        --------
+        List[Tuple[float, Tuple[int, ...]]]
+            (punteggio, indici ordinati) dei migliori sottoinsiemi, in ordine decrescente
+
+        Notes:
+        ------
+        Ogni livello valuta tutte le estensioni di tutti i beam in forma
+        vettoriale: per ogni beam sono mantenute la somma di v, la somma di Q
+        e le somme incrociate Q[S, j], aggiornate in O(N) per nuovo membro.
+        """
+        n_assets = len(self.strategy_names)
+        self._check_size(k)
+        diag = np.diag(self._quad)
+
+        # Primo livello: tutte le strategie singole
+        members = [(j,) for j in range(n_assets)]
+        num = self._vec.copy()
+        quad = diag.copy()
+        cross = self._quad.copy()
+
+        for size in range(1, k):
+            member_mask = np.zeros((len(members), n_assets), dtype=bool)
+            for b, subset in enumerate(members):
+                member_mask[b, list(subset)] = True
+
+            # Punteggio di ogni estensione (beam b + strategia j)
+            new_quad = quad[:, None] + 2.0 * cross + diag[None, :]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = (num[:, None] + self._vec[None, :]) / np.sqrt(new_quad)
+            scores[member_mask | ~(new_quad > 0)] = -np.inf
+
+            order = np.argsort(-scores, axis=None)
+            seen = set()
+            next_members, parents, added = [], [], []
+            for flat in order:
+                b, j = divmod(int(flat), n_assets)
+                if not np.isfinite(scores[b, j]):
+                    break
+                subset = tuple(sorted(members[b] + (j,)))
+                if subset in seen:
+                    continue
+                seen.add(subset)
+                next_members.append(subset)
+                parents.append(b)
+                added.append(j)
+                if len(next_members) >= beam_width:
+                    break
+            if not next_members:
+                return []
+
+            parents = np.asarray(parents)
+            added = np.asarray(added)
+            num = num[parents] + self._vec[added]
+            quad = quad[parents] + 2.0 * cross[parents, added] + diag[added]
+            cross = cross[parents] + self._quad[added]
+            members = next_members
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            final = np.where(quad > 0, self._scale * num / np.sqrt(quad), -np.inf)
+        ranking = np.argsort(-final)[:top_n]
+        return [(float(final[b]), tuple(members[b])) for b in ranking if np.isfinite(final[b])]
+
+    def branch_and_bound(self, k: int, initial_score: float = -np.inf,
+                         max_nodes: Optional[int] = 5_000_000,
+                         n_jobs: int = 1) -> Tuple[float, Optional[Tuple[int, ...]], bool]:
+        """
+        Branch and bound sul miglior sottoinsieme di k strategie.
+
+        Parameters:
+        -----------
+        k : int
+            Numero di strategie del sottoinsieme
+        initial_score : float, default -inf
+            Punteggio di una soluzione già nota (es. dalla beam search), usato
+            per potare fin dall'inizio
+        max_nodes : Optional[int], default 5_000_000
+            Nodi massimi esplorati per ramo di primo livello (None = nessun limite)
+        n_jobs : int, default 1
+            Thread paralleli (i rami di primo livello sono divisi tra i thread)
+
+        Returns:
+        --------
+        Tuple[float, Optional[Tuple[int, ...]], bool]
+            (punteggio, indici, ottimo dimostrato). Gli indici sono None se
+            nessun sottoinsieme supera initial_score; l'ottimo è dimostrato se
+            nessun ramo ha raggiunto max_nodes
+
+        Notes:
+        ------
+        - Le strategie sono ordinate per punteggio individuale decrescente,
+          per trovare presto buone soluzioni
+        - Bound: somma dei r valori di v più alti tra i candidati rimasti sul
+          numeratore; sul denominatore la somma dei r contributi minimi
+          Q_jj + 2 Q[S, j] + (r - 1) min_l Q_jl (con il minimo autovalore di
+          Q come ulteriore limite inferiore)
+        - Con il bound sui candidati [j, N) si pota l'intero resto dei fratelli
+        """
+        n_assets = len(self.strategy_names)
+        self._check_size(k)
+
+        diag = np.diag(self._quad)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            single = np.where(diag > 0, self._vec / np.sqrt(diag), -np.inf)
+        order = np.argsort(-single, kind='stable')
+        vec = np.ascontiguousarray(self._vec[order])
+        quad = np.ascontiguousarray(self._quad[np.ix_(order, order)])
+
+        # Somme dei r valori di v più alti in ogni suffisso [j, N)
+        suffix_top = np.zeros((n_assets + 1, k + 1))
+        for j in range(n_assets):
+            top = np.sort(vec[j:])[::-1][:k]
+            suffix_top[j, 1:len(top) + 1] = np.cumsum(top)
+            suffix_top[j, len(top) + 1:] = -np.inf
+        suffix_top[n_assets, 1:] = -np.inf
+
+        off_diagonal = quad + np.diag(np.full(n_assets, np.inf))
+        min_offdiag = off_diagonal.min(axis=1) if n_assets > 1 else np.zeros(n_assets)
+        min_eigenvalue = max(float(np.linalg.eigvalsh(quad)[0]), 0.0)
+
+        limit = -1 if max_nodes is None else int(max_nodes)
+        # Punteggi interni senza fattore di scala
+        threshold = initial_score / self._scale if np.isfinite(initial_score) else -np.inf
+        firsts = np.arange(n_assets - k + 1, dtype=np.int64)
+        chunks = [chunk for chunk in np.array_split(firsts, max(1, min(n_jobs, len(firsts)))) if len(chunk) > 0]
+
+        results = Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(_branch_and_bound_kernel)(vec, quad, k, chunk, threshold, suffix_top,
+                                              min_offdiag, min_eigenvalue, limit)
+            for chunk in chunks
+        )
+
+        best_score, best_subset, proven = threshold, None, True
+        for score, subset, complete in results:
+            proven = proven and complete
+            if subset[0] >= 0 and score > best_score:
+                best_score = score
+                best_subset = tuple(sorted(int(order[i]) for i in subset))
+
+        if best_subset is None:
+            return initial_score, None, proven
+        return float(best_score * self._scale), best_subset, proven
+
+    def evaluate(self, subsets: Iterable[Sequence[int]]) -> pd.DataFrame:
+        """
+        Metriche esatte dei portfolio a pesi uguali dei sottoinsiemi.
+
+        Parameters:
+        -----------
+        subsets : Iterable[Sequence[int]]
+            Sottoinsiemi di indici di strategie
+
+        Returns:
+        --------
+        pd.DataFrame
+            Una riga per sottoinsieme con 'strategies' (tupla di nomi), le
+            metriche di calculate_performance_metrics (total_return,
+            annual_return, volatility, sharpe_ratio, max_drawdown) e le
+            metriche di linearità dell'equity curve (r_squared, linearity_score)
+        """
+        subsets = [tuple(subset) for subset in subsets]
+        if not subsets:
+            return pd.DataFrame()
+        portfolio_returns = np.column_stack([self.returns_matrix[:, list(subset)].mean(axis=1)
+                                             for subset in subsets])
+        performance = calculate_performance_metrics_matrix(portfolio_returns)
+        linearity = calculate_linearity_metrics_matrix(np.cumprod(1 + portfolio_returns, axis=0))
+
+        evaluation = performance.reset_index(drop=True)
+        evaluation.insert(0, 'strategies', [tuple(self.strategy_names[i] for i in subset) for subset in subsets])
+        evaluation['r_squared'] = linearity['r_squared']
+        evaluation['linearity_score'] = linearity['linearity_score']
+        return evaluation
+
+    def _check_size(self, k: int) -> None:
+        """
+        Verifica che la dimensione del sottoinsieme sia valida.
+        """
+        if not 1 <= k <= len(self.strategy_names):
+            raise ValueError(f"k deve essere tra 1 e {len(self.strategy_names)}, ricevuto {k}")
+
+
+@jit(nopython=True, nogil=True)
+def _branch_and_bound_kernel(vec, quad, k, firsts, threshold, suffix_top, min_offdiag,
+                             min_eigenvalue, max_nodes):
+    """
+    DFS iterativa con bound sui sottoinsiemi il cui primo indice (nell'ordine
+    dato) è in firsts. Restituisce (punteggio, indici, completata), con
+    indici = -1 se nessun sottoinsieme supera threshold.
+    """
+    n_assets = len(vec)
+    best_score = threshold
+    best_subset = np.full(k, -1, dtype=np.int64)
+    complete = True
+
+    chosen = np.empty(k, dtype=np.int64)
+    num = np.empty(k + 1)
+    quad_sum = np.empty(k + 1)
+    cross = np.empty((k + 1, n_assets))
+    next_candidate = np.empty(k + 1, dtype=np.int64)
+    smallest = np.empty(k)
+
+    for first in firsts:
+        chosen[0] = first
+        num[1] = vec[first]
+        quad_sum[1] = quad[first, first]
+        cross[1] = quad[first]
+        depth = 1
+        next_candidate[1] = first + 1
+        nodes = 0
+
+        while depth >= 1:
+            if depth == k:
+                if quad_sum[k] > 0:
+                    score = num[k] / np.sqrt(quad_sum[k])
+                    if score > best_score:
+                        best_score = score
+                        best_subset[:] = chosen
+                depth -= 1
+                continue
+
+            j = next_candidate[depth]
+            remaining = k - depth
+            if j > n_assets - remaining:
+                depth -= 1
+                continue
+
+            nodes += 1
+            if max_nodes >= 0 and nodes > max_nodes:
+                complete = False
+                break
+
+            # Bound su tutti i completamenti con candidati in [j, N)
+            num_bound = num[depth] + suffix_top[j, remaining]
+            if num_bound <= 0:
+                bound = 0.0
+            else:
+                # Selezione parziale dei r contributi minimi (r <= k)
+                n_smallest = 0
+                for candidate in range(j, n_assets):
+                    value = (quad[candidate, candidate] + 2.0 * cross[depth, candidate]
+                             + (remaining - 1) * min_offdiag[candidate])
+                    if n_smallest < remaining:
+                        n_smallest += 1
+                    elif value >= smallest[remaining - 1]:
+                        continue
+                    m = n_smallest - 1
+                    while m > 0 and smallest[m - 1] > value:
+                        smallest[m] = smallest[m - 1]
+                        m -= 1
+                    smallest[m] = value
+                var_bound = quad_sum[depth]
+                for m in range(remaining):
+                    var_bound += smallest[m]
+                var_bound = max(var_bound, min_eigenvalue * k)
+                bound = num_bound / np.sqrt(var_bound) if var_bound > 0 else np.inf
+
+            if bound <= best_score:
+                # Nessun fratello rimasto può migliorare
+                depth -= 1
+                continue
+
+            # Scende nel ramo che include j
+            next_candidate[depth] = j + 1
+            chosen[depth] = j
+            num[depth + 1] = num[depth] + vec[j]
+            quad_sum[depth + 1] = quad_sum[depth] + 2.0 * cross[depth, j] + quad[j, j]
+            for i in range(n_assets):
+                cross[depth + 1, i] = cross[depth, i] + quad[j, i]
+            depth += 1
+            if depth < k:
+                next_candidate[depth] = j + 1
+
+    return best_score, best_subset, complete
+
+
+def find_best_subsets(returns, k_range: Iterable[int] = range(5, 11), objective: str = 'sharpe',
+                      beam_width: int = 64, exact: bool = True,
+                      max_nodes: Optional[int] = 5_000_000, n_jobs: int = 1,
+                      top_n: int = 5) -> pd.DataFrame:
+    """
+    Cerca i migliori sottoinsiemi di strategie per ogni dimensione richiesta.
+
+    Parameters:
+    -----------
+    returns : pd.DataFrame or DynamicPortfolioRebalancer
+        DataFrame dei rendimenti o rebalancer
+    k_range : Iterable[int], default range(5, 11)
+        Dimensioni dei sottoinsiemi da cercare
+    objective : str, default 'sharpe'
+        'sharpe' o 'linearity' (vedi SubsetSearch)
+    beam_width : int, default 64
+        Sottoinsiemi mantenuti ad ogni livello della beam search
+    exact : bool, default True
+        Se True, dopo la beam search esegue il branch and bound partendo dalla
+        migliore soluzione trovata
+    max_nodes : Optional[int], default 5_000_000
+        Nodi massimi del branch and bound per ramo di primo livello
+    n_jobs : int, default 1
+        Thread paralleli del branch and bound
+    top_n : int, default 5
+        Sottoinsiemi della beam search riportati per ogni dimensione
+
+    Returns:
+    --------
+    pd.DataFrame
+        Una riga per sottoinsieme con k, search ('beam' o 'branch_and_bound'),
+        search_score (obiettivo della ricerca), proven_optimal, strategies e le
+        metriche esatte di SubsetSearch.evaluate; ordinato per k e search_score
+
+    Notes:
+    ------
+    Il portfolio di un sottoinsieme è a pesi uguali con ribilanciamento
+    giornaliero (media dei rendimenti dei membri). I dati dell'obiettivo sono
+    calcolati una sola volta e condivisi da tutte le dimensioni.
+    """
+    search = SubsetSearch(returns, objective)
+    k_values = [k for k in k_range]
+
+    print(f"🔍 Ricerca sottoinsiemi di strategie ({objective})...")
+    print(f"   Strategie: {len(search.strategy_names)} | Dimensioni: {k_values}")
+
+    rows = []
+    for k in k_values:
+        beam_results = search.beam_search(k, beam_width=beam_width, top_n=top_n)
+        candidates = [(score, subset, 'beam', False) for score, subset in beam_results]
+
+        if exact:
+            initial = beam_results[0][0] if beam_results else -np.inf
+            score, subset, proven = search.branch_and_bound(k, initial_score=initial,
+                                                            max_nodes=max_nodes, n_jobs=n_jobs)
+            if subset is not None and (not candidates or subset != candidates[0][1]):
+                candidates.insert(0, (score, subset, 'branch_and_bound', proven))
+            elif candidates:
+                # La beam search ha già trovato l'ottimo
+                first = candidates[0]
+                candidates[0] = (first[0], first[1], first[2], proven)
+            print(f"   k={k}: miglior punteggio {candidates[0][0]:.4f}"
+                  f" ({'ottimo dimostrato' if candidates[0][3] else 'limite nodi raggiunto'})")
+
+        evaluation = search.evaluate([candidate[1] for candidate in candidates])
+        for (score, subset, method, proven), (_, metrics) in zip(candidates, evaluation.iterrows()):
+            row = {'k': k, 'search': method, 'search_score': score, 'proven_optimal': proven}
+            row.update(metrics.to_dict())
+            rows.append(row)
+
+    if not rows:
+        print("❌ Nessun sottoinsieme valido trovato!")
+        return pd.DataFrame()
+
+    results_df = pd.DataFrame(rows).sort_values(['k', 'search_score'], ascending=[True, False])
+    print(f"✅ Ricerca completata!")
+    return results_df.reset_index(drop=True)
+
+
+def create_subset_rebalancer(rebalancer, strategies: Sequence[str]):
+    """
+    Crea un rebalancer limitato a un sottoinsieme di strategie.
+
+    Parameters:
+    -----------
+    rebalancer : DynamicPortfolioRebalancer
+        Rebalancer con tutte le strategie
+    strategies : Sequence[str]
+        Nomi delle strategie da mantenere (es. la colonna 'strategies' di
+        find_best_subsets)
+
+    Returns:
+    --------
+    DynamicPortfolioRebalancer
+        Nuovo rebalancer sui soli rendimenti delle strategie indicate
+    """
+    from .portfolio_rebalancer import DynamicPortfolioRebalancer
+
+    missing = [name for name in strategies if name not in rebalancer.strategy_names]
+    if missing:
+        raise ValueError(f"Strategie non presenti nel rebalancer: {missing}")
+
+    columns = [rebalancer.strategy_names.index(name) for name in strategies]
+    return DynamicPortfolioRebalancer.from_arrays(
+        np.ascontiguousarray(rebalancer.returns_matrix[:, columns]), rebalancer.dates, list(strategies),
+        verbose=False, cache_size=rebalancer.cache_size, cache_dir=rebalancer.cache_dir
+    )
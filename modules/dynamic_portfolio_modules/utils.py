@@ -11,6 +11,10 @@ Functions:
 - calculate_momentum_weights: Calculates momentum-based weights
 - calculate_sharpe_momentum_weights: Calculates Sharpe-adjusted momentum weights
 - calculate_top_n_ranking_weights: Calculates top-N ranking weights
+- calculate_portfolio_performance_kernel: Portfolio returns/values in one compiled pass
+- calculate_prefix_statistics: Prefix sums of log(1 + r), r and r^2 for O(1) window statistics
+- calculate_*_weights_from_prefix: Weights for all rebalance dates from precomputed prefix sums
+- calculate_*_weights_batch: Same as above, building the prefix sums from the returns matrix
 
 Author: Portfolio Optimization Team
 Version: 1.0.0
@@ -51,6 +55,164 @@ def normalize_scores(returns, method='minmax'):
     return (returns - min_val) / (max_val - min_val)
 
 
+@jit(nopython=True)
+def _normalized_positive_weights(scores):
+    """
+    Converte un array di punteggi (rendimenti cumulati o Sharpe) in pesi
+    normalizzati min-max, escludendo i punteggi <= 0.
+    
+    Parameters:
+    -----------
+    scores : np.ndarray
+        Punteggio di ogni strategia
+    
+    Returns:
+    --------
+    np.ndarray
+        Array dei pesi che somma a 1, o zeri se nessun punteggio è positivo
+    """
+    n_assets = len(scores)
+    
+    # Esclude strategie con punteggio negativo o nullo
+    positive_mask = scores > 0
+    
+    # Se nessuna strategia ha punteggio positivo, non investire
+    if not np.any(positive_mask):
+        return np.zeros(n_assets)
+    
+    # Considera solo strategie con punteggio positivo
+    filtered_scores = np.where(positive_mask, scores, 0)
+    
+    # Normalizza tra 0 e 1
+    weights = normalize_scores(filtered_scores)
+    
+    # Assicura che non ci siano pesi per strategie escluse
+    weights = np.where(positive_mask, weights, 0)
+    
+    # Assicura che la somma sia 1
+    total = np.sum(weights)
+    if total > 0:
+        weights = weights / total
+    
+    return weights
+
+
+@jit(nopython=True)
+def _top_n_positive_weights(cum_returns, n_top):
+    """
+    Assegna pesi uguali alle migliori N strategie con rendimento cumulativo positivo.
+    
+    Parameters:
+    -----------
+    cum_returns : np.ndarray
+        Rendimento cumulativo di ogni strategia
+    n_top : int
+        Numero di strategie top da selezionare
+    
+    Returns:
+    --------
+    np.ndarray
+        Array dei pesi, o zeri se nessuna strategia è in profitto
+    """
+    n_assets = len(cum_returns)
+    weights = np.zeros(n_assets)
+    
+    # Esclude strategie in perdita
+    positive_returns_mask = cum_returns > 0
+    
+    # Se non ci sono strategie positive, non investire
+    if not np.any(positive_returns_mask):
+        return weights
+    
+    # Ordina gli indici per rendimento decrescente
+    sorted_indices = np.argsort(cum_returns)[::-1]
+    
+    # Seleziona solo le strategie con rendimenti positivi
+    top_indices = []
+    for idx in sorted_indices:
+        if positive_returns_mask[idx] and len(top_indices) < n_top:
+            top_indices.append(idx)
+    
+    # Assegna pesi uguali alle top N strategie
+    equal_weight = 1.0 / len(top_indices)
+    for idx in top_indices:
+        weights[idx] = equal_weight
+    
+    return weights
+
+
+@jit(nopython=True)
+def _equal_positive_weights(cum_returns):
+    """
+    Assegna pesi uguali alle strategie con rendimento cumulativo positivo.
+    
+    Parameters:
+    -----------
+    cum_returns : np.ndarray
+        Rendimento cumulativo di ogni strategia
+    
+    Returns:
+    --------
+    np.ndarray
+        Array dei pesi, o zeri se tutte le strategie sono in perdita
+    """
+    weights = np.zeros(len(cum_returns))
+    profitable = cum_returns > 0
+    n_profitable = np.sum(profitable)
+    
+    # Se tutte sono in perdita, non investire in nessuna
+    if n_profitable == 0:
+        return weights
+    
+    weights[profitable] = 1.0 / n_profitable
+    return weights
+
+
+@jit(nopython=True)
+def _inverse_volatility_weights(cum_returns, volatilities):
+    """
+    Pesi risk parity (inverso della volatilità) sulle sole strategie in profitto.
+    
+    Parameters:
+    -----------
+    cum_returns : np.ndarray
+        Rendimento cumulativo di ogni strategia
+    volatilities : np.ndarray
+        Deviazione standard dei rendimenti di ogni strategia
+    
+    Returns:
+    --------
+    np.ndarray
+        Array dei pesi, o zeri se nessuna strategia in profitto ha volatilità > 0
+    """
+    n_assets = len(cum_returns)
+    weights = np.zeros(n_assets)
+    
+    # Pesi inversamente proporzionali alla volatilità delle strategie profittevoli
+    inv_vol = np.zeros(n_assets)
+    for i in range(n_assets):
+        if cum_returns[i] > 0 and volatilities[i] > 0:
+            inv_vol[i] = 1.0 / volatilities[i]
+    
+    total_inv_vol = np.sum(inv_vol)
+    if total_inv_vol > 0:
+        weights = inv_vol / total_inv_vol
+    
+    return weights
+
+
+@jit(nopython=True)
+def _mask_ineligible(scores, eligible_row):
+    """
+    Azzera sul posto i punteggi delle strategie non ammesse, che vengono così
+    escluse dai pesi (tutti i metodi ignorano i punteggi <= 0).
+    """
+    for i in range(len(scores)):
+        if not eligible_row[i]:
+            scores[i] = 0.0
+    return scores
+
+
 @jit(nopython=True)
 def calculate_momentum_weights(returns_matrix, lookback):
     """
@@ -78,8 +240,6 @@ def calculate_momentum_weights(returns_matrix, lookback):
     - I pesi sono normalizzati per sommare a 1
     """
     n_assets = returns_matrix.shape[1]
-    weights = np.zeros(n_assets)
-    
     if len(returns_matrix) < lookback:
         return np.ones(n_assets) / n_assets
     
@@ -90,28 +250,8 @@ def calculate_momentum_weights(returns_matrix, lookback):
     for i in range(n_assets):
         cum_returns[i] = np.prod(1 + recent_returns[:, i]) - 1
     
-    # Esclude strategie in perdita (rendimento cumulativo <= 0)
-    positive_returns_mask = cum_returns > 0
-    
-    # Se tutte le strategie sono in perdita, non investire in nessuna
-    if not np.any(positive_returns_mask):
-        return np.zeros(n_assets)
-    
-    # Considera solo strategie in profitto
-    filtered_returns = np.where(positive_returns_mask, cum_returns, 0)
-    
-    # Normalizza tra 0 e 1
-    weights = normalize_scores(filtered_returns)
-    
-    # Assicura che non ci siano pesi per strategie in perdita
-    weights = np.where(positive_returns_mask, weights, 0)
-    
-    # Assicura che la somma sia 1
-    total = np.sum(weights)
-    if total > 0:
-        weights = weights / total
-    
-    return weights
+    # Esclude le strategie in perdita e normalizza i pesi
+    return _normalized_positive_weights(cum_returns)
 
 
 @jit(nopython=True)
@@ -142,8 +282,6 @@ def calculate_sharpe_momentum_weights(returns_matrix, lookback):
     - Se tutte hanno Sharpe negativo, non investe in nessuna
     """
     n_assets = returns_matrix.shape[1]
-    weights = np.zeros(n_assets)
-    
     if len(returns_matrix) < lookback:
         return np.ones(n_assets) / n_assets
     
@@ -165,28 +303,8 @@ def calculate_sharpe_momentum_weights(returns_matrix, lookback):
         else:
             sharpe_ratios[i] = 0.0
     
-    # Esclude strategie con Sharpe negativo o zero
-    positive_sharpe_mask = sharpe_ratios > 0
-    
-    # Se tutte le strategie hanno Sharpe negativo, non investire in nessuna
-    if not np.any(positive_sharpe_mask):
-        return np.zeros(n_assets)
-    
-    # Considera solo strategie con Sharpe positivo
-    filtered_sharpe = np.where(positive_sharpe_mask, sharpe_ratios, 0)
-    
-    # Normalizza tra 0 e 1
-    weights = normalize_scores(filtered_sharpe)
-    
-    # Assicura che non ci siano pesi per strategie con Sharpe negativo
-    weights = np.where(positive_sharpe_mask, weights, 0)
-    
-    # Assicura che la somma sia 1
-    total = np.sum(weights)
-    if total > 0:
-        weights = weights / total
-    
-    return weights
+    # Esclude le strategie con Sharpe <= 0 e normalizza i pesi
+    return _normalized_positive_weights(sharpe_ratios)
 
 
 @jit(nopython=True)
@@ -217,8 +335,6 @@ def calculate_top_n_ranking_weights(returns_matrix, lookback, n_top=5):
     - Se non ci sono abbastanza strategie positive, usa tutte quelle disponibili
     """
     n_assets = returns_matrix.shape[1]
-    weights = np.zeros(n_assets)
-    
     if len(returns_matrix) < lookback:
         return np.ones(n_assets) / n_assets
     
@@ -229,30 +345,507 @@ def calculate_top_n_ranking_weights(returns_matrix, lookback, n_top=5):
     for i in range(n_assets):
         cum_returns[i] = np.prod(1 + recent_returns[:, i]) - 1
     
-    # Esclude strategie in perdita
-    positive_returns_mask = cum_returns > 0
+    # Pesi uguali alle migliori N strategie in profitto
+    return _top_n_positive_weights(cum_returns, n_top)
+
+
+@jit(nopython=True)
+def calculate_portfolio_performance_kernel(returns_matrix, weights_history, rebalance_idx, drift=False):
+    """
+    Calcola rendimenti e valori del portfolio in un unico passaggio lineare.
     
-    # Se non ci sono strategie positive, non investire
-    if not np.any(positive_returns_mask):
-        return np.zeros(n_assets)
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice dei rendimenti [giorni, strategie]
+    weights_history : np.ndarray
+        Storico dei pesi di ribilanciamento [ribilanciamenti, strategie]
+    rebalance_idx : np.ndarray
+        Indici (int64, ordinati in modo crescente) dei giorni di ribilanciamento
+    drift : bool, default False
+        Se True i pesi derivano tra un ribilanciamento e l'altro in base ai
+        rendimenti delle strategie (w_i * (1 + r_i) / (1 + r_p)); se False
+        restano costanti (ribilanciamento giornaliero implicito)
     
-    # Trova gli indici delle top N strategie con rendimenti positivi
-    # Ordina gli indici per rendimento decrescente
-    sorted_indices = np.argsort(cum_returns)[::-1]  # Ordine decrescente
+    Returns:
+    --------
+    tuple
+        (portfolio_returns, portfolio_values) con portfolio_values di lunghezza
+        giorni + 1 (valore iniziale = 1.0)
+        
+    Notes:
+    ------
+    - Prima del primo ribilanciamento vengono usati i primi pesi dello storico
+    - Il giorno di ribilanciamento usa già i nuovi pesi
+    - Un puntatore scorre gli indici di ribilanciamento: costo O(giorni * strategie)
+    """
+    n_days, n_assets = returns_matrix.shape
+    portfolio_values = np.ones(n_days + 1)
+    portfolio_returns = np.zeros(n_days)
+    n_rebalances = weights_history.shape[0]
+    
+    current_weights = np.empty(n_assets)
+    if n_rebalances > 0:
+        current_weights[:] = weights_history[0]
+    else:
+        current_weights[:] = 1.0 / n_assets
+    
+    pointer = 0
+    for day in range(n_days):
+        # Ribilancia se il giorno corrente è il prossimo indice di ribilanciamento
+        if pointer < len(rebalance_idx) and rebalance_idx[pointer] == day:
+            if pointer < n_rebalances:
+                current_weights[:] = weights_history[pointer]
+            pointer += 1
+        
+        daily_return = 0.0
+        for i in range(n_assets):
+            daily_return += current_weights[i] * returns_matrix[day, i]
+        portfolio_returns[day] = daily_return
+        portfolio_values[day + 1] = portfolio_values[day] * (1 + daily_return)
+        
+        # Deriva dei pesi fino al prossimo ribilanciamento
+        if drift:
+            growth = 1 + daily_return
+            for i in range(n_assets):
+                if growth != 0:
+                    current_weights[i] = current_weights[i] * (1 + returns_matrix[day, i]) / growth
+                else:
+                    current_weights[i] = 0.0
+    
+    return portfolio_returns, portfolio_values
+
+
+@jit(nopython=True)
+def calculate_prefix_statistics(returns_matrix):
+    """
+    Calcola le somme prefisse di log(1 + r), r e r^2 per ogni strategia.
     
-    # Seleziona solo le strategie con rendimenti positivi
-    top_indices = []
-    for idx in sorted_indices:
-        if positive_returns_mask[idx] and len(top_indices) < n_top:
-            top_indices.append(idx)
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice dei rendimenti [giorni, strategie]
     
-    # Se non ci sono abbastanza strategie positive, usa tutte quelle disponibili
-    if len(top_indices) == 0:
-        return np.zeros(n_assets)
+    Returns:
+    --------
+    tuple
+        (log_prefix, ruin_prefix, sum_prefix, sq_prefix), tutte di forma
+        [giorni + 1, strategie]; l'elemento t contiene la somma sui primi t giorni.
+        ruin_prefix conta i giorni con r <= -1 (perdita totale), che non
+        contribuiscono a log_prefix
+        
+    Notes:
+    ------
+    Calcolate una sola volta, permettono di ricavare in O(strategie) per
+    qualsiasi finestra [a, b):
+    - rendimento cumulato: exp(log_prefix[b] - log_prefix[a]) - 1
+      (oppure -1 se ruin_prefix[b] > ruin_prefix[a])
+    - media: (sum_prefix[b] - sum_prefix[a]) / (b - a)
+    - varianza: (sq_prefix[b] - sq_prefix[a]) / (b - a) - media^2
+    """
+    n_days, n_assets = returns_matrix.shape
+    log_prefix = np.zeros((n_days + 1, n_assets))
+    ruin_prefix = np.zeros((n_days + 1, n_assets), dtype=np.int64)
+    sum_prefix = np.zeros((n_days + 1, n_assets))
+    sq_prefix = np.zeros((n_days + 1, n_assets))
+    
+    for t in range(n_days):
+        for i in range(n_assets):
+            r = returns_matrix[t, i]
+            if r <= -1:
+                log_prefix[t + 1, i] = log_prefix[t, i]
+                ruin_prefix[t + 1, i] = ruin_prefix[t, i] + 1
+            else:
+                log_prefix[t + 1, i] = log_prefix[t, i] + np.log1p(r)
+                ruin_prefix[t + 1, i] = ruin_prefix[t, i]
+            sum_prefix[t + 1, i] = sum_prefix[t, i] + r
+            sq_prefix[t + 1, i] = sq_prefix[t, i] + r * r
+    
+    return log_prefix, ruin_prefix, sum_prefix, sq_prefix
+
+
+@jit(nopython=True)
+def _window_cum_returns(log_prefix, ruin_prefix, start, end):
+    """
+    Rendimento cumulato di ogni strategia nella finestra [start, end) in O(strategie).
+    """
+    n_assets = log_prefix.shape[1]
+    cum_returns = np.empty(n_assets)
+    for i in range(n_assets):
+        if ruin_prefix[end, i] > ruin_prefix[start, i]:
+            cum_returns[i] = -1.0
+        else:
+            cum_returns[i] = np.exp(log_prefix[end, i] - log_prefix[start, i]) - 1
+    return cum_returns
+
+
+@jit(nopython=True)
+def _window_mean_std(sum_prefix, sq_prefix, start, end):
+    """
+    Media e deviazione standard (popolazione) di ogni strategia nella finestra [start, end).
+    """
+    n_assets = sum_prefix.shape[1]
+    n = end - start
+    means = np.empty(n_assets)
+    stds = np.empty(n_assets)
+    for i in range(n_assets):
+        mean = (sum_prefix[end, i] - sum_prefix[start, i]) / n
+        variance = (sq_prefix[end, i] - sq_prefix[start, i]) / n - mean * mean
+        means[i] = mean
+        # Gli errori di arrotondamento possono rendere la varianza leggermente negativa
+        stds[i] = np.sqrt(variance) if variance > 0 else 0.0
+    return means, stds
+
+
+@jit(nopython=True)
+def calculate_momentum_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible=None):
+    """
+    Calcola i pesi momentum per tutte le date di ribilanciamento
+    a partire dalle somme prefisse precalcolate.
     
-    # Assegna pesi uguali alle top N strategie
-    equal_weight = 1.0 / len(top_indices)
-    for idx in top_indices:
-        weights[idx] = equal_weight
+    Parameters:
+    -----------
+    prefix_stats : tuple
+        Risultato di calculate_prefix_statistics
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    eligible : np.ndarray, default None
+        Maschera booleana [ribilanciamenti, strategie] delle strategie ammesse
+        (es. dopo la deduplicazione per correlazione); None = tutte
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+        
+    Notes:
+    ------
+    Stessa logica di calculate_momentum_weights.
+    Ogni ribilanciamento costa O(strategie), indipendentemente dal lookback.
+    """
+    log_prefix, ruin_prefix, sum_prefix, sq_prefix = prefix_stats
+    n_assets = log_prefix.shape[1]
+    weights = np.empty((len(rebalance_idx), n_assets))
+    
+    for k in range(len(rebalance_idx)):
+        day = rebalance_idx[k]
+        if day < lookback:
+            weights[k] = 1.0 / n_assets
+            continue
+        cum_returns = _window_cum_returns(log_prefix, ruin_prefix, day - lookback, day)
+        if eligible is not None:
+            _mask_ineligible(cum_returns, eligible[k])
+        weights[k] = _normalized_positive_weights(cum_returns)
+    
+    return weights
+
+
+@jit(nopython=True)
+def calculate_momentum_weights_batch(returns_matrix, rebalance_idx, lookback):
+    """
+    Calcola i pesi momentum per tutte le date di ribilanciamento in una sola chiamata.
+    
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice completa dei rendimenti [giorni, strategie]
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+    """
+    prefix_stats = calculate_prefix_statistics(returns_matrix)
+    return calculate_momentum_weights_from_prefix(prefix_stats, rebalance_idx, lookback)
+
+
+@jit(nopython=True)
+def calculate_sharpe_momentum_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible=None):
+    """
+    Calcola i pesi Sharpe momentum per tutte le date di ribilanciamento
+    a partire dalle somme prefisse precalcolate.
+    
+    Parameters:
+    -----------
+    prefix_stats : tuple
+        Risultato di calculate_prefix_statistics
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    eligible : np.ndarray, default None
+        Maschera booleana [ribilanciamenti, strategie] delle strategie ammesse
+        (es. dopo la deduplicazione per correlazione); None = tutte
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+        
+    Notes:
+    ------
+    Stessa logica di calculate_sharpe_momentum_weights (Sharpe annualizzato,
+    deviazione standard di popolazione).
+    Ogni ribilanciamento costa O(strategie), indipendentemente dal lookback.
+    """
+    log_prefix, ruin_prefix, sum_prefix, sq_prefix = prefix_stats
+    n_assets = log_prefix.shape[1]
+    weights = np.empty((len(rebalance_idx), n_assets))
+    sharpe_ratios = np.empty(n_assets)
+    
+    for k in range(len(rebalance_idx)):
+        day = rebalance_idx[k]
+        if day < lookback:
+            weights[k] = 1.0 / n_assets
+            continue
+        mean_returns, volatilities = _window_mean_std(sum_prefix, sq_prefix, day - lookback, day)
+        for i in range(n_assets):
+            if volatilities[i] > 0:
+                sharpe_ratios[i] = (mean_returns[i] * 252) / (volatilities[i] * np.sqrt(252))
+            else:
+                sharpe_ratios[i] = 0.0
+        if eligible is not None:
+            _mask_ineligible(sharpe_ratios, eligible[k])
+        weights[k] = _normalized_positive_weights(sharpe_ratios)
+    
+    return weights
+
+
+@jit(nopython=True)
+def calculate_sharpe_momentum_weights_batch(returns_matrix, rebalance_idx, lookback):
+    """
+    Calcola i pesi Sharpe momentum per tutte le date di ribilanciamento in una sola chiamata.
+    
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice completa dei rendimenti [giorni, strategie]
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+    """
+    prefix_stats = calculate_prefix_statistics(returns_matrix)
+    return calculate_sharpe_momentum_weights_from_prefix(prefix_stats, rebalance_idx, lookback)
+
+
+@jit(nopython=True)
+def calculate_top_n_ranking_weights_from_prefix(prefix_stats, rebalance_idx, lookback, n_top=5,
+                                               eligible=None):
+    """
+    Calcola i pesi top-N per tutte le date di ribilanciamento
+    a partire dalle somme prefisse precalcolate.
+    
+    Parameters:
+    -----------
+    prefix_stats : tuple
+        Risultato di calculate_prefix_statistics
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    n_top : int, default 5
+        Numero di strategie top da selezionare
+    eligible : np.ndarray, default None
+        Maschera booleana [ribilanciamenti, strategie] delle strategie ammesse
+        (es. dopo la deduplicazione per correlazione); None = tutte
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+        
+    Notes:
+    ------
+    Stessa logica di calculate_top_n_ranking_weights.
+    Ogni ribilanciamento costa O(strategie), indipendentemente dal lookback.
+    """
+    log_prefix, ruin_prefix, sum_prefix, sq_prefix = prefix_stats
+    n_assets = log_prefix.shape[1]
+    weights = np.empty((len(rebalance_idx), n_assets))
+    
+    for k in range(len(rebalance_idx)):
+        day = rebalance_idx[k]
+        if day < lookback:
+            weights[k] = 1.0 / n_assets
+            continue
+        cum_returns = _window_cum_returns(log_prefix, ruin_prefix, day - lookback, day)
+        if eligible is not None:
+            _mask_ineligible(cum_returns, eligible[k])
+        weights[k] = _top_n_positive_weights(cum_returns, n_top)
+    
+    return weights
+
+
+@jit(nopython=True)
+def calculate_top_n_ranking_weights_batch(returns_matrix, rebalance_idx, lookback, n_top=5):
+    """
+    Calcola i pesi top-N per tutte le date di ribilanciamento in una sola chiamata.
+    
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice completa dei rendimenti [giorni, strategie]
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    n_top : int, default 5
+        Numero di strategie top da selezionare
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+    """
+    prefix_stats = calculate_prefix_statistics(returns_matrix)
+    return calculate_top_n_ranking_weights_from_prefix(prefix_stats, rebalance_idx, lookback, n_top)
+
+
+@jit(nopython=True)
+def calculate_equal_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible=None):
+    """
+    Calcola i pesi equal (pesi uguali sulle strategie in profitto) per tutte le date di ribilanciamento
+    a partire dalle somme prefisse precalcolate.
+    
+    Parameters:
+    -----------
+    prefix_stats : tuple
+        Risultato di calculate_prefix_statistics
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    eligible : np.ndarray, default None
+        Maschera booleana [ribilanciamenti, strategie] delle strategie ammesse
+        (es. dopo la deduplicazione per correlazione); None = tutte
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+        
+    Notes:
+    ------
+    Le strategie con rendimento cumulato <= 0 sono escluse; se lo sono tutte
+    i pesi sono zero.
+    Ogni ribilanciamento costa O(strategie), indipendentemente dal lookback.
+    """
+    log_prefix, ruin_prefix, sum_prefix, sq_prefix = prefix_stats
+    n_assets = log_prefix.shape[1]
+    weights = np.empty((len(rebalance_idx), n_assets))
+    
+    for k in range(len(rebalance_idx)):
+        day = rebalance_idx[k]
+        if day < lookback:
+            weights[k] = 1.0 / n_assets
+            continue
+        cum_returns = _window_cum_returns(log_prefix, ruin_prefix, day - lookback, day)
+        if eligible is not None:
+            _mask_ineligible(cum_returns, eligible[k])
+        weights[k] = _equal_positive_weights(cum_returns)
+    
+    return weights
+
+
+@jit(nopython=True)
+def calculate_equal_weights_batch(returns_matrix, rebalance_idx, lookback):
+    """
+    Calcola i pesi equal (pesi uguali sulle strategie in profitto) per tutte le date di ribilanciamento in una sola chiamata.
+    
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice completa dei rendimenti [giorni, strategie]
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+    """
+    prefix_stats = calculate_prefix_statistics(returns_matrix)
+    return calculate_equal_weights_from_prefix(prefix_stats, rebalance_idx, lookback)
+
+
+@jit(nopython=True)
+def calculate_risk_parity_weights_from_prefix(prefix_stats, rebalance_idx, lookback, eligible=None):
+    """
+    Calcola i pesi risk parity (inverso della volatilità sulle strategie in profitto) per tutte le date di ribilanciamento
+    a partire dalle somme prefisse precalcolate.
+    
+    Parameters:
+    -----------
+    prefix_stats : tuple
+        Risultato di calculate_prefix_statistics
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    eligible : np.ndarray, default None
+        Maschera booleana [ribilanciamenti, strategie] delle strategie ammesse
+        (es. dopo la deduplicazione per correlazione); None = tutte
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+        
+    Notes:
+    ------
+    Le strategie con rendimento cumulato <= 0 o volatilità nulla sono escluse.
+    Ogni ribilanciamento costa O(strategie), indipendentemente dal lookback.
+    """
+    log_prefix, ruin_prefix, sum_prefix, sq_prefix = prefix_stats
+    n_assets = log_prefix.shape[1]
+    weights = np.empty((len(rebalance_idx), n_assets))
+    
+    for k in range(len(rebalance_idx)):
+        day = rebalance_idx[k]
+        if day < lookback:
+            weights[k] = 1.0 / n_assets
+            continue
+        cum_returns = _window_cum_returns(log_prefix, ruin_prefix, day - lookback, day)
+        if eligible is not None:
+            _mask_ineligible(cum_returns, eligible[k])
+        mean_returns, volatilities = _window_mean_std(sum_prefix, sq_prefix, day - lookback, day)
+        weights[k] = _inverse_volatility_weights(cum_returns, volatilities)
     
     return weights
+
+
+@jit(nopython=True)
+def calculate_risk_parity_weights_batch(returns_matrix, rebalance_idx, lookback):
+    """
+    Calcola i pesi risk parity (inverso della volatilità sulle strategie in profitto) per tutte le date di ribilanciamento in una sola chiamata.
+    
+    Parameters:
+    -----------
+    returns_matrix : np.ndarray
+        Matrice completa dei rendimenti [giorni, strategie]
+    rebalance_idx : np.ndarray
+        Indici dei giorni di ribilanciamento
+    lookback : int
+        Periodo di lookback in giorni (finestra [idx - lookback, idx))
+    
+    Returns:
+    --------
+    np.ndarray
+        Matrice dei pesi [ribilanciamenti, strategie]
+    """
+    prefix_stats = calculate_prefix_statistics(returns_matrix)
+    return calculate_risk_parity_weights_from_prefix(prefix_stats, rebalance_idx, lookback)
@@ -25,7 +25,6 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 from typing import Dict, List, Any, Optional, Tuple
-from sklearn.linear_model import LinearRegression
 
 
 def plot_equity_curves(results_dict: Dict[str, Any], 
@@ -0,0 +1,283 @@
+"""
+Walk Forward Module for Dynamic Portfolio Optimization
+======================================================
+
+This module re-selects the rebalancer configuration (lookback and method) on
+a rolling training window and applies it to the following out-of-sample
+period, avoiding the look-ahead bias of choosing the configuration on the
+full history.
+
+Every configuration's backtest is causal (weights at each rebalance only use
+past returns), so the daily returns of all configurations are computed once
+(one grid pass, through the rebalancer cache) and each fold only ranks the
+training slices of that matrix with the vectorized metrics.
+
+Functions:
+----------
+- walk_forward_portfolio_optimization: Walk-forward selection of lookback and method
+- calculate_config_returns_matrix: Daily returns of every configuration of the grid
+- _rank_training_window: Metric of every configuration on a training slice
+
+Author: Portfolio Optimization Team
+Version: 1.0.0
+"""
+
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from joblib import Parallel, delayed
+from .performance_metrics import calculate_performance_metrics_matrix
+from .linearity_analysis import calculate_linearity_metrics_matrix
+from .optimization import (_LINEARITY_COLUMNS, _get_default_lookback_range, _get_default_methods,
+                           _publish_shared_arrays, _load_shared_rebalancer)
+from .calendars import DEFAULT_CALENDAR, describe_calendar
+
+
+def calculate_config_returns_matrix(rebalancer, configs: List[Tuple[int, str]],
+                                    rebalance_calendar: Any = DEFAULT_CALENDAR,
+                                    n_jobs: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcola i rendimenti giornalieri del portfolio per ogni configurazione.
+
+    Parameters:
+    -----------
+    rebalancer : DynamicPortfolioRebalancer
+        Istanza del rebalancer
+    configs : List[Tuple[int, str]]
+        Configurazioni (lookback, method)
+    rebalance_calendar : Any, default 'W-SUN'
+        Calendario di ribilanciamento comune a tutte le configurazioni
+    n_jobs : int, default 1
+        Numero di processi paralleli (1 = sequenziale, usa la cache del rebalancer)
+
+    Returns:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        (rendimenti [giorni, configurazioni], indice del primo ribilanciamento
+        di ogni configurazione)
+
+    Notes:
+    ------
+    Con n_jobs > 1 i worker ricevono la matrice dei rendimenti via memmap
+    come in grid_search_optimization e restituiscono solo i rendimenti.
+    """
+    if n_jobs > 1:
+        temp_dir = tempfile.mkdtemp(prefix='portfolio_wfo_')
+        try:
+            shared_path = _publish_shared_arrays(rebalancer, temp_dir)
+            columns = Parallel(n_jobs=n_jobs, verbose=1)(
+                delayed(_config_returns_shared)(lookback, method, shared_path, rebalance_calendar)
+                for lookback, method in configs
+            )
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    else:
+        columns = [_config_returns(rebalancer, lookback, method, rebalance_calendar)
+                   for lookback, method in configs]
+
+    returns = np.column_stack([column[0] for column in columns])
+    first_rebalance = np.array([column[1] for column in columns], dtype=np.int64)
+    return returns, first_rebalance
+
+
+def _config_returns(rebalancer, lookback: int, method: str,
+                    rebalance_calendar: Any) -> Tuple[np.ndarray, int]:
+    """
+    Rendimenti giornalieri e indice del primo ribilanciamento di una configurazione.
+    """
+    result = rebalancer.backtest_strategy(lookback, method, rebalance_calendar=rebalance_calendar)
+    returns = result['portfolio_data']['returns'].values.astype(np.float64)
+    first_rebalance = int(rebalancer.dates.get_indexer(result['weights'].index[:1])[0])
+    return returns, first_rebalance
+
+
+def _config_returns_shared(lookback: int, method: str, shared_path: str,
+                           rebalance_calendar: Any) -> Tuple[np.ndarray, int]:
+    """
+    Variante di _config_returns per i worker paralleli (dati condivisi via memmap).
+    """
+    return _config_returns(_load_shared_rebalancer(shared_path), lookback, method, rebalance_calendar)
+
+
+def _rank_training_window(train_returns: np.ndarray, rank_by: str) -> np.ndarray:
+    """
+    Calcola la metrica di ranking di ogni configurazione su una finestra di training.
+
+    Parameters:
+    -----------
+    train_returns : np.ndarray
+        Rendimenti [giorni di training, configurazioni]
+    rank_by : str
+        Metrica di performance (es. 'sharpe_ratio') o di linearità
+        (es. 'linearity_score')
+
+    Returns:
+    --------
+    np.ndarray
+        Metrica per configurazione (NaN sostituiti con -inf)
+    """
+    if rank_by in _LINEARITY_COLUMNS:
+        values = np.cumprod(1 + train_returns, axis=0)
+        scores = calculate_linearity_metrics_matrix(values)[rank_by]
+    else:
+        scores = calculate_performance_metrics_matrix(train_returns)[rank_by].values
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.where(np.isnan(scores), -np.inf, scores)
+
+
+def walk_forward_portfolio_optimization(rebalancer,
+                                        train_days: int = 365,
+                                        test_days: int = 90,
+                                        lookback_range: Optional[List[int]] = None,
+                                        methods: Optional[List[str]] = None,
+                                        rank_by: str = 'sharpe_ratio',
+                                        anchored: bool = False,
+                                        rebalance_calendar: Any = DEFAULT_CALENDAR,
+                                        n_jobs: int = 1) -> Dict[str, Any]:
+    """
+    Walk-forward della scelta di lookback e metodo del rebalancer.
+
+    Parameters:
+    -----------
+    rebalancer : DynamicPortfolioRebalancer
+        Istanza del rebalancer configurato con i dati
+    train_days : int, default 365
+        Giorni della finestra di training su cui scegliere la configurazione
+    test_days : int, default 90
+        Giorni out-of-sample in cui applicare la configurazione scelta
+        (ogni quanti giorni si ripete la scelta)
+    lookback_range : Optional[List[int]], default None
+        Lookback da testare. Se None, usa quelli di grid_search_optimization
+    methods : Optional[List[str]], default None
+        Metodi da testare. Se None, usa quelli di grid_search_optimization
+    rank_by : str, default 'sharpe_ratio'
+        Metrica (più alto = migliore) usata per scegliere la configurazione,
+        es. 'sharpe_ratio', 'annual_return' o 'linearity_score'
+    anchored : bool, default False
+        Se True la finestra di training parte sempre dall'inizio dei dati
+        utilizzabili (expanding window) invece di scorrere
+    rebalance_calendar : Any, default 'W-SUN'
+        Calendario di ribilanciamento comune a tutte le configurazioni
+    n_jobs : int, default 1
+        Numero di processi paralleli per il calcolo delle configurazioni
+
+    Returns:
+    --------
+    Dict[str, Any]
+        - portfolio_data: DataFrame out-of-sample con 'returns', 'value',
+          'lookback' e 'method' attivi ogni giorno
+        - selections: DataFrame con una riga per fold (periodi di training e
+          test, configurazione scelta, metrica di training e Sharpe di test)
+        - summary: metriche di performance della curva out-of-sample
+        - in_sample_benchmark: miglior configurazione sull'intera storia e sue
+          metriche sullo stesso periodo out-of-sample (misura del look-ahead bias)
+        - config_returns: DataFrame dei rendimenti di tutte le configurazioni
+
+    Notes:
+    ------
+    - Ogni configurazione viene calcolata una sola volta sull'intera storia:
+      i pesi a ogni ribilanciamento usano solo dati passati, quindi i
+      rendimenti di un giorno non dipendono dai dati successivi
+    - Il primo fold inizia quando tutte le configurazioni hanno completato il
+      primo ribilanciamento più train_days giorni, così nessuna finestra di
+      training contiene il periodo di warm-up
+    - Al cambio di configurazione il portfolio passa ai pesi correnti della
+      nuova configurazione (come un ribilanciamento)
+    """
+    if train_days <= 0 or test_days <= 0:
+        raise ValueError("train_days e test_days devono essere positivi")
+
+    if lookback_range is None:
+        lookback_range = _get_default_lookback_range()
+    if methods is None:
+        methods = _get_default_methods()
+    configs = [(lookback, method) for lookback in lookback_range for method in methods]
+
+    n_days = len(rebalancer.dates)
+
+    print(f"🔍 Avvio walk-forward del rebalancer...")
+    print(f"   Configurazioni: {len(configs)} | Training: {train_days} giorni | Test: {test_days} giorni")
+    print(f"   Finestra: {'anchored' if anchored else 'rolling'} | Ranking: {rank_by}"
+          f" | Calendario: {describe_calendar(rebalance_calendar)}")
+
+    # Una sola passata della griglia sull'intera storia
+    config_returns, first_rebalance = calculate_config_returns_matrix(
+        rebalancer, configs, rebalance_calendar, n_jobs
+    )
+    warmup_end = int(first_rebalance.max())
+    start = warmup_end + train_days
+
+    if start >= n_days:
+        raise ValueError(f"Dati insufficienti: servono più di {start} giorni "
+                         f"(warm-up {warmup_end} + training {train_days}), disponibili {n_days}")
+
+    oos_returns = np.zeros(n_days - start)
+    oos_config = np.zeros(n_days - start, dtype=np.int64)
+    selections = []
+
+    for fold, test_start in enumerate(range(start, n_days, test_days), 1):
+        test_end = min(test_start + test_days, n_days)
+        train_start = warmup_end if anchored else test_start - train_days
+
+        scores = _rank_training_window(config_returns[train_start:test_start], rank_by)
+        best = int(np.argmax(scores))
+
+        oos_returns[test_start - start:test_end - start] = config_returns[test_start:test_end, best]
+        oos_config[test_start - start:test_end - start] = best
+
+        test_metrics = calculate_performance_metrics_matrix(config_returns[test_start:test_end, best:best + 1])
+        selections.append({
+            'fold': fold,
+            'train_start': rebalancer.dates[train_start],
+            'train_end': rebalancer.dates[test_start - 1],
+            'test_start': rebalancer.dates[test_start],
+            'test_end': rebalancer.dates[test_end - 1],
+            'lookback': configs[best][0],
+            'method': configs[best][1],
+            f'train_{rank_by}': scores[best],
+            'test_total_return': test_metrics['total_return'].iloc[0],
+            'test_sharpe_ratio': test_metrics['sharpe_ratio'].iloc[0]
+        })
+
+    selections_df = pd.DataFrame(selections)
+    oos_dates = rebalancer.dates[start:]
+    portfolio_data = pd.DataFrame({
+        'returns': oos_returns,
+        'value': np.cumprod(1 + oos_returns),
+        'lookback': [configs[i][0] for i in oos_config],
+        'method': [configs[i][1] for i in oos_config]
+    }, index=oos_dates)
+
+    # Metriche out-of-sample della curva walk-forward e del benchmark in-sample
+    in_sample_best = int(np.argmax(_rank_training_window(config_returns[warmup_end:], rank_by)))
+    comparison = calculate_performance_metrics_matrix(
+        np.column_stack([oos_returns, config_returns[start:, in_sample_best]])
+    )
+    summary = comparison.iloc[0].to_dict()
+    summary['n_folds'] = len(selections_df)
+    summary['n_config_changes'] = int((selections_df[['lookback', 'method']]
+                                       .ne(selections_df[['lookback', 'method']].shift())
+                                       .any(axis=1).sum()) - 1)
+    benchmark = {
+        'lookback': configs[in_sample_best][0],
+        'method': configs[in_sample_best][1],
+        **comparison.iloc[1].to_dict()
+    }
+
+    columns = pd.MultiIndex.from_tuples(configs, names=['lookback', 'method'])
+    config_returns_df = pd.DataFrame(config_returns, index=rebalancer.dates, columns=columns)
+
+    print(f"✅ Walk-forward completato!")
+    print(f"   Fold: {summary['n_folds']} | Cambi di configurazione: {summary['n_config_changes']}")
+    print(f"   Sharpe out-of-sample: {summary['sharpe_ratio']:.3f} "
+          f"(in-sample {benchmark['method']} | Lookback {benchmark['lookback']}: {benchmark['sharpe_ratio']:.3f})")
+
+    return {
+        'portfolio_data': portfolio_data,
+        'selections': selections_df,
+        'summary': summary,
+        'in_sample_benchmark': benchmark,
+        'config_returns': config_returns_df
+    }
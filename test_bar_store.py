@@ -0,0 +1,139 @@
+"""
+Test script for the incremental tick ingestion into minute-bar stores.
+
+This script verifies that:
+1. Ingesting two overlapping tick exports gives the same bars as a one-shot
+   resample of their union (directory and single-file stores)
+2. Re-ingesting the same export adds no bars and writes no file
+3. A custom timestamp column name is kept in the store and the fingerprint
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.backtester import bar_store
+from modules.backtester.data_loader import load_tick_data, prepare_minute_data
+
+
+def generate_ticks(n_ticks=20000):
+    """
+    Generate synthetic ticks every 7 seconds, with a missing bid every 9th tick like MT5 exports.
+    """
+    np.random.seed(42)  # For reproducibility
+    index = pd.date_range('2025-01-06 00:00:00', periods=n_ticks, freq='7s')
+    bid = 1.1 + np.cumsum(np.random.normal(0, 1e-5, n_ticks))
+    ask = bid + 1e-4
+    bid[5::9] = np.nan
+    return index, bid, ask
+
+
+def write_export(path, index, bid, ask):
+    """
+    Write ticks in the MT5 tab-separated export format.
+    """
+    export = pd.DataFrame({
+        'date': index.strftime('%Y.%m.%d'),
+        'time': index.strftime('%H:%M:%S.%f').str[:-3],
+        'bid': bid, 'ask': ask, 'last': '', 'volume': '', 'flags': 6
+    })
+    export.to_csv(path, sep='\t', index=False,
+                  header=['<DATE>', '<TIME>', '<BID>', '<ASK>', '<LAST>', '<VOLUME>', '<FLAGS>'])
+
+
+def write_overlapping_exports(folder):
+    """
+    Write two overlapping exports and the export of their union.
+    """
+    index, bid, ask = generate_ticks()
+    paths = {name: os.path.join(folder, f'{name}.csv') for name in ['first', 'second', 'union']}
+    write_export(paths['first'], index[:10003], bid[:10003], ask[:10003])
+    write_export(paths['second'], index[9000:], bid[9000:], ask[9000:])
+    write_export(paths['union'], index, bid, ask)
+    return paths
+
+
+def test_overlapping_exports_match_one_shot_resample():
+    """
+    Ingest two overlapping exports into both store layouts and compare with the union.
+    """
+    folder = tempfile.mkdtemp(prefix='bar_store_test_')
+    try:
+        paths = write_overlapping_exports(folder)
+        expected = prepare_minute_data(load_tick_data(paths['union']))
+
+        # Directory store, built incrementally from an empty path
+        directory_store = os.path.join(folder, 'store')
+        first = bar_store.ingest_tick_export(paths['first'], directory_store, chunk_rows=3000)
+        second = bar_store.ingest_tick_export(paths['second'], directory_store, chunk_rows=3000)
+        assert first['new_bars'] + second['new_bars'] == len(expected)
+        assert second['first_new_bar'] > first['last_bar']
+
+        # Single-file store, seeded with the first export
+        file_store = os.path.join(folder, 'bars.parquet')
+        prepare_minute_data(load_tick_data(paths['first'])).to_parquet(file_store)
+        bar_store.ingest_tick_export(paths['second'], file_store)
+
+        for store in [directory_store, file_store]:
+            stored = pd.read_parquet(store)
+            assert stored.index.is_unique and stored.index.is_monotonic_increasing, store
+            assert stored.index.equals(expected.index), store
+            assert np.allclose(stored[expected.columns].values, expected.values), store
+            print(f"{os.path.basename(store)}: {len(stored)} bars equal to the one-shot resample, OK")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_reingesting_the_same_export_adds_nothing():
+    """
+    A second ingestion of the same export must not add bars or touch the store.
+    """
+    folder = tempfile.mkdtemp(prefix='bar_store_test_')
+    try:
+        paths = write_overlapping_exports(folder)
+        store = os.path.join(folder, 'store')
+        bar_store.ingest_tick_export(paths['first'], store)
+        parts_before = sorted(os.listdir(store))
+        fingerprint_before = bar_store.read_fingerprint(store)
+
+        again = bar_store.ingest_tick_export(paths['first'], store)
+        assert again['new_bars'] == 0 and again['written_part'] is None
+        assert sorted(os.listdir(store)) == parts_before
+        assert bar_store.read_fingerprint(store) == fingerprint_before
+        print("Re-ingesting the same export: 0 new bars, OK")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_custom_timestamp_column():
+    """
+    Stores whose timestamp column is not 'datetime' keep their name and fingerprint.
+    """
+    folder = tempfile.mkdtemp(prefix='bar_store_test_')
+    try:
+        paths = write_overlapping_exports(folder)
+        store = os.path.join(folder, 'store')
+        bar_store.ingest_tick_export(paths['first'], store, datetime_column='time')
+        summary = bar_store.ingest_tick_export(paths['second'], store, datetime_column='time')
+
+        stored = pd.read_parquet(store)
+        assert stored.index.name == 'time'
+        assert bar_store.get_last_bar_timestamp(store, datetime_column='time') == stored.index[-1]
+        assert summary['fingerprint']['first_bar'] == str(stored.index[0])
+        print("Custom timestamp column 'time': OK")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_overlapping_exports_match_one_shot_resample()
+    test_reingesting_the_same_export_adds_nothing()
+    test_custom_timestamp_column()
+    print("\nTest completed.")
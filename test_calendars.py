@@ -0,0 +1,140 @@
+"""
+Test script for the rebalance calendars of the portfolio modules.
+
+This script verifies that:
+1. The default 'W-SUN' calendar reproduces the Sunday indices of the
+   original backtest_strategy loop on a continuous daily index
+2. Every calendar form ('D', 'W-XXX', 'MS'/'ME', int N, event list) gives
+   unique, sorted indices, all >= start_idx, on the expected days
+3. Unsupported calendars raise ValueError
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.dynamic_portfolio_modules.calendars import (DEFAULT_CALENDAR, get_rebalance_indices,
+                                                         calendar_cache_key)
+
+
+def reference_sunday_indices(dates, lookback_days):
+    """
+    Rebalance indices of the original backtest_strategy loop (first Sunday
+    after the lookback, then every 7 days, moved to the next Sunday if needed).
+    """
+    n_days = len(dates)
+    start_idx = lookback_days
+    while start_idx < n_days:
+        if dates[start_idx].weekday() == 6:
+            break
+        start_idx += 1
+
+    indices = []
+    for i in range(start_idx, n_days, 7):
+        if dates[i].weekday() != 6:
+            for j in range(i, min(i + 7, n_days)):
+                if dates[j].weekday() == 6:
+                    i = j
+                    break
+            else:
+                continue
+        indices.append(i)
+    return np.array(indices, dtype=np.int64)
+
+
+def assert_valid_indices(indices, start_idx, n_days, label):
+    """
+    Indices are int64, unique, sorted and inside [start_idx, n_days).
+    """
+    assert indices.dtype == np.int64, label
+    assert (np.diff(indices) > 0).all(), label
+    assert len(indices) == 0 or (indices[0] >= start_idx and indices[-1] < n_days), label
+
+
+def test_default_calendar_matches_sunday_loop():
+    """
+    'W-SUN' equals the historical Sunday schedule for every start weekday and lookback.
+    """
+    assert DEFAULT_CALENDAR == 'W-SUN'
+    for first_day in pd.date_range('2024-01-01', periods=7, freq='D'):
+        dates = pd.date_range(first_day, periods=400, freq='D')
+        for lookback in [0, 5, 30, 90, 399, 400]:
+            expected = reference_sunday_indices(dates, lookback)
+            actual = get_rebalance_indices(dates, start_idx=lookback)
+            assert np.array_equal(actual, expected), (first_day, lookback)
+    print("'W-SUN' reproduces the original Sunday indices: OK")
+
+
+def test_calendar_forms():
+    """
+    Each calendar form on a daily index and on a business-day index.
+    """
+    for freq in ['D', 'B']:
+        dates = pd.date_range('2024-01-15', periods=300, freq=freq)
+        n_days = len(dates)
+        months = dates.to_period('M')
+        for start_idx in [0, 20]:
+            calendars = {
+                'D': None, 'W-WED': None, 'w-sun': None, 'MS': None, 'ME': None, 'M': None, 5: None,
+                'events': [pd.Timestamp(event) for event in
+                           ['2024-03-01', '2024-02-10', '2024-02-10 12:00', '2023-12-01', '2030-01-01']]
+            }
+            for calendar, events in calendars.items():
+                indices = get_rebalance_indices(dates, events if calendar == 'events' else calendar, start_idx)
+                label = (freq, start_idx, calendar)
+                assert_valid_indices(indices, start_idx, n_days, label)
+                selected = dates[indices]
+
+                if calendar == 'D':
+                    assert np.array_equal(indices, np.arange(start_idx, n_days)), label
+                elif calendar == 'W-WED':
+                    assert (selected.dayofweek == 2).all() and len(indices) > 0, label
+                elif calendar == 'w-sun':
+                    assert (selected.dayofweek == 6).all() and (len(indices) > 0) == (freq == 'D'), label
+                elif calendar == 'MS':
+                    # First bar of each month
+                    expected = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+                    assert np.array_equal(indices, expected[expected >= start_idx]), label
+                elif calendar in ('ME', 'M'):
+                    # Last bar of each month
+                    expected = np.flatnonzero(np.r_[months[1:] != months[:-1], True])
+                    assert np.array_equal(indices, expected[expected >= start_idx]), label
+                elif calendar == 5:
+                    assert np.array_equal(indices, np.arange(start_idx, n_days, 5)), label
+                else:
+                    # First bar on or after each event, duplicates and out-of-range events dropped
+                    expected = sorted({int(np.searchsorted(dates.values, event.to_datetime64(), 'left'))
+                                       for event in events})
+                    expected = [i for i in expected if start_idx <= i < n_days]
+                    assert indices.tolist() == expected, label
+    print("Every calendar form gives unique sorted indices: OK")
+
+    assert calendar_cache_key('w-sun') == calendar_cache_key('W-SUN')
+    assert calendar_cache_key(['2024-02-10', '2024-01-01']) == calendar_cache_key(['2024-01-01', '2024-02-10'])
+    print("Equivalent calendars share the cache key: OK")
+
+
+def test_invalid_calendars():
+    """
+    Unknown strings and non-positive steps raise ValueError.
+    """
+    dates = pd.date_range('2024-01-01', periods=30, freq='D')
+    for calendar in ['W-XYZ', 'Q', 0, -3]:
+        try:
+            get_rebalance_indices(dates, calendar)
+        except ValueError:
+            continue
+        raise AssertionError(f"Calendar {calendar!r} accepted")
+    print("Invalid calendars raise ValueError: OK")
+
+
+if __name__ == "__main__":
+    test_default_calendar_matches_sunday_loop()
+    test_calendar_forms()
+    test_invalid_calendars()
+    print("\nTest completed.")
@@ -0,0 +1,76 @@
+"""
+Test script for the compact dtype mode of the backtester.
+
+This script verifies that, for naive and tz-aware minute data:
+1. The compact epoch index decodes back to the original timestamps
+2. The Friday closing bars are the same in compact and standard mode
+3. The trades and their timestamps are the same in compact and standard mode
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.backtester.backtest_engine import Backtest
+from modules.backtester.data_loader import to_compact_dtypes, decode_datetime_index
+from modules.backtester import indicators
+
+
+def generate_test_data(tz=None):
+    """
+    Generate 12 days of minute bars (weekdays only) starting on Monday 2025-07-14.
+    """
+    index = pd.date_range('2025-07-14', periods=12 * 24 * 60, freq='min', tz=tz)
+    index = index[index.weekday < 5]
+
+    np.random.seed(42)  # For reproducibility
+    # Prices on a 1/1024 grid are exact in float32, so both modes see the same crossings
+    price = 1.0 + np.round(np.cumsum(np.random.normal(0, 0.0005, len(index))) * 1024) / 1024
+    spread = 2 / 1024
+    df = pd.DataFrame({'bid': price - spread / 2, 'ask': price + spread / 2, 'midprice': price}, index=index)
+
+    return indicators.bollinger_bands(df, price_column='midprice', window=20, num_std_dev=2.0).dropna()
+
+
+def run_backtest(data):
+    """
+    Run the backtest and return (backtest, trades DataFrame).
+    """
+    backtester = Backtest(data)
+    backtester.run()
+    return backtester, backtester.get_trades_dataframe()
+
+
+def test_compact_mode_matches_standard_mode():
+    """
+    Compare compact and standard mode on naive and tz-aware data.
+    """
+    for tz in [None, 'Europe/Athens']:
+        standard_data = generate_test_data(tz)
+        compact_data = to_compact_dtypes(standard_data)
+
+        assert decode_datetime_index(compact_data).equals(standard_data.index.rename('datetime')), tz
+
+        standard_bt, standard_trades = run_backtest(standard_data)
+        compact_bt, compact_trades = run_backtest(compact_data)
+
+        standard_friday = standard_bt._prepare_friday_close_array()
+        compact_friday = compact_bt._prepare_friday_close_array()
+        assert np.array_equal(standard_friday, compact_friday), tz
+
+        assert len(standard_trades) == len(compact_trades) > 0, tz
+        for column in ['Entry_idx', 'Exit_idx', 'Entry_Time', 'Exit_Time']:
+            assert (standard_trades[column].values == compact_trades[column].values).all(), (tz, column)
+
+        print(f"tz={tz}: {int(standard_friday.sum())} Friday closing bars, "
+              f"{len(standard_trades)} trades, first exit {compact_trades['Exit_Time'].iloc[0]}, OK")
+
+
+if __name__ == "__main__":
+    test_compact_mode_matches_standard_mode()
+    print("\nTest completed.")
@@ -0,0 +1,144 @@
+"""
+Test script for the correlation deduplication of the portfolio modules.
+
+This script verifies that:
+1. deduplicate_strategies keeps the best strategy of every cluster (first column on ties)
+2. StrategyClusterer keeps exactly one of duplicate columns, handles a single
+   strategy and an all-zero column, and its correlation matches np.corrcoef
+3. The eligible masks of the *_from_prefix kernels (and of the covariance
+   methods) give weight 0 to the masked strategies
+4. A rebalancer backtest with dedup_threshold never invests in two duplicates
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.dynamic_portfolio_modules.correlation import StrategyClusterer, deduplicate_strategies
+from modules.dynamic_portfolio_modules.covariance import COVARIANCE_METHODS, calculate_covariance_weights_batch
+from modules.dynamic_portfolio_modules.portfolio_rebalancer import DynamicPortfolioRebalancer
+from modules.dynamic_portfolio_modules.utils import (
+    calculate_prefix_statistics,
+    calculate_momentum_weights_from_prefix,
+    calculate_sharpe_momentum_weights_from_prefix,
+    calculate_top_n_ranking_weights_from_prefix,
+    calculate_equal_weights_from_prefix,
+    calculate_risk_parity_weights_from_prefix
+)
+
+PREFIX_KERNELS = {
+    'momentum': calculate_momentum_weights_from_prefix,
+    'sharpe_momentum': calculate_sharpe_momentum_weights_from_prefix,
+    'top_n_ranking': calculate_top_n_ranking_weights_from_prefix,
+    'equal': calculate_equal_weights_from_prefix,
+    'risk_parity': calculate_risk_parity_weights_from_prefix,
+}
+
+
+def generate_test_returns(n_days=300):
+    """
+    Generate returns with three identical columns (0, 1, 2), two independent
+    columns (3, 4) and an all-zero column (5).
+    """
+    np.random.seed(42)  # For reproducibility
+    base = np.random.normal(0.001, 0.01, n_days)
+    independent = np.random.normal(0.0005, 0.01, (n_days, 2))
+    return np.column_stack([base, base, base, independent, np.zeros(n_days)])
+
+
+def test_deduplicate_strategies():
+    """
+    One survivor per cluster: the highest score, the first column on ties.
+    """
+    labels = np.array([1, 2, 1, 3, 2, 1])
+    scores = np.array([0.1, 0.5, 0.3, -0.2, 0.5, 0.3])
+    keep = deduplicate_strategies(labels, scores)
+    assert keep.tolist() == [False, True, True, True, False, False], keep
+
+    assert deduplicate_strategies(np.array([1]), np.array([0.0])).tolist() == [True]
+    assert deduplicate_strategies(np.array([], dtype=int), np.array([])).tolist() == []
+    print("deduplicate_strategies keeps one strategy per cluster: OK")
+
+
+def test_strategy_clusterer():
+    """
+    Duplicate columns collapse to one, the all-zero column stays on its own.
+    """
+    returns_matrix = generate_test_returns()
+    clusterer = StrategyClusterer(returns_matrix)
+
+    # Correlation of the zero column is 0 with the others (np.corrcoef gives NaN)
+    expected = np.corrcoef(returns_matrix[50:110, :5], rowvar=False)
+    corr = clusterer.correlation(50, 110)
+    assert np.allclose(corr[:5, :5], expected)
+    assert (corr[5, :5] == 0).all() and corr[5, 5] == 1.0
+
+    rebalance_idx = np.array([30, 60, 120, 200, 299], dtype=np.int64)
+    scores = np.tile(np.arange(6, dtype=np.float64), (len(rebalance_idx), 1))
+    scores[:, :3] = 1.0  # Tie between the duplicates: the first column survives
+    masks = clusterer.dedup_masks(rebalance_idx, 60, scores, threshold=0.8)
+
+    assert masks[0].all(), masks[0]  # Before the lookback nothing is removed
+    for mask in masks[1:]:
+        assert mask.tolist() == [True, False, False, True, True, True], mask
+    print("StrategyClusterer keeps one duplicate and the all-zero column: OK")
+
+    single = StrategyClusterer(returns_matrix[:, :1])
+    assert single.dedup_masks(rebalance_idx, 60, scores[:, :1]).all()
+    print("StrategyClusterer with a single strategy: OK")
+
+
+def test_eligible_masks_zero_the_weights():
+    """
+    Masked strategies get weight 0, an all-True mask equals no mask.
+    """
+    np.random.seed(7)  # For reproducibility
+    returns_matrix = np.random.normal(0.002, 0.01, (200, 8))
+    prefix_stats = calculate_prefix_statistics(returns_matrix)
+    rebalance_idx = np.arange(20, 200, 7, dtype=np.int64)
+    eligible = np.random.random((len(rebalance_idx), 8)) < 0.6
+    eligible[-1] = False
+
+    kernels = {name: (lambda mask, kernel=kernel: kernel(prefix_stats, rebalance_idx, 20, eligible=mask))
+               for name, kernel in PREFIX_KERNELS.items()}
+    for method in COVARIANCE_METHODS:
+        kernels[method] = (lambda mask, method=method: calculate_covariance_weights_batch(
+            returns_matrix, rebalance_idx, 20, method, prefix_stats=prefix_stats, eligible=mask))
+
+    for name, kernel in kernels.items():
+        weights = kernel(eligible)
+        assert (weights[~eligible] == 0).all(), name
+        assert np.allclose(weights[:-1].sum(axis=1), 1.0), name
+        assert (weights[-1] == 0).all(), name
+        assert np.allclose(kernel(np.ones_like(eligible)), kernel(None)), name
+        print(f"{name}: masked strategies have weight 0, OK")
+
+
+def test_rebalancer_dedup_threshold():
+    """
+    With deduplication the portfolio never holds two of the identical columns.
+    """
+    returns_matrix = generate_test_returns()
+    dates = pd.date_range('2024-01-01', periods=len(returns_matrix), freq='D')
+    names = [f'S{j}' for j in range(returns_matrix.shape[1])]
+    rebalancer = DynamicPortfolioRebalancer.from_arrays(returns_matrix, dates, names)
+
+    for method in ['equal', 'momentum', 'min_variance']:
+        weights = rebalancer.backtest_strategy(30, method, dedup_threshold=0.8)['weights']
+        assert ((weights[['S0', 'S1', 'S2']] > 0).sum(axis=1) <= 1).all(), method
+        plain = rebalancer.backtest_strategy(30, method)['weights']
+        assert ((plain[['S0', 'S1', 'S2']] > 0).sum(axis=1) != 1).any(), method
+    print("Rebalancer with dedup_threshold holds one duplicate: OK")
+
+
+if __name__ == "__main__":
+    test_deduplicate_strategies()
+    test_strategy_clusterer()
+    test_eligible_masks_zero_the_weights()
+    test_rebalancer_dedup_threshold()
+    print("\nTest completed.")
@@ -0,0 +1,109 @@
+"""
+Test script for the covariance-aware allocation methods of the portfolio modules.
+
+This script verifies that:
+1. The min-variance weights respect the bounds, sum to 1 and have a variance
+   no higher than the SLSQP solution of the same problem
+2. The ERC weights give equal risk contributions to the admitted strategies
+3. RollingCovariance matches np.cov on every window, moving forward, backward
+   and jumping without overlap
+"""
+
+import numpy as np
+import sys
+import os
+from scipy.optimize import minimize
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.dynamic_portfolio_modules.covariance import (RollingCovariance, calculate_min_variance_weights,
+                                                          calculate_erc_weights)
+
+
+def generate_test_covariances(n_cases=30):
+    """
+    Generate random covariance matrices with correlated strategies and random masks.
+    """
+    np.random.seed(42)  # For reproducibility
+    cases = []
+    for _ in range(n_cases):
+        n_assets = np.random.randint(2, 12)
+        factors = np.random.normal(0, 0.01, (60, 3))
+        returns = factors @ np.random.normal(0, 1, (3, n_assets)) + np.random.normal(0, 0.01, (60, n_assets))
+        mask = np.random.random(n_assets) < 0.8
+        mask[np.random.randint(n_assets)] = True
+        cases.append((np.cov(returns, rowvar=False, bias=True), mask))
+    return cases
+
+
+def slsqp_min_variance(cov, mask):
+    """
+    Reference long-only minimum variance on the admitted strategies with SLSQP.
+    """
+    idx = np.flatnonzero(mask)
+    sub = cov[np.ix_(idx, idx)]
+    result = minimize(lambda w: w @ sub @ w, np.full(len(idx), 1.0 / len(idx)),
+                      jac=lambda w: 2 * sub @ w, method='SLSQP', bounds=[(0, 1)] * len(idx),
+                      constraints=[{'type': 'eq', 'fun': lambda w: w.sum() - 1}],
+                      options={'ftol': 1e-15, 'maxiter': 1000})
+    weights = np.zeros(len(mask))
+    weights[idx] = result.x
+    return weights
+
+
+def test_min_variance_matches_slsqp():
+    """
+    Compare the active set solution with SLSQP on random problems.
+    """
+    for k, (cov, mask) in enumerate(generate_test_covariances()):
+        weights = calculate_min_variance_weights(cov, mask)
+        reference = slsqp_min_variance(cov, mask)
+
+        assert np.isclose(weights.sum(), 1.0), k
+        assert (weights >= 0).all() and (weights <= 1).all(), k
+        assert (weights[~mask] == 0).all(), k
+        variance, reference_variance = weights @ cov @ weights, reference @ cov @ reference
+        assert variance <= reference_variance * (1 + 1e-8), (k, variance, reference_variance)
+    print("Min-variance weights no worse than SLSQP: OK")
+
+
+def test_erc_risk_contributions_are_equal():
+    """
+    Risk contribution w_i (Σw)_i of every admitted strategy equals 1/m of the variance.
+    """
+    for k, (cov, mask) in enumerate(generate_test_covariances()):
+        weights = calculate_erc_weights(cov, mask)
+        contributions = weights * (cov @ weights)
+        admitted = contributions[mask] / contributions.sum()
+
+        assert np.isclose(weights.sum(), 1.0) and (weights[~mask] == 0).all(), k
+        assert (weights[mask] > 0).all(), k
+        assert np.allclose(admitted, 1.0 / mask.sum(), rtol=1e-5), (k, admitted)
+    print("ERC risk contributions are equal: OK")
+
+
+def test_rolling_covariance_matches_numpy():
+    """
+    Query every window in order, then backward and non-overlapping jumps.
+    """
+    np.random.seed(7)  # For reproducibility
+    returns_matrix = np.random.normal(0.0005, 0.01, (200, 6))
+    lookback = 30
+
+    for shrinkage in [0.0, 0.1]:
+        rolling = RollingCovariance(returns_matrix, lookback, shrinkage=shrinkage)
+        days = list(range(lookback, len(returns_matrix) + 1)) + [150, 40, 199, 31]
+        for day in days:
+            expected = np.cov(returns_matrix[day - lookback:day], rowvar=False, bias=True)
+            expected[~np.eye(len(expected), dtype=bool)] *= 1.0 - shrinkage
+            assert np.allclose(rolling.covariance_at(day), expected, rtol=1e-9, atol=1e-15), (shrinkage, day)
+        print(f"RollingCovariance (shrinkage {shrinkage}) matches np.cov on {len(days)} windows: OK")
+
+
+if __name__ == "__main__":
+    test_min_variance_matches_slsqp()
+    test_erc_risk_contributions_are_equal()
+    test_rolling_covariance_matches_numpy()
+    print("\nTest completed.")
@@ -0,0 +1,126 @@
+"""
+Test script for the parquet cache of the portfolio data loader.
+
+This script verifies that:
+1. A warm load returns the same DataFrames (daily frequency included) as a load without cache
+2. A modified, an added and a removed CSV invalidate the cache: the result
+   equals a full load without cache
+3. A file with the same content and a new mtime is reused without reparsing
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.dynamic_portfolio_modules import data_loader
+
+DATE_FORMAT = '%Y.%m.%d %H:%M'
+
+
+def write_strategy_csv(path, seed, start='2024-01-01', n_trades=120):
+    """
+    Write a UTF-16 tab-separated export: header, then date and balance columns.
+    """
+    rng = np.random.default_rng(seed)
+    times = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, 200 * 24 * 60, n_trades)), unit='min')
+    balance = 10000 + np.cumsum(rng.normal(5, 50, n_trades))
+    lines = ['<DATE>\t<BALANCE>\t<EQUITY>\t<DEPOSIT LOAD>']
+    lines += [f"{t.strftime(DATE_FORMAT)}\t{b:.2f}\t{b:.2f}\t0.0000" for t, b in zip(times, balance)]
+    with open(path, 'wb') as f:
+        f.write(('\r\n'.join(lines) + '\r\n').encode('utf-16'))
+
+
+def load(folder, use_cache=True):
+    """
+    Load the folder with a fixed date format (the cache is inside the folder).
+    """
+    _, combined_df, returns_df = data_loader.load_trading_data(folder, n_workers=1, date_format=DATE_FORMAT,
+                                                               use_cache=use_cache)
+    return combined_df, returns_df
+
+
+def assert_same_as_uncached(folder, label):
+    """
+    Compare the cached load with a full load without cache.
+    """
+    combined_df, returns_df = load(folder)
+    expected_combined, expected_returns = load(folder, use_cache=False)
+    pd.testing.assert_frame_equal(combined_df, expected_combined)
+    pd.testing.assert_frame_equal(returns_df, expected_returns)
+    assert combined_df.index.freq == 'D' and returns_df.index.freq == 'D', label
+    print(f"{label}: {combined_df.shape[1]} strategies, {len(combined_df)} days, OK")
+    return combined_df
+
+
+def count_parsed_files(folder):
+    """
+    Load the folder and count the files parsed from CSV (the others come from the cache).
+    """
+    parsed = []
+    original = data_loader._process_csv_file
+
+    def counting_process(file_path, filename, date_format=None):
+        parsed.append(filename)
+        return original(file_path, filename, date_format)
+
+    data_loader._process_csv_file = counting_process
+    try:
+        load(folder)
+    finally:
+        data_loader._process_csv_file = original
+    return parsed
+
+
+def test_cache_invalidation():
+    """
+    Cold, warm, modified, added, removed and touched files.
+    """
+    folder = tempfile.mkdtemp(prefix='portfolio_cache_test_')
+    try:
+        for seed in range(3):
+            write_strategy_csv(os.path.join(folder, f'eurusd_{seed}.csv'), seed)
+
+        assert_same_as_uncached(folder, 'Cold load')
+        assert count_parsed_files(folder) == []
+        assert_same_as_uncached(folder, 'Warm load')
+
+        # Modified file: new trades, new mtime
+        path = os.path.join(folder, 'eurusd_1.csv')
+        stat = os.stat(path)
+        write_strategy_csv(path, 100)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert count_parsed_files(folder) == ['eurusd_1.csv']
+        assert_same_as_uncached(folder, 'Modified file')
+
+        # Added file, starting after the other strategies
+        write_strategy_csv(os.path.join(folder, 'gbpusd_0.csv'), 10, start='2024-03-01')
+        assert count_parsed_files(folder) == ['gbpusd_0.csv']
+        combined_df = assert_same_as_uncached(folder, 'Added file')
+        assert 'GBPUSD_0' in combined_df.columns
+
+        # Removed file
+        os.remove(os.path.join(folder, 'eurusd_0.csv'))
+        assert count_parsed_files(folder) == []
+        combined_df = assert_same_as_uncached(folder, 'Removed file')
+        assert 'EURUSD_0' not in combined_df.columns
+
+        # Same content, new mtime: the hash matches and the file is not reparsed
+        path = os.path.join(folder, 'eurusd_2.csv')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert count_parsed_files(folder) == []
+        assert_same_as_uncached(folder, 'Touched file')
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_cache_invalidation()
+    print("\nTest completed.")
@@ -0,0 +1,198 @@
+"""
+Test script for the consecutive-wins (streak) and autocorrelation filters of the portfolio modules.
+
+This script verifies that:
+1. The compiled filter matches a pure Python reference of the state machine
+2. The cooldown counts the trades after the deactivation (cooldown 0 and 1 differ)
+3. The default parameter sweep has no duplicate rows caused by the cooldown
+4. The autocorrelation filter (rolling sums) matches a brute-force reference
+   that recomputes the autocorrelation of every window from scratch
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.dynamic_portfolio_modules.filters import (apply_streak_filter, apply_streak_filter_matrix,
+                                                       optimize_streak_filter_parameters,
+                                                       apply_autocorrelation_filter_matrix,
+                                                       optimize_autocorrelation_filter_parameters)
+
+
+def reference_streak_filter(balance, min_wins, max_losses, cooldown_trades):
+    """
+    Pure Python reference: decisions use only closed trades, the cooldown
+    trades are skipped and do not count towards the reactivation streak.
+    """
+    adjusted = [balance[0]]
+    is_active = False
+    win_streak = loss_streak = cooldown_remaining = 0
+
+    for i in range(1, len(balance)):
+        pnl = balance[i] - balance[i - 1]
+        if pnl != 0:
+            waiting = False
+            if not is_active:
+                if cooldown_remaining > 0:
+                    waiting = True
+                elif win_streak >= min_wins:
+                    is_active = True
+            elif loss_streak >= max_losses:
+                is_active = False
+                cooldown_remaining = cooldown_trades
+
+            adjusted.append(adjusted[-1] + (pnl if is_active else 0.0))
+
+            if pnl > 0:
+                win_streak, loss_streak = win_streak + 1, 0
+            else:
+                win_streak, loss_streak = 0, loss_streak + 1
+            if waiting:
+                cooldown_remaining -= 1
+                win_streak = 0
+        else:
+            adjusted.append(adjusted[-1])
+
+    return np.array(adjusted)
+
+
+def reference_autocorrelation_filter(balance, window_trades, lag, min_abs_autocorr):
+    """
+    Brute-force reference: the autocorrelation of the last window_trades pairs
+    (pnl[s], pnl[s - lag]) of the closed trades is recomputed for every trade.
+    """
+    adjusted = [balance[0]]
+    trades = []
+
+    for i in range(1, len(balance)):
+        pnl = balance[i] - balance[i - 1]
+        if pnl == 0:
+            adjusted.append(adjusted[-1])
+            continue
+
+        is_active = True
+        pairs = [(trades[s], trades[s - lag]) for s in range(lag, len(trades))]
+        if len(pairs) >= window_trades:
+            x, y = np.array(pairs[-window_trades:]).T
+            cov = np.mean(x * y) - np.mean(x) * np.mean(y)
+            var_x, var_y = np.var(x), np.var(y)
+            if var_x > 0 and var_y > 0:
+                rho = cov / np.sqrt(var_x * var_y)
+                if abs(rho) >= min_abs_autocorr and rho * trades[len(trades) - lag] < 0:
+                    is_active = False
+
+        adjusted.append(adjusted[-1] + (pnl if is_active else 0.0))
+        trades.append(pnl)
+
+    return np.array(adjusted)
+
+
+def generate_test_balances(n_series=20, n_days=300):
+    """
+    Generate synthetic balance curves with days without trades.
+    """
+    np.random.seed(42)  # For reproducibility
+    pnl = np.random.normal(5, 100, (n_days, n_series))
+    pnl[np.random.random((n_days, n_series)) < 0.3] = 0
+    index = pd.date_range('2024-01-01', periods=n_days, freq='D')
+    return pd.DataFrame(10000 + np.cumsum(pnl, axis=0), index=index,
+                        columns=[f'S{j}' for j in range(n_series)])
+
+
+def test_streak_filter_matches_reference():
+    """
+    Compare the compiled filter with the reference on random balances.
+    """
+    balance_df = generate_test_balances()
+    for min_wins in [1, 2, 3]:
+        for max_losses in [1, 2, 3]:
+            for cooldown in [0, 1, 2, 3]:
+                filtered = apply_streak_filter_matrix(balance_df, min_wins, max_losses, cooldown)
+                for name in balance_df.columns:
+                    expected = reference_streak_filter(balance_df[name].values, min_wins, max_losses, cooldown)
+                    assert np.allclose(filtered[name].values, expected), (name, min_wins, max_losses, cooldown)
+    print("Compiled streak filter matches the reference: OK")
+
+
+def test_cooldown_zero_and_one_diverge():
+    """
+    Trades: win, loss, win, win, win with min_wins = max_losses = 1.
+
+    The loss activates the strategy (one win before it) and the third trade
+    deactivates it. With cooldown 0 the fourth trade reactivates it; with
+    cooldown 1 the fourth trade is skipped and does not count as a win, so
+    the strategy stays off for the fifth trade too.
+    """
+    balance = pd.Series([100.0, 110.0, 105.0, 115.0, 125.0, 135.0],
+                        index=pd.date_range('2024-01-01', periods=6, freq='D'))
+
+    no_cooldown = apply_streak_filter(balance, 1, 1, cooldown_trades=0)
+    one_cooldown = apply_streak_filter(balance, 1, 1, cooldown_trades=1)
+
+    assert np.allclose(no_cooldown.values, [100, 100, 95, 95, 105, 115]), no_cooldown.values
+    assert np.allclose(one_cooldown.values, [100, 100, 95, 95, 95, 95]), one_cooldown.values
+    print("Cooldown 0 and 1 diverge: OK")
+
+
+def test_default_sweep_has_distinct_cooldowns():
+    """
+    With the default cooldown range every cooldown gives its own result.
+    """
+    balance_df = generate_test_balances(n_series=5, n_days=500)
+    returns_df = balance_df.pct_change().fillna(0)
+    strategies = {name: pd.DataFrame({'BALANCE': balance_df[name], 'returns': returns_df[name]})
+                  for name in balance_df.columns}
+
+    results = optimize_streak_filter_parameters(strategies, min_wins_range=[1, 2], max_losses_range=[2])
+    for _, group in results.groupby(['min_wins_to_activate', 'max_losses_to_deactivate']):
+        assert group['Filtered_Sharpe'].round(12).nunique() == len(group), group
+    print("Default cooldown range gives distinct rows: OK")
+
+
+def test_autocorrelation_filter_matches_reference():
+    """
+    Compare the compiled filter with the brute-force reference, including
+    series with autocorrelated trades (where the filter skips trades).
+    """
+    balance_df = generate_test_balances(n_series=6, n_days=400)
+    # Autocorrelated P&L (AR(1) with positive and negative coefficient) in the last two columns
+    np.random.seed(3)  # For reproducibility
+    for name, phi in [('S4', 0.6), ('S5', -0.6)]:
+        pnl = np.zeros(len(balance_df))
+        for t in range(1, len(pnl)):
+            pnl[t] = phi * pnl[t - 1] + np.random.normal(0, 100)
+        balance_df[name] = 10000 + np.cumsum(pnl)
+
+    n_skipped = 0
+    for window_trades in [3, 10, 30]:
+        for lag in [1, 2, 5]:
+            for min_abs_autocorr in [0.0, 0.1, 0.3]:
+                filtered = apply_autocorrelation_filter_matrix(balance_df, window_trades, lag, min_abs_autocorr)
+                for name in balance_df.columns:
+                    expected = reference_autocorrelation_filter(balance_df[name].values, window_trades,
+                                                                lag, min_abs_autocorr)
+                    assert np.allclose(filtered[name].values, expected), (name, window_trades, lag, min_abs_autocorr)
+                n_skipped += int((~np.isclose(filtered.diff().values[1:], balance_df.diff().values[1:])).sum())
+    assert n_skipped > 0
+    print(f"Compiled autocorrelation filter matches the brute force ({n_skipped} skipped trades): OK")
+
+    strategies = {name: pd.DataFrame({'BALANCE': balance_df[name], 'returns': balance_df[name].pct_change().fillna(0)})
+                  for name in balance_df.columns}
+    results = optimize_autocorrelation_filter_parameters(strategies, window_trades_range=[10, 30], lag_range=[1, 2],
+                                                         min_abs_autocorr_range=[0.1])
+    combos = set(zip(results['window_trades'], results['lag'], results['min_abs_autocorr']))
+    assert combos == {(10, 1, 0.1), (10, 2, 0.1), (30, 1, 0.1), (30, 2, 0.1)}, combos
+    print("Autocorrelation parameter sweep covers every combination: OK")
+
+
+if __name__ == "__main__":
+    test_streak_filter_matches_reference()
+    test_cooldown_zero_and_one_diverge()
+    test_default_sweep_has_distinct_cooldowns()
+    test_autocorrelation_filter_matches_reference()
+    print("\nTest completed.")
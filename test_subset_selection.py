@@ -0,0 +1,114 @@
+"""
+Test script for the subset selection of the portfolio modules.
+
+This script verifies, for the Sharpe and the linearity objective, that:
+1. The objective of a subset equals the metric of its equal-weight portfolio
+2. The branch and bound finds the brute-force optimum for every k on small N
+   (sequential, parallel and starting from the beam search score)
+3. The beam search never beats the brute force and is exact with a full beam
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+from itertools import combinations
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.dynamic_portfolio_modules.subset_selection import SubsetSearch, OBJECTIVES
+
+
+def generate_test_returns(n_days=250, n_strategies=9):
+    """
+    Generate correlated daily returns with different drifts.
+    """
+    np.random.seed(42)  # For reproducibility
+    market = np.random.normal(0, 0.005, (n_days, 1))
+    drift = np.random.uniform(-0.0005, 0.001, n_strategies)
+    returns = drift + market * np.random.uniform(0, 1.5, n_strategies) + np.random.normal(0, 0.01, (n_days, n_strategies))
+    return pd.DataFrame(returns, columns=[f'S{j}' for j in range(n_strategies)])
+
+
+def reference_objective(returns_df, subset, objective):
+    """
+    Objective computed directly on the equal-weight portfolio returns.
+    """
+    portfolio = returns_df.values[:, list(subset)].mean(axis=1)
+    if objective == 'sharpe':
+        return np.sqrt(252) * portfolio.mean() / portfolio.std()
+    curve = np.cumsum(portfolio)
+    return np.corrcoef(np.arange(len(curve)), curve)[0, 1]
+
+
+def brute_force(search, k):
+    """
+    Best subset of size k by enumerating all combinations.
+    """
+    return max((search.score(subset), subset) for subset in combinations(range(len(search.strategy_names)), k))
+
+
+def test_objective_matches_portfolio_metric():
+    """
+    SubsetSearch.score is the Sharpe / time correlation of the portfolio.
+    """
+    returns_df = generate_test_returns()
+    for objective in OBJECTIVES:
+        search = SubsetSearch(returns_df, objective)
+        for subset in [(0,), (1, 4), (0, 2, 5, 8)]:
+            expected = reference_objective(returns_df, subset, objective)
+            assert np.isclose(search.score(subset), expected), (objective, subset)
+    print("Objective equals the portfolio metric: OK")
+
+
+def test_branch_and_bound_matches_brute_force():
+    """
+    Exact search on every k, for both objectives.
+    """
+    returns_df = generate_test_returns()
+    n_strategies = returns_df.shape[1]
+    for objective in OBJECTIVES:
+        search = SubsetSearch(returns_df, objective)
+        for k in range(1, n_strategies + 1):
+            expected_score, expected_subset = brute_force(search, k)
+            beam_score = search.beam_search(k, beam_width=4)[0][0]
+
+            for n_jobs, initial in [(1, -np.inf), (3, -np.inf), (1, beam_score)]:
+                score, subset, proven = search.branch_and_bound(k, initial_score=initial, n_jobs=n_jobs)
+                assert proven, (objective, k, n_jobs)
+                if subset is None:
+                    # The beam search already had the optimum
+                    assert np.isclose(initial, expected_score), (objective, k)
+                else:
+                    assert subset == expected_subset, (objective, k, n_jobs, subset, expected_subset)
+                    assert np.isclose(score, expected_score), (objective, k, n_jobs)
+        print(f"{objective}: branch and bound equals brute force for k = 1..{n_strategies}, OK")
+
+
+def test_beam_search_against_brute_force():
+    """
+    Narrow beams are bounded by the optimum, a full beam finds it.
+    """
+    returns_df = generate_test_returns()
+    n_strategies = returns_df.shape[1]
+    for objective in OBJECTIVES:
+        search = SubsetSearch(returns_df, objective)
+        for k in range(1, n_strategies + 1):
+            expected_score, expected_subset = brute_force(search, k)
+
+            narrow = search.beam_search(k, beam_width=2, top_n=3)
+            assert all(score <= expected_score + 1e-12 for score, _ in narrow), (objective, k)
+            assert all(np.isclose(score, search.score(subset)) for score, subset in narrow), (objective, k)
+
+            full = search.beam_search(k, beam_width=200)
+            assert full[0][1] == expected_subset and np.isclose(full[0][0], expected_score), (objective, k)
+        print(f"{objective}: beam search bounded by brute force, exact with a full beam, OK")
+
+
+if __name__ == "__main__":
+    test_objective_matches_portfolio_metric()
+    test_branch_and_bound_matches_brute_force()
+    test_beam_search_against_brute_force()
+    print("\nTest completed.")
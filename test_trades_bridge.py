@@ -0,0 +1,142 @@
+"""
+Test script for the conversion of backtest trades into portfolio returns.
+
+This script verifies that:
+1. A Backtest and its trades DataFrame give the same balances, and the daily
+   balance changes equal the PnL of the trades closed that day
+2. A DataFrame ledger with per-strategy pip values and explicit dates puts
+   earlier trades in the initial balance and ignores later ones
+3. Time zones: tz-aware dates with naive exits (and the reverse) assign
+   every trade to its local exit day
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.backtester.backtest_engine import Backtest
+from modules.backtester import indicators
+from modules.dynamic_portfolio_modules.data_loader import trades_to_returns_matrix
+
+
+def generate_minute_data():
+    """
+    Generate 10 weekdays of minute bars with Bollinger bands.
+    """
+    index = pd.date_range('2025-07-14', periods=12 * 24 * 60, freq='min')
+    index = index[index.weekday < 5]
+
+    np.random.seed(42)  # For reproducibility
+    price = 1.0 + np.cumsum(np.random.normal(0, 0.0005, len(index)))
+    df = pd.DataFrame({'bid': price - 1e-4, 'ask': price + 1e-4, 'midprice': price}, index=index)
+    return indicators.bollinger_bands(df, price_column='midprice', window=20, num_std_dev=2.0).dropna()
+
+
+def create_trades_ledger():
+    """
+    Trades of two strategies, with several exits on the same day.
+    """
+    return {
+        'A': pd.DataFrame({
+            'PnL': [10.0, -4.0, 6.0, 3.0],
+            'Entry_Time': pd.to_datetime(['2025-01-01 10:00', '2025-01-02 09:00', '2025-01-02 12:00', '2025-01-05 08:00']),
+            'Exit_Time': pd.to_datetime(['2025-01-01 22:00', '2025-01-02 11:00', '2025-01-02 23:30', '2025-01-09 08:00'])
+        }),
+        'B': pd.DataFrame({
+            'PnL': [-2.0, 5.0],
+            'Entry_Time': pd.to_datetime(['2025-01-02 01:00', '2025-01-03 00:30']),
+            'Exit_Time': pd.to_datetime(['2025-01-03 00:10', '2025-01-04 15:00'])
+        }),
+    }
+
+
+def test_backtest_ledger_matches_trade_pnl():
+    """
+    Backtest and DataFrame ledgers agree and the daily changes are the trade PnL.
+    """
+    backtester = Backtest(generate_minute_data())
+    backtester.run()
+    trades = backtester.get_trades_dataframe()
+    assert len(trades) > 0
+
+    _, from_backtest, _ = trades_to_returns_matrix({'BB': backtester}, pip_value=2.0)
+    _, from_trades, _ = trades_to_returns_matrix({'BB': trades}, pip_value=2.0)
+    pd.testing.assert_frame_equal(from_backtest, from_trades)
+
+    expected = (trades['PnL'] * 2.0).groupby(trades['Exit_Time'].dt.normalize()).sum()
+    daily_change = from_backtest['BB'].diff().fillna(from_backtest['BB'].iloc[0] - 10000)
+    assert np.allclose(daily_change.reindex(expected.index).values, expected.values)
+    assert np.isclose(daily_change.drop(expected.index).abs().sum(), 0)
+    assert np.isclose(from_backtest['BB'].iloc[-1], 10000 + 2.0 * trades['PnL'].sum())
+    print(f"Backtest ledger: {len(trades)} trades over {len(from_backtest)} days, OK")
+
+
+def test_dataframe_ledger_with_dates():
+    """
+    Per-strategy pip values and explicit dates.
+    """
+    ledgers = create_trades_ledger()
+    _, combined_df, returns_df = trades_to_returns_matrix(ledgers, pip_value={'A': 1.0, 'B': 10.0})
+    assert combined_df.index[0] == pd.Timestamp('2025-01-01') and combined_df.index[-1] == pd.Timestamp('2025-01-09')
+    assert combined_df.loc['2025-01-02', 'A'] == 10000 + 10 - 4 + 6
+    assert combined_df.loc['2025-01-03', 'B'] == 10000 - 20
+    assert combined_df.loc['2025-01-09', 'A'] == 10000 + 15
+    assert combined_df.loc['2025-01-04', 'B'] == 10000 + 30
+    assert returns_df.shape == combined_df.shape
+
+    dates = pd.date_range('2025-01-02', '2025-01-05', freq='D')
+    _, combined_df, _ = trades_to_returns_matrix(ledgers, pip_value={'A': 1.0, 'B': 10.0}, dates=dates)
+    assert combined_df.index.equals(dates)
+    assert combined_df['A'].tolist() == [10012, 10012, 10012, 10012]  # Exit on 2025-01-09 ignored
+    assert combined_df['B'].tolist() == [10000, 9980, 10030, 10030]
+    print("DataFrame ledger with pip values and explicit dates: OK")
+
+
+def test_time_zones():
+    """
+    Exits are placed on their local day whatever the time zone of dates.
+    """
+    ledgers = create_trades_ledger()
+    naive_dates = pd.date_range('2025-01-01', '2025-01-09', freq='D')
+    _, expected, _ = trades_to_returns_matrix(ledgers, dates=naive_dates)
+
+    # tz-aware dates, naive exits (already in the dates' local time)
+    aware_dates = naive_dates.tz_localize('Europe/Athens')
+    _, combined_df, _ = trades_to_returns_matrix(ledgers, dates=aware_dates)
+    assert combined_df.index.equals(aware_dates)
+    assert np.array_equal(combined_df.values, expected.values)
+
+    # tz-aware exits, naive dates: the exits keep their own local day
+    aware_ledgers = {name: ledger.assign(Entry_Time=ledger['Entry_Time'].dt.tz_localize('Europe/Athens'),
+                                         Exit_Time=ledger['Exit_Time'].dt.tz_localize('Europe/Athens'))
+                     for name, ledger in ledgers.items()}
+    _, combined_df, _ = trades_to_returns_matrix(aware_ledgers, dates=naive_dates)
+    assert np.array_equal(combined_df.values, expected.values)
+    _, combined_df, _ = trades_to_returns_matrix(aware_ledgers)
+    assert np.array_equal(combined_df.values, expected.values)
+
+    # Exits in UTC, dates in Athens: 2025-01-02 23:30 UTC closes on 2025-01-03 in Athens
+    utc_ledgers = {name: ledger.assign(Entry_Time=ledger['Entry_Time'].dt.tz_convert('UTC'),
+                                       Exit_Time=ledger['Exit_Time'].dt.tz_convert('UTC'))
+                   for name, ledger in aware_ledgers.items()}
+    _, combined_df, _ = trades_to_returns_matrix(utc_ledgers, dates=aware_dates)
+    assert np.array_equal(combined_df.values, expected.values)
+
+    late_trade = {'A': pd.DataFrame({'PnL': [1.0],
+                                     'Entry_Time': [pd.Timestamp('2025-01-02 20:00', tz='UTC')],
+                                     'Exit_Time': [pd.Timestamp('2025-01-02 23:30', tz='UTC')]})}
+    _, combined_df, _ = trades_to_returns_matrix(late_trade, dates=aware_dates)
+    assert combined_df.loc[combined_df['A'].diff() > 0].index[0] == pd.Timestamp('2025-01-03', tz='Europe/Athens')
+    print("Time zones of dates and exits: OK")
+
+
+if __name__ == "__main__":
+    test_backtest_ledger_matches_trade_pnl()
+    test_dataframe_ledger_with_dates()
+    test_time_zones()
+    print("\nTest completed.")
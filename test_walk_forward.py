@@ -0,0 +1,99 @@
+"""
+Test script for the walk-forward selection of the portfolio rebalancer.
+
+This script verifies that:
+1. The memmap-parallel (n_jobs > 1) and the sequential grid give identical
+   configuration returns and walk-forward results
+2. Training and test windows never overlap and every fold picks the best
+   configuration of its own training window only
+3. The out-of-sample curve is made of the chosen configurations' returns
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Import the required modules
+from modules.dynamic_portfolio_modules.portfolio_rebalancer import DynamicPortfolioRebalancer
+from modules.dynamic_portfolio_modules.walk_forward import (walk_forward_portfolio_optimization,
+                                                            calculate_config_returns_matrix,
+                                                            _rank_training_window)
+
+LOOKBACK_RANGE = [20, 45]
+METHODS = ['momentum', 'equal', 'min_variance']
+
+
+def create_test_rebalancer(n_days=700, n_strategies=6):
+    """
+    Rebalancer on synthetic daily returns with regime changes.
+    """
+    np.random.seed(42)  # For reproducibility
+    drift = np.random.uniform(-0.001, 0.002, (n_days // 100 + 1, n_strategies)).repeat(100, axis=0)[:n_days]
+    returns_matrix = drift + np.random.normal(0, 0.01, (n_days, n_strategies))
+    dates = pd.date_range('2022-01-03', periods=n_days, freq='D')
+    return DynamicPortfolioRebalancer.from_arrays(returns_matrix, dates, [f'S{j}' for j in range(n_strategies)])
+
+
+def run_walk_forward(rebalancer, n_jobs, anchored=False):
+    """
+    Walk-forward on the test grid.
+    """
+    return walk_forward_portfolio_optimization(rebalancer, train_days=120, test_days=60,
+                                               lookback_range=LOOKBACK_RANGE, methods=METHODS,
+                                               anchored=anchored, n_jobs=n_jobs)
+
+
+def test_parallel_matches_sequential():
+    """
+    Compare the memmap-parallel and the sequential path.
+    """
+    configs = [(lookback, method) for lookback in LOOKBACK_RANGE for method in METHODS]
+    sequential_returns, sequential_first = calculate_config_returns_matrix(create_test_rebalancer(), configs, n_jobs=1)
+    parallel_returns, parallel_first = calculate_config_returns_matrix(create_test_rebalancer(), configs, n_jobs=2)
+    assert np.array_equal(sequential_returns, parallel_returns)
+    assert np.array_equal(sequential_first, parallel_first)
+
+    sequential = run_walk_forward(create_test_rebalancer(), n_jobs=1)
+    parallel = run_walk_forward(create_test_rebalancer(), n_jobs=2)
+    pd.testing.assert_frame_equal(sequential['portfolio_data'], parallel['portfolio_data'])
+    pd.testing.assert_frame_equal(sequential['selections'], parallel['selections'])
+    print(f"Parallel and sequential paths identical on {len(configs)} configurations: OK")
+
+
+def test_no_train_test_overlap():
+    """
+    Every fold trains strictly before its test period and picks the best training configuration.
+    """
+    for anchored in [False, True]:
+        result = run_walk_forward(create_test_rebalancer(), n_jobs=1, anchored=anchored)
+        selections = result['selections']
+        config_returns = result['config_returns']
+        portfolio_data = result['portfolio_data']
+
+        assert (selections['train_end'] < selections['test_start']).all(), anchored
+        assert (selections['test_start'].iloc[1:].values > selections['test_end'].iloc[:-1].values).all(), anchored
+        assert portfolio_data.index[0] == selections['test_start'].iloc[0], anchored
+        if anchored:
+            assert selections['train_start'].nunique() == 1
+        else:
+            assert ((selections['test_start'] - selections['train_start']).dt.days == 120).all()
+
+        for _, fold in selections.iterrows():
+            train = config_returns.loc[fold['train_start']:fold['train_end']].values
+            best = int(np.argmax(_rank_training_window(train, 'sharpe_ratio')))
+            assert config_returns.columns[best] == (fold['lookback'], fold['method']), fold['fold']
+
+            test = config_returns.loc[fold['test_start']:fold['test_end'], (fold['lookback'], fold['method'])]
+            oos = portfolio_data.loc[fold['test_start']:fold['test_end'], 'returns']
+            assert np.array_equal(oos.values, test.values), fold['fold']
+        print(f"anchored={anchored}: {len(selections)} folds without train/test overlap, OK")
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_no_train_test_overlap()
+    print("\nTest completed.")